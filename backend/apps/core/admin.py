@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Notification, Task, SystemEvent
+from .models import User, Notification, Task, SystemEvent, Job, OutboxMessage, ScheduledTaskRun, Sequence, UploadSession
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -14,3 +14,36 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(Notification)
 admin.site.register(Task)
 admin.site.register(SystemEvent)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "run_at", "attempts", "max_attempts", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "status", "attempts", "available_at", "processed_at")
+    list_filter = ("status", "topic")
+    search_fields = ("topic", "dedupe_key", "last_error")
+
+
+@admin.register(ScheduledTaskRun)
+class ScheduledTaskRunAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "started_at", "duration_ms")
+    list_filter = ("status", "name")
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_value", "updated_at")
+    search_fields = ("name",)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "filename", "status", "received", "size", "user", "created_at")
+    list_filter = ("status",)
+    search_fields = ("filename", "sha256", "path")
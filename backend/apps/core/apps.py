@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Register background job handlers (jobs.py) and outbox subscribers (outbox.py)
+        autodiscover_modules("jobs", "outbox")
+        # Core modules that register job handlers of their own
+        from apps.core import images, uploads  # noqa: F401
@@ -0,0 +1,140 @@
+"""Resized copies (derivatives) of uploaded photos.
+
+Slab, cheque and site photos are phone pictures of several megabytes; list
+views should not load them at full size. For every stored original
+``<dir>/<stem>.<ext>`` a background job writes one file per entry of
+``IMAGE_SIZES`` next to it::
+
+    slabs/abc123.jpg -> slabs/abc123.thumb-v1.webp, slabs/abc123.medium-v1.webp
+
+Originals are never rewritten in place (uploads get a fresh name), so a
+derivative name identifies its content and can be cached by clients for as
+long as they like. Bump ``IMAGE_DERIVATIVE_VERSION`` when sizes or encoding
+change so clients fetch the new files.
+
+Derivatives are WebP when Pillow was built with WebP support, JPEG otherwise.
+"""
+
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+
+from apps.core.jobs import enqueue_once, register
+
+IMAGE_DERIVATIVE_VERSION = "1"
+IMAGE_JOB = "core.image_derivatives"
+
+# Longest side in pixels.
+IMAGE_SIZES = {"thumb": 320, "medium": 1280}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# model -> image field names, filled by ``watch_image_fields``.
+WATCHED_FIELDS = {}
+
+
+def _output_format():
+    from PIL import features
+
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+
+def derivative_path(name, size):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    _, ext = _output_format()
+    return posixpath.join(directory, f"{stem}.{size}-v{IMAGE_DERIVATIVE_VERSION}.{ext}")
+
+
+def has_derivatives(name):
+    return all(default_storage.exists(derivative_path(name, size)) for size in IMAGE_SIZES)
+
+
+def generate_derivatives(name, *, force=False):
+    """Write the missing derivatives of ``name``; returns the paths written."""
+    from PIL import Image, ImageOps
+
+    targets = {
+        size: derivative_path(name, size)
+        for size in IMAGE_SIZES
+        if force or not default_storage.exists(derivative_path(name, size))
+    }
+    if not targets:
+        return []
+
+    image_format, _ = _output_format()
+    with default_storage.open(name, "rb") as fh:
+        with Image.open(fh) as original:
+            # Phones store the orientation in EXIF; bake it in before resizing.
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            if image_format == "JPEG" and image.mode == "RGBA":
+                image = image.convert("RGB")
+
+            written = []
+            for size, path in targets.items():
+                copy = image.copy()
+                copy.thumbnail((IMAGE_SIZES[size], IMAGE_SIZES[size]), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                if image_format == "WEBP":
+                    copy.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+                else:
+                    copy.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                if default_storage.exists(path):
+                    default_storage.delete(path)
+                saved = default_storage.save(path, ContentFile(buffer.getvalue()))
+                if saved != path:
+                    # A concurrent job stored this derivative first; keep that file.
+                    default_storage.delete(saved)
+                written.append(path)
+    return written
+
+
+def delete_derivatives(name):
+    for size in IMAGE_SIZES:
+        path = derivative_path(name, size)
+        if default_storage.exists(path):
+            default_storage.delete(path)
+
+
+def enqueue_derivatives(name):
+    if name and not has_derivatives(name):
+        enqueue_once(IMAGE_JOB, {"name": name})
+
+
+def derivative_url(file_field, size="thumb", request=None):
+    """URL of the resized photo; the original's while the job has not run yet."""
+    if not file_field:
+        return None
+    path = derivative_path(file_field.name, size)
+    try:
+        url = default_storage.url(path) if default_storage.exists(path) else file_field.url
+    except Exception:
+        return None
+    return request.build_absolute_uri(url) if request else url
+
+
+@register(IMAGE_JOB)
+def generate_derivatives_job(name, force=False):
+    if not default_storage.exists(name):
+        # Replaced or deleted before the job ran.
+        return
+    generate_derivatives(name, force=force)
+
+
+def _queue_changed_images(sender, instance, update_fields=None, **kwargs):
+    for field in WATCHED_FIELDS.get(sender, ()):
+        if update_fields is not None and field not in update_fields:
+            continue
+        enqueue_derivatives(getattr(instance, field).name)
+
+
+def watch_image_fields(model, *fields):
+    """Queue derivatives whenever one of ``fields`` of ``model`` is saved with a photo."""
+    WATCHED_FIELDS[model] = tuple(fields)
+    post_save.connect(_queue_changed_images, sender=model, dispatch_uid=f"image_derivatives_{model._meta.label}")
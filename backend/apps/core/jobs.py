@@ -0,0 +1,191 @@
+"""Database-backed job queue.
+
+Jobs live in the ``Job`` table and are claimed by ``run_worker`` processes with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of workers can share the
+existing database without an external broker.
+
+Handlers are registered per app in a ``jobs.py`` module (autodiscovered on
+startup) and are called with the job payload as keyword arguments::
+
+    @register("finance.dispatch_payment_reminders")
+    def dispatch_payment_reminders(batch_size=200):
+        ...
+
+    enqueue("finance.dispatch_payment_reminders", {"batch_size": 500})
+"""
+
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import Job
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY = {}
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+STALE_LOCK_TIMEOUT = timedelta(minutes=30)
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+
+def register(name):
+    def decorator(func):
+        _REGISTRY[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    return _REGISTRY.get(name)
+
+
+def registered_jobs():
+    return sorted(_REGISTRY)
+
+
+def enqueue(name, payload=None, *, priority=0, run_at=None, delay=None, max_attempts=5):
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown job: {name}")
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_once(name, payload=None, **kwargs):
+    """Queue ``name`` unless a job with the same payload is already waiting or running."""
+    payload = payload or {}
+    pending = Job.objects.filter(
+        name=name,
+        status__in=("QUEUED", "RUNNING"),
+        **{f"payload__{key}": value for key, value in payload.items()},
+    )
+    if pending.exists():
+        return None
+    return enqueue(name, payload, **kwargs)
+
+
+def backoff_delay(attempts):
+    seconds = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def claim_jobs(worker_id, limit=10, now=None):
+    """Lock up to ``limit`` due jobs for this worker and mark them RUNNING.
+
+    RUNNING jobs whose lock is older than ``STALE_LOCK_TIMEOUT`` belonged to a
+    worker that died mid-run and are claimed again; live workers keep
+    ``locked_at`` fresh with a heartbeat while the handler runs.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="QUEUED", run_at__lte=now)
+                | Q(status="RUNNING", locked_at__lt=now - STALE_LOCK_TIMEOUT)
+            )
+            .order_by("-priority", "run_at", "id")[:limit]
+        )
+        if not jobs:
+            return []
+        for job in jobs:
+            job.status = "RUNNING"
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.attempts += 1
+            job.updated_at = now
+        Job.objects.bulk_update(jobs, ["status", "locked_by", "locked_at", "attempts", "updated_at"])
+    return [job.id for job in jobs]
+
+
+class _Heartbeat(threading.Thread):
+    """Refreshes ``locked_at`` of a running job so it is not reclaimed as stale."""
+
+    def __init__(self, claim):
+        super().__init__(daemon=True)
+        self.claim = claim
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(HEARTBEAT_INTERVAL.total_seconds()):
+                Job.objects.filter(**self.claim).update(locked_at=timezone.now())
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def execute_job(job_id):
+    """Run one claimed job and record its outcome. Returns the final status.
+
+    Handlers manage their own transactions (batch jobs commit per batch).
+    The outcome is written only while this claim still holds the job: if it
+    was reclaimed in the meantime, the new owner's state is left alone and
+    None is returned.
+    """
+    job = Job.objects.filter(id=job_id, status="RUNNING").first()
+    if job is None:
+        return None
+
+    # locked_by + attempts identify this claim; a reclaim bumps attempts.
+    claim = {"id": job.id, "status": "RUNNING", "locked_by": job.locked_by, "attempts": job.attempts}
+    handler = get_handler(job.name)
+    heartbeat = _Heartbeat(claim)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{job.name}'")
+        handler(**(job.payload or {}))
+    except Exception:
+        heartbeat.stop()
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed", job.id, job.name)
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            status = "QUEUED"
+            updates = {"run_at": now + backoff_delay(job.attempts)}
+        else:
+            status = "FAILED"
+            updates = {"finished_at": now}
+        updated = Job.objects.filter(**claim).update(
+            status=status,
+            last_error=error[-4000:],
+            locked_by="",
+            locked_at=None,
+            updated_at=now,
+            **updates,
+        )
+        return status if updated else _lost_claim(job)
+
+    heartbeat.stop()
+    now = timezone.now()
+    updated = Job.objects.filter(**claim).update(
+        status="DONE",
+        locked_by="",
+        locked_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    return "DONE" if updated else _lost_claim(job)
+
+
+def _lost_claim(job):
+    logger.warning("Job %s (%s) was reclaimed by another worker; outcome not recorded", job.id, job.name)
+    return None
@@ -0,0 +1,34 @@
+import hashlib
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def lock_key(name):
+    """Map a lock name to a signed 64-bit key for pg_advisory_lock."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(name):
+    """Try to take a session-level advisory lock; yields True if it was acquired.
+
+    Non-blocking: a second holder gets False immediately instead of waiting.
+    Databases without advisory locks (SQLite in development/tests) always
+    acquire, which is fine for their single-process deployments.
+    """
+    if connection.vendor != "postgresql":
+        yield True
+        return
+
+    key = lock_key(name)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        acquired = bool(cursor.fetchone()[0])
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.images import WATCHED_FIELDS, enqueue_derivatives, generate_derivatives, has_derivatives
+
+
+class Command(BaseCommand):
+    help = "Mevcut fotoğraflar için eksik küçük boyutlu kopyaları (thumbnail/medium) kuyruğa ekler veya üretir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sync", action="store_true", help="Kuyruğa eklemek yerine bu süreçte üret.")
+
+    def handle(self, *args, **options):
+        missing = errors = 0
+        for model, fields in WATCHED_FIELDS.items():
+            for field in fields:
+                names = (
+                    model.objects.exclude(**{f"{field}__isnull": True})
+                    .exclude(**{field: ""})
+                    .values_list(field, flat=True)
+                    .iterator()
+                )
+                for name in names:
+                    if has_derivatives(name):
+                        continue
+                    missing += 1
+                    if not options["sync"]:
+                        enqueue_derivatives(name)
+                        continue
+                    try:
+                        generate_derivatives(name)
+                    except Exception as exc:
+                        errors += 1
+                        self.stderr.write(f"{model._meta.label}.{field} {name}: {exc}")
+
+        action = "üretildi" if options["sync"] else "kuyruğa eklendi"
+        self.stdout.write(self.style.SUCCESS(f"{missing} fotoğraf {action}. Hata: {errors}"))
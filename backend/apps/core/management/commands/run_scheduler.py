@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.scheduler import last_runs, load_periodic_tasks, run_due_tasks, run_task
+
+
+class Command(BaseCommand):
+    help = "settings.PERIODIC_TASKS tablosundaki periyodik görevleri cron yerine çalıştırır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tick", type=float, default=30.0, help="Seconds between schedule checks.")
+        parser.add_argument("--once", action="store_true", help="Run whatever is due now and exit.")
+        parser.add_argument("--list", action="store_true", help="Show the task table with last/next runs.")
+        parser.add_argument("--run", metavar="NAME", help="Run one task immediately, regardless of schedule.")
+
+    def handle(self, *args, **options):
+        tasks = load_periodic_tasks()
+        started_at = timezone.now()
+
+        if options["list"]:
+            previous = last_runs([task.name for task in tasks])
+            for task in tasks:
+                last = previous.get(task.name)
+                last_text = f"{timezone.localtime(last):%Y-%m-%d %H:%M}" if last else "-"
+                next_text = f"{timezone.localtime(task.next_run(last, started_at)):%Y-%m-%d %H:%M}"
+                self.stdout.write(f"{task.name:<32} {task.describe():<20} son: {last_text:<16} sonraki: {next_text}")
+            return
+
+        if options["run"]:
+            task = next((t for t in tasks if t.name == options["run"]), None)
+            if task is None:
+                raise CommandError(f"Bilinmeyen görev: {options['run']}")
+            self._report(run_task(task), task.name)
+            return
+
+        self.stdout.write(f"Zamanlayıcı başladı ({len(tasks)} görev).")
+        try:
+            while True:
+                for run in run_due_tasks(tasks, started_at=started_at):
+                    self._report(run, run.name)
+                if options["once"]:
+                    break
+                time.sleep(options["tick"])
+        except KeyboardInterrupt:
+            pass
+
+    def _report(self, run, name):
+        if run is None:
+            self.stdout.write(self.style.WARNING(f"{name}: başka bir zamanlayıcı tarafından çalıştırılıyor."))
+        elif run.status == "SUCCESS":
+            self.stdout.write(self.style.SUCCESS(f"{name}: tamamlandı ({run.duration_ms} ms)."))
+        else:
+            self.stdout.write(self.style.ERROR(f"{name}: hata ({run.duration_ms} ms).\n{run.error}"))
@@ -0,0 +1,74 @@
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.core.jobs import claim_jobs, execute_job
+
+
+def _init_pool_process():
+    # Spawned children (non-fork platforms) start without Django configured;
+    # forked children must not reuse the parent's database connections.
+    django.setup()
+    connections.close_all()
+
+
+def _run_in_pool(job_id):
+    try:
+        return execute_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Veritabanı kuyruğundaki arka plan işlerini çalıştırır."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=int(os.getenv("WORKER_PROCESSES", "2")),
+            help="Process pool size. 0 runs jobs inline in this process.",
+        )
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--sleep", type=float, default=2.0, help="Idle wait between polls (seconds).")
+        parser.add_argument("--once", action="store_true", help="Drain due jobs and exit.")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        processes = max(0, options["processes"])
+        batch_size = max(1, options["batch_size"], processes)
+
+        pool = None
+        if processes:
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_pool_process)
+
+        counts = {}
+        try:
+            while True:
+                job_ids = claim_jobs(worker_id, limit=batch_size)
+                if not job_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                if pool:
+                    results = list(pool.map(_run_in_pool, job_ids))
+                else:
+                    results = [execute_job(job_id) for job_id in job_ids]
+                for result in results:
+                    counts[result] = counts.get(result, 0) + 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items(), key=str))
+        self.stdout.write(self.style.SUCCESS(f"Worker durdu. {summary or 'İş yok.'}"))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('RUNNING', 'Çalışıyor'), ('SUCCESS', 'Başarılı'), ('FAILED', 'Başarısız')], default='RUNNING', max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'ordering': ['-started_at', '-id'],
+                'indexes': [models.Index(fields=['name', '-started_at'], name='core_taskrun_name_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('topic', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('dedupe_key', models.CharField(blank=True, help_text='Aynı anahtarla ikinci mesaj yazılmaz', max_length=200, null=True, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Bekliyor'), ('DONE', 'İşlendi'), ('FAILED', 'Başarısız')], default='PENDING', max_length=20)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='core_outbox_due_idx')],
+            },
+        ),
+    ]
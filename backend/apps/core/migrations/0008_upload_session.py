@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_outbox_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Beklenen toplam bayt')),
+                ('received', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('status', models.CharField(choices=[('OPEN', 'Devam Ediyor'), ('COMPLETE', 'Tamamlandı')], default='OPEN', max_length=20)),
+                ('path', models.CharField(blank=True, default='', max_length=300)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Yükleme Oturumu',
+                'verbose_name_plural': 'Yükleme Oturumları',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['sha256', 'status'], name='core_upload_sha_idx')],
+            },
+        ),
+    ]
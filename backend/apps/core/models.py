@@ -1,3 +1,6 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
@@ -20,6 +23,98 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class TrackedFieldsMixin:
+    """
+    Remembers the values of ``tracked_fields`` as they were loaded from the DB.
+
+    The snapshot is taken in ``from_db``, so asking what changed costs no
+    query: ``previous(field)`` returns the loaded value and
+    ``has_changed(*fields)`` compares it with the current one. Both can be
+    used in pre/post_save handlers; the snapshot is moved forward only after
+    ``save()`` returns, and only for the fields actually written when
+    ``update_fields`` is given.
+
+    Instances that were not loaded through a queryset (built with an explicit
+    pk, or loaded with the tracked fields deferred) fall back to one SELECT,
+    in ``save()`` or on the first ``previous()`` call. ``bulk_update`` and ``QuerySet.update`` bypass ``save()``;
+    call ``reset_tracking()`` afterwards if the instances stay in use.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracking()
+        return instance
+
+    @classmethod
+    def _tracked_attnames(cls):
+        return [cls._meta.get_field(name).attname for name in cls.tracked_fields]
+
+    @property
+    def _loaded_values(self):
+        return self.__dict__.setdefault("_tracked_loaded_values", {})
+
+    def _attname(self, field):
+        return self._meta.get_field(field).attname
+
+    def reset_tracking(self, fields=None):
+        attnames = self._tracked_attnames()
+        if fields is not None:
+            wanted = {self._attname(field) for field in fields}
+            attnames = [attname for attname in attnames if attname in wanted]
+        loaded = self.__dict__
+        for attname in attnames:
+            # __dict__ lookup: a deferred field is not fetched just to snapshot it
+            if attname in loaded:
+                self._loaded_values[attname] = loaded[attname]
+
+    def previous(self, field, default=None):
+        attname = self._attname(field)
+        if self.__dict__.get("_tracked_inserting"):
+            # Called from a signal while the row is being inserted: there is no prior value.
+            return default
+        if attname not in self._loaded_values and self.pk is not None and not self._state.adding:
+            self._load_missing_tracked(None)
+        return self._loaded_values.get(attname, default)
+
+    def has_changed(self, *fields):
+        if self._state.adding or self.__dict__.get("_tracked_inserting"):
+            return True
+        for field in fields or self.tracked_fields:
+            attname = self._attname(field)
+            if attname in self._loaded_values and self._loaded_values[attname] != getattr(self, attname):
+                return True
+        return False
+
+    def _load_missing_tracked(self, update_fields):
+        attnames = self._tracked_attnames()
+        if update_fields is not None:
+            wanted = {self._attname(field) for field in update_fields}
+            attnames = [attname for attname in attnames if attname in wanted]
+        missing = [attname for attname in attnames if attname not in self._loaded_values]
+        if missing:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            if row:
+                self._loaded_values.update(row)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if self.pk is not None and not self._state.adding:
+            self._load_missing_tracked(update_fields)
+        self.__dict__["_tracked_inserting"] = self._state.adding
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self.__dict__["_tracked_inserting"] = False
+        self.reset_tracking(update_fields)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.reset_tracking(fields)
+
+
 class Notification(TimeStampedModel):
     LEVEL_CHOICES = (
         ("INFO", "Bilgi"),
@@ -115,3 +210,150 @@ class SystemEvent(TimeStampedModel):
 
     def __str__(self):
         return self.event_type
+
+
+class Job(TimeStampedModel):
+    STATUS_CHOICES = (
+        ("QUEUED", "Sırada"),
+        ("RUNNING", "Çalışıyor"),
+        ("DONE", "Tamamlandı"),
+        ("FAILED", "Başarısız"),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Büyük değer önce çalışır")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True, default="")
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-priority", "run_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "run_at", "priority"], name="core_job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}#{self.pk} ({self.status})"
+
+
+class OutboxMessage(TimeStampedModel):
+    """Side effect recorded in a business transaction, delivered by ``apps.core.outbox``."""
+
+    STATUS_CHOICES = (
+        ("PENDING", "Bekliyor"),
+        ("DONE", "İşlendi"),
+        ("FAILED", "Başarısız"),
+    )
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(
+        max_length=200,
+        null=True,
+        blank=True,
+        unique=True,
+        help_text="Aynı anahtarla ikinci mesaj yazılmaz",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="core_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic}#{self.pk} ({self.status})"
+
+
+class ScheduledTaskRun(models.Model):
+    STATUS_CHOICES = (
+        ("RUNNING", "Çalışıyor"),
+        ("SUCCESS", "Başarılı"),
+        ("FAILED", "Başarısız"),
+    )
+
+    name = models.CharField(max_length=100)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="RUNNING")
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["-started_at", "-id"]
+        indexes = [
+            models.Index(fields=["name", "-started_at"], name="core_taskrun_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class Sequence(models.Model):
+    """Named counter for human-facing numbers (customer, proposal, contract/year).
+
+    Incremented only through ``apps.core.sequences``; ``last_value`` is the
+    highest number handed out so far.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Numara Serisi"
+        verbose_name_plural = "Numara Serileri"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+class UploadSession(TimeStampedModel):
+    """Chunked upload driven by ``apps.core.uploads``.
+
+    While ``OPEN`` the bytes received so far sit in a staging file; once
+    ``COMPLETE`` the file is in storage at ``path`` under its SHA-256, and
+    the row is how later uploads of the same content find it.
+    """
+
+    STATUS_CHOICES = (
+        ("OPEN", "Devam Ediyor"),
+        ("COMPLETE", "Tamamlandı"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="upload_sessions",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Beklenen toplam bayt")
+    received = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="OPEN")
+    path = models.CharField(max_length=300, blank=True, default="")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Yükleme Oturumu"
+        verbose_name_plural = "Yükleme Oturumları"
+        indexes = [
+            models.Index(fields=["sha256", "status"], name="core_upload_sha_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -0,0 +1,210 @@
+"""Transactional outbox for side effects of business transactions.
+
+Notifications, audit logs, dashboard events and follow-up tasks are not
+written by the request that causes them. The request records an
+``OutboxMessage`` with ``publish`` in its own transaction, so the message
+exists exactly when the business change does, and ``relay_outbox`` fans the
+messages out afterwards, outside the request's locks.
+
+Subscribers are registered per topic in each app's ``outbox.py``
+(autodiscovered on startup) and receive the payloads of a whole batch::
+
+    @subscriber("finance.installment_paid")
+    def installment_paid(payloads):
+        ...
+
+A batch is delivered in one transaction together with marking its messages
+DONE, so a message's writes are applied exactly once. If a batch fails it is
+retried message by message; failing messages are retried with backoff and
+end up FAILED after ``MAX_ATTEMPTS``.
+
+After the publishing transaction commits, a ``core.relay_outbox`` job is
+queued (unless one is already waiting), so a worker delivers the messages
+and the request does not wait for the fan-out. The periodic job of the same
+name picks up whatever is left. ``settings.OUTBOX_RELAY_ON_COMMIT`` relays
+inline in the committing thread instead, for setups without a worker.
+"""
+
+import logging
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.jobs import backoff_delay, enqueue, register
+from apps.core.models import Job, Notification, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+_SUBSCRIBERS = {}
+
+MAX_ATTEMPTS = 8
+RELAY_BATCH_SIZE = 100
+RETENTION_DAYS = 7
+RELAY_JOB = "core.relay_outbox"
+RELAY_JOB_PRIORITY = 10
+
+
+def subscriber(topic):
+    def decorator(func):
+        _SUBSCRIBERS[topic] = func
+        return func
+
+    return decorator
+
+
+def get_subscriber(topic):
+    return _SUBSCRIBERS.get(topic)
+
+
+def publish(topic, payload=None, *, dedupe_key=None):
+    """Record a side effect in the current transaction.
+
+    With ``dedupe_key`` a second message with the same key is silently dropped.
+    """
+    message = OutboxMessage(topic=topic, payload=payload or {}, dedupe_key=dedupe_key)
+    if dedupe_key:
+        OutboxMessage.objects.bulk_create([message], ignore_conflicts=True)
+        # Conflicting inserts (and some backends) leave the pk unset.
+        message.pk = message.pk or (
+            OutboxMessage.objects.filter(dedupe_key=dedupe_key, status="PENDING").values_list("pk", flat=True).first()
+        )
+    else:
+        message.save()
+    if message.pk:
+        if getattr(settings, "OUTBOX_RELAY_ON_COMMIT", False):
+            message_id = message.pk
+            transaction.on_commit(lambda: relay_outbox(ids=[message_id]), robust=True)
+        else:
+            transaction.on_commit(enqueue_relay, robust=True)
+    return message
+
+
+def enqueue_relay():
+    """Ask a worker to relay the outbox, unless a relay job is already waiting."""
+    if not Job.objects.filter(name=RELAY_JOB, status="QUEUED").exists():
+        enqueue(RELAY_JOB, priority=RELAY_JOB_PRIORITY)
+
+
+def publish_notification(*, title, message, roles=(), recipient_ids=(), level="INFO", related_url=""):
+    """Queue one notification per role and per recipient."""
+    return publish(
+        "core.notification",
+        {
+            "title": title,
+            "message": message,
+            "roles": list(roles),
+            "recipient_ids": list(recipient_ids),
+            "level": level,
+            "related_url": related_url,
+        },
+    )
+
+
+def _deliver(topic, messages, now):
+    handler = get_subscriber(topic)
+    try:
+        if handler is None:
+            raise LookupError(f"No outbox subscriber for topic '{topic}'")
+        with transaction.atomic():
+            handler([message.payload for message in messages])
+    except Exception:
+        if handler is not None and len(messages) > 1:
+            # Isolate the failing message(s); the others still go through.
+            for message in messages:
+                _deliver(topic, [message], now)
+            return
+        logger.exception("Outbox delivery failed for topic %s", topic)
+        error = traceback.format_exc()[-4000:]
+        for message in messages:
+            message.attempts += 1
+            message.last_error = error
+            if handler is not None and message.attempts < MAX_ATTEMPTS:
+                message.available_at = now + backoff_delay(message.attempts)
+            else:
+                message.status = "FAILED"
+                message.processed_at = now
+        return
+
+    for message in messages:
+        message.attempts += 1
+        message.status = "DONE"
+        message.processed_at = now
+        message.last_error = ""
+
+
+def _relay_batch(*, batch_size, ids, now):
+    with transaction.atomic():
+        qs = OutboxMessage.objects.select_for_update(skip_locked=True).filter(status="PENDING", available_at__lte=now)
+        if ids is not None:
+            qs = qs.filter(id__in=ids)
+        messages = list(qs.order_by("id")[:batch_size])
+        if not messages:
+            return []
+
+        by_topic = defaultdict(list)
+        for message in messages:
+            by_topic[message.topic].append(message)
+        for topic, group in by_topic.items():
+            _deliver(topic, group, now)
+
+        for message in messages:
+            message.updated_at = now
+        OutboxMessage.objects.bulk_update(
+            messages,
+            ["status", "available_at", "attempts", "last_error", "processed_at", "updated_at"],
+        )
+    return messages
+
+
+def relay_outbox(*, batch_size=RELAY_BATCH_SIZE, ids=None, now=None):
+    """Deliver due messages batch by batch; returns counts per resulting status."""
+    now = now or timezone.now()
+    counts = {}
+    while True:
+        messages = _relay_batch(batch_size=batch_size, ids=ids, now=now)
+        for message in messages:
+            counts[message.status] = counts.get(message.status, 0) + 1
+        if len(messages) < batch_size:
+            break
+    return counts
+
+
+def purge_outbox(*, days=RETENTION_DAYS):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxMessage.objects.filter(status="DONE", processed_at__lt=cutoff).delete()
+    return deleted
+
+
+@register(RELAY_JOB)
+def relay_outbox_job(batch_size=RELAY_BATCH_SIZE):
+    relay_outbox(batch_size=batch_size)
+
+
+@register("core.purge_outbox")
+def purge_outbox_job(days=RETENTION_DAYS):
+    purge_outbox(days=days)
+
+
+@subscriber("core.notification")
+def deliver_notifications(payloads):
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=recipient_id,
+                recipient_role=role,
+                title=payload["title"],
+                message=payload["message"],
+                level=payload.get("level") or "INFO",
+                related_url=payload.get("related_url") or "",
+            )
+            for payload in payloads
+            for recipient_id, role in [
+                *((None, role) for role in payload.get("roles") or ()),
+                *((recipient_id, "") for recipient_id in payload.get("recipient_ids") or ()),
+            ]
+        ]
+    )
@@ -0,0 +1,18 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """Page-number pagination that only kicks in when ``?page=`` is sent.
+
+    Existing clients keep receiving the plain list; new ones opt in with
+    ``?page=1&page_size=50`` and get ``count/next/previous/results``.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,114 @@
+"""Server-side PDF rendering with a content-addressed cache.
+
+Documents are rendered from templates extending ``pdf/base.html`` and stored
+through ``default_storage`` as ``pdf/<kind>/<id>/<hash>.pdf``. The hash
+covers the template and exactly the data passed to it, so a stored file is
+reused until the document changes; the next render then replaces it.
+
+Rendering takes hundreds of milliseconds per document, so views only look the
+file up (``pdf_response``) and enqueue a background job when it is missing.
+
+The HTML to PDF step is ``settings.PDF_RENDERER``: a callable, or dotted path
+to one, taking ``(html, base_url)`` and returning bytes. The default uses
+WeasyPrint, imported lazily because it needs system libraries (Pango) that
+not every environment has.
+"""
+
+import hashlib
+import json
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.jobs import enqueue_once
+
+# Bump after layout changes that the templates' data does not capture.
+PDF_LAYOUT_VERSION = "1"
+
+
+class PdfRendererUnavailable(RuntimeError):
+    pass
+
+
+def weasyprint_renderer(html, base_url=None):
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError) as exc:  # OSError: Pango/Cairo libraries missing
+        raise PdfRendererUnavailable("WeasyPrint kullanılamıyor; PDF üretilemedi.") from exc
+    return HTML(string=html, base_url=base_url).write_pdf()
+
+
+def get_renderer():
+    renderer = getattr(settings, "PDF_RENDERER", "apps.core.pdf.weasyprint_renderer")
+    return import_string(renderer) if isinstance(renderer, str) else renderer
+
+
+def content_hash(template_name, data):
+    raw = json.dumps([PDF_LAYOUT_VERSION, template_name, data], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def pdf_path(kind, object_id, digest):
+    return f"pdf/{kind}/{object_id}/{digest}.pdf"
+
+
+def cached_pdf(kind, object_id, template_name, data):
+    """Return ``(path, exists)`` for the document as it is now."""
+    path = pdf_path(kind, object_id, content_hash(template_name, data))
+    return path, default_storage.exists(path)
+
+
+def render_pdf(kind, object_id, template_name, data, *, force=False):
+    """Render and store the document unless it is cached; returns ``(path, rendered)``.
+
+    Older versions of the same document are deleted once the new one is saved.
+    """
+    path, exists = cached_pdf(kind, object_id, template_name, data)
+    if exists and not force:
+        return path, False
+
+    html = render_to_string(template_name, data)
+    content = get_renderer()(html, base_url=str(settings.BASE_DIR))
+    if exists:
+        default_storage.delete(path)
+    saved = default_storage.save(path, ContentFile(content))
+    if saved != path:
+        # A concurrent render stored this version first; keep that file.
+        default_storage.delete(saved)
+
+    directory, name = posixpath.split(path)
+    _, files = default_storage.listdir(directory)
+    for stale in files:
+        if stale != name:
+            default_storage.delete(posixpath.join(directory, stale))
+    return path, True
+
+
+def pdf_response(request, *, kind, object_id, template_name, data, job_name, job_payload, filename):
+    """Serve a cached PDF, or queue its rendering and answer 202.
+
+    ``?download=1`` streams the file itself instead of returning its URL.
+    """
+    path, exists = cached_pdf(kind, object_id, template_name, data)
+    digest = posixpath.splitext(posixpath.basename(path))[0]
+    if not exists:
+        enqueue_once(job_name, job_payload)
+        return Response({"status": "pending", "hash": digest}, status=status.HTTP_202_ACCEPTED)
+
+    if request.query_params.get("download") in {"1", "true"}:
+        return FileResponse(
+            default_storage.open(path, "rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type="application/pdf",
+        )
+    return Response(
+        {"status": "ready", "hash": digest, "url": request.build_absolute_uri(default_storage.url(path))}
+    )
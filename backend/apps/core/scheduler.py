@@ -0,0 +1,177 @@
+"""Periodic task scheduler used by ``run_scheduler``.
+
+Tasks are declared in ``settings.PERIODIC_TASKS``; each entry names a job
+registered in ``apps.core.jobs`` and either an ``interval`` (seconds) or a
+five-field ``cron`` expression evaluated in local time::
+
+    PERIODIC_TASKS = [
+        {"name": "release_expired_reservations", "job": "inventory.release_expired_reservations", "interval": 300},
+        {"name": "check_cheque_due", "job": "finance.check_cheque_due", "cron": "0 8 * * *"},
+    ]
+
+Every run is recorded in ``ScheduledTaskRun`` and the last run of a task is
+read back from that table, so several scheduler instances agree on what is
+due; an advisory lock per task guarantees only one of them runs it.
+"""
+
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.core.jobs import get_handler
+from apps.core.locks import advisory_lock
+from apps.core.models import ScheduledTaskRun
+
+
+class CronSchedule:
+    """Minimal cron matcher: ``*``, ``*/n``, ``a-b``, ``a-b/n`` and lists, 5 fields."""
+
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.RANGES)
+        )
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for chunk in field.split(","):
+            step = 1
+            if "/" in chunk:
+                chunk, step_text = chunk.split("/", 1)
+                step = int(step_text)
+            if chunk == "*":
+                start, end = low, high
+            elif "-" in chunk:
+                start, end = (int(v) for v in chunk.split("-", 1))
+            else:
+                start = end = int(chunk)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        # Cron semantics: when both day-of-month and day-of-week are restricted,
+        # either one matching is enough. Weekday 0 is Sunday.
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after):
+        """First matching minute strictly after ``after`` (aware, local time)."""
+        dt = timezone.localtime(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                month = dt.month % 12 + 1
+                year = dt.year + (1 if month == 1 else 0)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+class PeriodicTask:
+    def __init__(self, name, job, interval=None, cron=None, payload=None):
+        if (interval is None) == (cron is None):
+            raise ValueError(f"Periodic task '{name}' needs exactly one of interval/cron")
+        self.name = name
+        self.job = job
+        self.interval = timedelta(seconds=interval) if interval is not None else None
+        self.cron = CronSchedule(cron) if cron else None
+        self.payload = payload or {}
+
+    def next_run(self, last_run, started_at):
+        """When the task is next due; never-run interval tasks are due immediately."""
+        if self.interval is not None:
+            return last_run + self.interval if last_run else started_at
+        return self.cron.next_after(last_run or started_at)
+
+    def describe(self):
+        return f"every {int(self.interval.total_seconds())}s" if self.interval else f"cron '{self.cron.expression}'"
+
+
+def load_periodic_tasks(config=None):
+    config = config if config is not None else getattr(settings, "PERIODIC_TASKS", [])
+    return [PeriodicTask(**entry) for entry in config]
+
+
+def last_runs(names):
+    rows = (
+        ScheduledTaskRun.objects.filter(name__in=names)
+        .values("name")
+        .annotate(last=Max("started_at"))
+    )
+    return {row["name"]: row["last"] for row in rows}
+
+
+def run_task(task, *, started_at=None, now=None):
+    """Run one task under its advisory lock and record the run.
+
+    With ``started_at`` the task only runs if it is still due once the lock is
+    held (another scheduler may have run it a moment ago). Returns the
+    ScheduledTaskRun, or None if the task was locked or no longer due.
+    """
+    with advisory_lock(f"scheduler:{task.name}") as acquired:
+        if not acquired:
+            return None
+        if started_at is not None:
+            latest = last_runs([task.name]).get(task.name)
+            if task.next_run(latest, started_at) > (now or timezone.now()):
+                return None
+
+        run = ScheduledTaskRun.objects.create(name=task.name)
+        started = time.monotonic()
+        status, error = "SUCCESS", ""
+        try:
+            handler = get_handler(task.job)
+            if handler is None:
+                raise LookupError(f"No handler registered for job '{task.job}'")
+            handler(**task.payload)
+        except Exception:
+            status, error = "FAILED", traceback.format_exc()[-4000:]
+        run.status = status
+        run.error = error
+        run.finished_at = timezone.now()
+        run.duration_ms = int((time.monotonic() - started) * 1000)
+        run.save(update_fields=["status", "error", "finished_at", "duration_ms"])
+        return run
+
+
+def run_due_tasks(tasks, *, started_at, now=None):
+    """Run every task whose next run time has passed; returns the runs performed."""
+    now = now or timezone.now()
+    previous = last_runs([task.name for task in tasks])
+    runs = []
+    for task in tasks:
+        if task.next_run(previous.get(task.name), started_at) > now:
+            continue
+        run = run_task(task, started_at=started_at, now=now)
+        if run is not None:
+            runs.append(run)
+    return runs
@@ -0,0 +1,261 @@
+"""Content-addressed and resumable file uploads.
+
+Every uploaded file is stored once, under its SHA-256::
+
+    uploads/sha256/<first two hex chars>/<sha256><ext>
+
+and recorded as a ``COMPLETE`` ``UploadSession``. Uploading the same bytes
+again returns the stored path without writing anything. Because several
+records may then point at one file, content-addressed files are never
+deleted when a record drops its reference (see ``discard_upload``).
+
+Large files from weak site connections are sent in chunks:
+
+1. ``open_session`` declares name, size and optionally the SHA-256. When the
+   hash is already known the upload is finished before any byte is sent.
+2. ``write_chunk`` appends bytes at ``offset``; the offset must equal what the
+   server already has, so a client that lost a response asks for the
+   session's ``received`` and continues from there.
+3. ``complete_session`` hashes the staged file and moves it into storage.
+
+Each chunk is streamed into a temporary file and then appended to a local
+staging file (``settings.UPLOAD_STAGING_DIR``), so the full file is never
+held in memory and the session row is only locked for the local copy.
+"""
+
+import hashlib
+import os
+import posixpath
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from apps.core.images import delete_derivatives
+from apps.core.jobs import register
+from apps.core.models import UploadSession
+
+CONTENT_PREFIX = "uploads/sha256/"
+READ_SIZE = 64 * 1024
+
+STALE_SESSION_AGE = timedelta(days=1)
+
+
+class UploadOffsetMismatch(ValueError):
+    """The chunk does not start where the staged data ends."""
+
+    def __init__(self, expected):
+        super().__init__(f"Beklenen konum {expected}.")
+        self.expected = expected
+
+
+class UploadChecksumMismatch(ValueError):
+    """The assembled file does not match the declared SHA-256; the session restarts at 0."""
+
+
+def max_upload_size():
+    return settings.UPLOAD_MAX_SIZE
+
+
+def max_chunk_size():
+    return settings.UPLOAD_MAX_CHUNK_SIZE
+
+
+def staging_path(session):
+    return os.path.join(settings.UPLOAD_STAGING_DIR, f"{session.pk.hex}.part")
+
+
+def clean_filename(name):
+    return get_valid_filename(os.path.basename(name or "") or "upload")
+
+
+def content_path(digest, filename):
+    _, ext = os.path.splitext(filename)
+    return posixpath.join(CONTENT_PREFIX, digest[:2], f"{digest}{ext.lower()}")
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(CONTENT_PREFIX)
+
+
+def hash_file(fh):
+    digest = hashlib.sha256()
+    fh.seek(0)
+    for block in iter(lambda: fh.read(READ_SIZE), b""):
+        digest.update(block)
+    fh.seek(0)
+    return digest.hexdigest()
+
+
+def find_existing(digest):
+    """Storage path of a completed upload with this content, if its file is still there."""
+    if not digest:
+        return None
+    paths = (
+        UploadSession.objects.filter(sha256=digest, status="COMPLETE")
+        .order_by("created_at")
+        .values_list("path", flat=True)
+    )
+    for path in paths:
+        if default_storage.exists(path):
+            return path
+    return None
+
+
+def store_file(fh, filename, *, user=None, digest=None):
+    """Store ``fh`` under its SHA-256; returns ``(path, sha256, deduplicated)``."""
+    filename = clean_filename(filename)
+    digest = digest or hash_file(fh)
+    existing = find_existing(digest)
+    if existing:
+        return existing, digest, True
+
+    path = content_path(digest, filename)
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, File(fh, name=filename))
+        if saved != path:
+            # Written concurrently by another upload of the same bytes.
+            default_storage.delete(saved)
+    size = fh.size if hasattr(fh, "size") else default_storage.size(path)
+    UploadSession.objects.create(
+        user=user,
+        filename=filename,
+        size=size,
+        received=size,
+        sha256=digest,
+        status="COMPLETE",
+        path=path,
+    )
+    return path, digest, False
+
+
+def discard_upload(file_field):
+    """Delete the file a record no longer uses, together with its derivatives.
+
+    Content-addressed files may be shared with other records and are kept.
+    """
+    if not file_field or is_content_addressed(file_field.name):
+        return
+    delete_derivatives(file_field.name)
+    file_field.delete(save=False)
+
+
+def open_session(*, user, filename, size, sha256=""):
+    """Start a chunked upload; returns ``(session, existing_path)``.
+
+    ``existing_path`` is set when a file with ``sha256`` is already stored;
+    no session is created then.
+    """
+    if size < 0 or size > max_upload_size():
+        raise ValueError(f"Dosya boyutu en fazla {max_upload_size()} bayt olabilir.")
+    sha256 = (sha256 or "").lower()
+    existing = find_existing(sha256)
+    if existing:
+        return None, existing
+    session = UploadSession.objects.create(user=user, filename=clean_filename(filename), size=size, sha256=sha256)
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    open(staging_path(session), "wb").close()
+    return session, None
+
+
+def write_chunk(session, offset, stream):
+    """Append the bytes of ``stream`` at ``offset``; returns the new ``received``.
+
+    The chunk is first read into a temporary file with no transaction open,
+    so a slow client does not hold a connection and the session lock; only
+    the offset check and the local copy run under the lock.
+    """
+    # Cheap early answer from the caller's copy; re-checked under the lock below.
+    _check_chunk_offset(session, offset)
+
+    limit = min(max_chunk_size(), session.size - offset)
+    with tempfile.TemporaryFile(dir=settings.UPLOAD_STAGING_DIR) as chunk:
+        written = 0
+        for block in iter(lambda: stream.read(READ_SIZE), b""):
+            written += len(block)
+            if written > limit:
+                raise ValueError(f"Parça en fazla {limit} bayt olabilir.")
+            chunk.write(block)
+        chunk.seek(0)
+
+        with transaction.atomic():
+            # Serialise concurrent requests for one session (retries may overlap).
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            _check_chunk_offset(session, offset)
+            with open(staging_path(session), "r+b") as fh:
+                fh.seek(offset)
+                shutil.copyfileobj(chunk, fh, READ_SIZE)
+                fh.truncate()
+            session.received = offset + written
+            session.save(update_fields=["received", "updated_at"])
+    return session.received
+
+
+def _check_chunk_offset(session, offset):
+    if session.status != "OPEN":
+        raise ValueError("Yükleme oturumu tamamlanmış.")
+    if offset != session.received:
+        raise UploadOffsetMismatch(session.received)
+
+
+def complete_session(session):
+    """Move the staged file into storage; returns ``(path, deduplicated)``.
+
+    A file that does not match the declared SHA-256 is discarded and the
+    session rewound to offset 0, so the client can send it again.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == "COMPLETE":
+            return session.path, False
+        if session.received != session.size:
+            raise ValueError(f"Eksik yükleme: {session.received}/{session.size} bayt alındı.")
+
+        staged = staging_path(session)
+        with open(staged, "r+b") as fh:
+            digest = hash_file(fh)
+            mismatch = bool(session.sha256) and session.sha256 != digest
+            if mismatch:
+                fh.truncate(0)
+            else:
+                path = find_existing(digest)
+                deduplicated = path is not None
+                if not deduplicated:
+                    path = content_path(digest, session.filename)
+                    if not default_storage.exists(path):
+                        saved = default_storage.save(path, File(fh, name=session.filename))
+                        if saved != path:
+                            default_storage.delete(saved)
+
+        if mismatch:
+            session.received = 0
+            session.save(update_fields=["received", "updated_at"])
+        else:
+            session.sha256 = digest
+            session.status = "COMPLETE"
+            session.path = path
+            session.save(update_fields=["sha256", "status", "path", "updated_at"])
+    if mismatch:
+        # Raised outside the transaction so the rewind is kept.
+        raise UploadChecksumMismatch("SHA-256 uyuşmuyor; dosyayı baştan yeniden yükleyin.")
+    os.remove(staged)
+    return path, deduplicated
+
+
+@register("core.purge_upload_sessions")
+def purge_stale_sessions(max_age_hours=None):
+    """Drop unfinished sessions (and their staged bytes) idle for longer than a day."""
+    age = timedelta(hours=max_age_hours) if max_age_hours is not None else STALE_SESSION_AGE
+    stale = UploadSession.objects.filter(status="OPEN", updated_at__lt=timezone.now() - age)
+    for session in stale:
+        try:
+            os.remove(staging_path(session))
+        except FileNotFoundError:
+            pass
+    return stale.delete()[0]
@@ -0,0 +1,48 @@
+import re
+import unicodedata
+
+# Turkish letters folded to their ASCII base so "Şahin", "sahin" and "ŞAHİN"
+# all normalize to the same key.
+_TURKISH_FOLD = str.maketrans({
+    "İ": "i",
+    "I": "i",
+    "ı": "i",
+    "Ş": "s",
+    "ş": "s",
+    "Ğ": "g",
+    "ğ": "g",
+    "Ü": "u",
+    "ü": "u",
+    "Ö": "o",
+    "ö": "o",
+    "Ç": "c",
+    "ç": "c",
+})
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_search_text(value):
+    """Lowercase, accent-free, single-spaced form of ``value`` for indexed search."""
+    if not value:
+        return ""
+    text = str(value).translate(_TURKISH_FOLD).lower()
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", text).strip()
+
+
+def normalize_phone(value):
+    """Digits-only national number: "+90 (555) 123 45 67" and "0555..." both give "5551234567"."""
+    digits = "".join(ch for ch in str(value or "") if ch.isdigit())
+    if digits.startswith("0090"):
+        digits = digits[4:]
+    elif digits.startswith("90") and len(digits) == 12:
+        digits = digits[2:]
+    elif digits.startswith("0") and len(digits) == 11:
+        digits = digits[1:]
+    return digits
+
+
+def normalize_tax_number(value):
+    """TC kimlik / vergi numarası without spaces, dots or dashes."""
+    return "".join(ch for ch in str(value or "") if ch.isalnum()).upper()
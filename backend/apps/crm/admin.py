@@ -1,12 +1,29 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Customer, Proposal, ProposalItem, Appointment, OfferApprovalFlow, OfferAuditLog
+from .services import merge_customers
 
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
-    list_display = ("name", "customer_type", "status", "status_color", "segment", "owner")
+    list_display = ("customer_number", "name", "customer_type", "status", "status_color", "segment", "owner")
     list_filter = ("customer_type", "status", "status_color", "segment")
-    search_fields = ("name", "phone", "tax_number")
+    search_fields = ("name", "phone", "tax_number", "phone_normalized", "tax_number_normalized")
+    actions = ["merge_selected"]
+
+    @admin.action(description="Seçili müşterileri birleştir (en eski kayıt kalır)")
+    def merge_selected(self, request, queryset):
+        customers = list(queryset.order_by("customer_number", "pk"))
+        if len(customers) < 2:
+            self.message_user(request, "Birleştirmek için en az iki müşteri seçin.", messages.WARNING)
+            return
+        survivor, duplicates = customers[0], customers[1:]
+        moved = merge_customers(survivor, duplicates, user=request.user)
+        summary = ", ".join(f"{table}: {count}" for table, count in moved.items())
+        self.message_user(
+            request,
+            f"{len(duplicates)} müşteri #{survivor.customer_number} {survivor.name} altında birleştirildi ({summary}).",
+            messages.SUCCESS,
+        )
 
 
 admin.site.register(Proposal)
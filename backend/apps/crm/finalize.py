@@ -0,0 +1,587 @@
+"""Staged pipeline behind ``POST /api/proposals/{id}/finalize/``.
+
+Core writes run in the caller's transaction, in four stages:
+
+1. load – the locked proposal and its items in one query, plus the rows each
+   later stage may update (one query per table);
+2. documents – contract, payment plan, work orders and appointment are
+   diffed in memory and written with bulk inserts/updates;
+3. reservations – slabs are locked here, as late as possible, so the locks
+   are only held for the short tail of the transaction;
+4. bookkeeping – the approval flow is saved and everything else (follow-up
+   task, audit logs, notifications, dashboard events) is published as one
+   ``crm.proposal_finalized`` outbox message, applied after commit by
+   ``apply_finalize_side_effects``.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.core.models import Notification, SystemEvent, Task
+from apps.core.outbox import publish
+from apps.crm.models import Appointment, OfferApprovalFlow, OfferAuditLog, ProposalItem
+from apps.finance.models import PaymentPlan
+from apps.inventory.models import Slab, StockReservation
+from apps.production.models import Contract, WorkOrder
+from apps.production.services import next_contract_no, sync_contract_items
+
+SOFT_RESERVATION_DAYS = 7
+CONTRACT_NOTIFICATION_TITLE = "Sözleşme oluşturuldu, imza bekliyor"
+
+
+def proposal_items_queryset():
+    return ProposalItem.objects.select_related("product", "slab").order_by("id")
+
+
+def _area_m2(item):
+    return (item.width * item.length * Decimal(item.quantity)) / Decimal("10000")
+
+
+def _snapshot_items(items):
+    return [
+        {
+            "id": item.id,
+            "product_id": item.product_id,
+            "product_name": getattr(item.product, "name", ""),
+            "slab_id": item.slab_id,
+            "slab_barcode": getattr(item.slab, "barcode", ""),
+            "description": item.description,
+            "stone_type": item.stone_type,
+            "size_text": item.size_text,
+            "total_measure": str(item.total_measure) if item.total_measure is not None else None,
+            "total_unit": item.total_unit,
+            "width": str(item.width),
+            "length": str(item.length),
+            "quantity": item.quantity,
+            "unit_price": str(item.unit_price),
+            "fire_rate": str(item.fire_rate),
+            "labor_cost": str(item.labor_cost),
+            "total_price": str(item.total_price),
+            "area_m2": str(_area_m2(item)),
+        }
+        for item in items
+    ]
+
+
+def _apply(instance, updates):
+    if updates:
+        for key, value in updates.items():
+            setattr(instance, key, value)
+        instance.save(update_fields=list(updates.keys()))
+
+
+# --- Stage 2: documents -------------------------------------------------------
+
+
+def _ensure_contract(*, proposal, items):
+    customer = proposal.customer
+    customer_fields = {
+        "customer_name": customer.name,
+        "customer_address": customer.address or "",
+        "customer_phone": customer.phone or "",
+        "customer_email": customer.email or "",
+        "customer_tax_number": customer.tax_number or "",
+        "customer_tax_office": customer.tax_office or "",
+    }
+    amounts = {
+        "items_snapshot": _snapshot_items(items),
+        "subtotal_amount": proposal.subtotal_amount,
+        "tax_amount": proposal.tax_amount,
+        "total_amount": proposal.grand_total,
+        "currency": proposal.currency,
+        "include_tax": proposal.include_tax,
+        "tax_rate": proposal.tax_rate,
+        "valid_until": proposal.valid_until,
+        "notes": proposal.notes or "",
+    }
+    project_name = f"{customer.name} - {proposal.proposal_number}"
+
+    contract = Contract.objects.filter(proposal=proposal).select_for_update().first()
+    if not contract:
+        contract = Contract.objects.create(
+            proposal=proposal,
+            contract_no=next_contract_no(),
+            project_name=project_name,
+            job_address=customer.address or "",
+            start_date=timezone.localdate(),
+            deadline_date=proposal.valid_until,
+            status="IMZA_BEKLIYOR",
+            discount_amount=Decimal("0.00"),
+            is_active=True,
+            **customer_fields,
+            **amounts,
+        )
+        sync_contract_items(contract, created=True, check_references=False)
+        return contract, True
+
+    updates = {}
+    if not contract.contract_no:
+        updates["contract_no"] = next_contract_no()
+    if contract.status == "IMZA_BEKLIYOR":
+        updates.update(
+            project_name=contract.project_name or project_name,
+            job_address=contract.job_address or (customer.address or ""),
+            deadline_date=proposal.valid_until,
+            **customer_fields,
+            **amounts,
+        )
+    snapshot_changed = "items_snapshot" in updates and updates["items_snapshot"] != contract.items_snapshot
+    _apply(contract, updates)
+    if snapshot_changed:
+        sync_contract_items(contract, check_references=False)
+    return contract, False
+
+
+def _parse_schedule(payment_method, total_amount, first_due_date, raw_installments, installment_count):
+    method_map = {
+        "CASH": "CASH",
+        "INSTALLMENT": "TRANSFER",
+        "CHEQUE": "CHEQUE",
+        "MIXED": "CASH",
+    }
+
+    if raw_installments:
+        schedule = []
+        for idx, item in enumerate(raw_installments, start=1):
+            try:
+                due_date = date.fromisoformat(item.get("due_date"))
+            except Exception:
+                due_date = first_due_date
+            try:
+                installment_no = int(item.get("installment_no") or idx)
+            except (TypeError, ValueError):
+                installment_no = idx
+            schedule.append(
+                {
+                    "installment_no": installment_no,
+                    "due_date": due_date,
+                    "amount": Decimal(item.get("amount") or 0),
+                    "method": (item.get("method") or method_map.get(payment_method, "CASH")).upper(),
+                }
+            )
+        return schedule
+
+    if payment_method == "INSTALLMENT":
+        count = int(installment_count or 4)
+        base = (Decimal(total_amount) / Decimal(count)).quantize(Decimal("0.01"))
+        amounts = [base for _ in range(count)]
+        diff = Decimal(total_amount) - sum(amounts)
+        amounts[-1] = (amounts[-1] + diff).quantize(Decimal("0.01"))
+        return [
+            {
+                "installment_no": i + 1,
+                "due_date": PaymentPlan.add_months(first_due_date, i),
+                "amount": amounts[i],
+                "method": method_map.get(payment_method, "TRANSFER"),
+            }
+            for i in range(count)
+        ]
+
+    return [
+        {
+            "installment_no": 1,
+            "due_date": first_due_date,
+            "amount": Decimal(total_amount),
+            "method": method_map.get(payment_method, "CASH"),
+        }
+    ]
+
+
+def _ensure_payment_plan(*, contract, proposal, payload):
+    payment_method = (payload.get("payment_method") or "CASH").upper()
+    raw_installments = payload.get("installments") or []
+    if isinstance(raw_installments, str):
+        try:
+            raw_installments = json.loads(raw_installments)
+        except Exception:
+            raw_installments = []
+    if not isinstance(raw_installments, list):
+        raw_installments = []
+    installment_count = int(payload.get("installment_count") or 4)
+    first_due_date = proposal.valid_until or timezone.localdate()
+    first_due_raw = payload.get("first_due_date")
+    if first_due_raw:
+        try:
+            first_due_date = date.fromisoformat(first_due_raw)
+        except ValueError:
+            pass
+
+    total_amount = Decimal(contract.total_amount or proposal.grand_total or 0)
+    if raw_installments:
+        payment_method = "MIXED"
+        installment_count = len(raw_installments) or 1
+    elif payment_method != "INSTALLMENT":
+        installment_count = 1
+
+    plan_defaults = {
+        "method": payment_method,
+        "currency": proposal.currency,
+        "total_amount": total_amount,
+        "installment_count": installment_count,
+        "first_due_date": first_due_date,
+        "is_active": True,
+    }
+    plan = PaymentPlan.objects.filter(contract=contract).first()
+    if plan is None:
+        plan = PaymentPlan.objects.create(contract=contract, **plan_defaults)
+    else:
+        _apply(plan, {key: value for key, value in plan_defaults.items() if getattr(plan, key) != value})
+
+    schedule = _parse_schedule(payment_method, total_amount, first_due_date, raw_installments, installment_count)
+    plan.build_installments(schedule=schedule)
+    return plan
+
+
+def _ensure_work_orders(*, contract, proposal, items):
+    existing = {wo.title: wo for wo in WorkOrder.objects.filter(contract=contract)}
+
+    if not items:
+        if existing:
+            return list(existing.values())
+        return [
+            WorkOrder.objects.create(
+                contract=contract,
+                title=f"{contract.project_name or 'Üretim'} (Sözleşme {contract.id})",
+                description=f"Sözleşme {contract.contract_no or contract.id} için üretim emri.",
+                kind="PRODUCTION",
+                target_date=contract.deadline_date,
+            )
+        ]
+
+    work_orders, to_create, to_update, update_fields = [], [], [], set()
+    for item in items:
+        base = item.description or getattr(item.product, "name", "") or f"Kalem {item.id}"
+        title = f"{base} • #{item.id}"
+        description = f"Teklif {proposal.proposal_number} kalemi #{item.id} için üretim emri."
+        work_order = existing.get(title)
+        if work_order is None:
+            work_order = WorkOrder(
+                contract=contract,
+                title=title,
+                description=description,
+                priority=1,
+                stage="PLANLANACAK",
+                kind="PRODUCTION",
+                slab_id=item.slab_id,
+                target_date=contract.deadline_date,
+            )
+            to_create.append(work_order)
+        else:
+            updates = {}
+            if item.slab_id and work_order.slab_id != item.slab_id:
+                updates["slab_id"] = item.slab_id
+            if not work_order.description:
+                updates["description"] = description
+            if work_order.target_date is None and contract.deadline_date:
+                updates["target_date"] = contract.deadline_date
+            if updates:
+                for key, value in updates.items():
+                    setattr(work_order, key, value)
+                update_fields.update(updates)
+                to_update.append(work_order)
+        work_orders.append(work_order)
+
+    if to_create:
+        WorkOrder.objects.bulk_create(to_create)
+    if to_update:
+        now = timezone.now()
+        for work_order in to_update:
+            work_order.updated_at = now
+        WorkOrder.objects.bulk_update(to_update, [*sorted(update_fields), "updated_at"])
+    return work_orders
+
+
+def _ensure_appointment(*, proposal, approved_at):
+    due_date = (approved_at + timedelta(days=2)).date()
+    title = "Sözleşme imzası"
+    notes = f"Teklif {proposal.proposal_number} onaylandı. İmza randevusu planla."
+
+    appointment, created = Appointment.objects.get_or_create(
+        customer=proposal.customer,
+        source_type="PROPOSAL",
+        source_id=proposal.id,
+        defaults={"date": due_date, "title": title, "notes": notes},
+    )
+    if not created:
+        updates = {}
+        if appointment.date != due_date:
+            updates["date"] = due_date
+        if not appointment.title:
+            updates["title"] = title
+        if not appointment.notes:
+            updates["notes"] = notes
+        _apply(appointment, updates)
+    return appointment
+
+
+# --- Stage 3: reservations ----------------------------------------------------
+
+
+def _ensure_reservations(*, contract, items):
+    """Soft-reserve every item's slab; slab rows are locked by this stage only."""
+    now = timezone.now()
+    expires_at = now + timedelta(days=SOFT_RESERVATION_DAYS)
+    items = [item for item in items if item.product_id]
+    slab_ids = {item.slab_id for item in items if item.slab_id}
+    slabs = {slab.pk: slab for slab in Slab.objects.select_for_update().filter(pk__in=slab_ids)} if slab_ids else {}
+    existing = {r.proposal_item_id: r for r in StockReservation.objects.filter(contract=contract)}
+
+    for slab in slabs.values():
+        if slab.reserved_for_id and slab.reserved_for_id != contract.id:
+            raise serializers.ValidationError({"slab": f"Plaka {slab.barcode} başka bir sözleşmeye rezerve edilmiş."})
+        if slab.status in {"USED", "SOLD"}:
+            raise serializers.ValidationError({"slab": f"Plaka {slab.barcode} kullanılmış/satılmış durumda."})
+        if slab.status == "RESERVED" and slab.reserved_for_id != contract.id:
+            raise serializers.ValidationError({"slab": f"Plaka {slab.barcode} başka bir sözleşmede kilitli."})
+        if slab.soft_reserved_for_id and slab.soft_reserved_for_id != contract.id:
+            if slab.soft_reserved_until and slab.soft_reserved_until >= now:
+                raise serializers.ValidationError(
+                    {"slab": f"Plaka {slab.barcode} başka bir teklif için soft rezerve."}
+                )
+
+    reservations, to_create, to_update, update_fields = [], [], [], set()
+    for item in items:
+        slab = slabs.get(item.slab_id)
+        area_m2 = _area_m2(item)
+        thickness = slab.thickness if slab else None
+        reservation = existing.get(item.id)
+        if reservation is None:
+            reservation = StockReservation(
+                contract=contract,
+                proposal_item=item,
+                product_id=item.product_id,
+                slab=slab,
+                area_m2=area_m2,
+                thickness_mm=thickness,
+                status="SOFT_RESERVED",
+                expires_at=expires_at,
+            )
+            to_create.append(reservation)
+        else:
+            updates = {}
+            if reservation.product_id != item.product_id:
+                updates["product_id"] = item.product_id
+            if reservation.slab_id != (slab.pk if slab else None):
+                updates["slab_id"] = slab.pk if slab else None
+            if reservation.area_m2 != area_m2:
+                updates["area_m2"] = area_m2
+            if thickness and reservation.thickness_mm != thickness:
+                updates["thickness_mm"] = thickness
+            if reservation.status == "SOFT_RESERVED" and reservation.expires_at != expires_at:
+                updates["expires_at"] = expires_at
+            if updates:
+                for key, value in updates.items():
+                    setattr(reservation, key, value)
+                reservation.updated_at = now
+                update_fields.update(updates)
+                to_update.append(reservation)
+        reservations.append(reservation)
+
+    changed_slabs = []
+    for slab in slabs.values():
+        if slab.soft_reserved_for_id != contract.id or slab.soft_reserved_until != expires_at:
+            slab.soft_reserved_for = contract
+            slab.soft_reserved_until = expires_at
+            slab.updated_at = now
+            changed_slabs.append(slab)
+
+    if to_create:
+        StockReservation.objects.bulk_create(to_create)
+    if to_update:
+        StockReservation.objects.bulk_update(to_update, [*sorted(update_fields), "updated_at"])
+    if changed_slabs:
+        Slab.objects.bulk_update(changed_slabs, ["soft_reserved_for", "soft_reserved_until", "updated_at"])
+    return reservations
+
+
+# --- Stage 4: bookkeeping (delivered from the outbox) -------------------------
+
+
+def _ensure_task(*, proposal_id, assignee, approved_at, message):
+    due_date = (approved_at + timedelta(days=2)).date()
+    task, created = Task.objects.get_or_create(
+        source_type="PROPOSAL",
+        source_id=proposal_id,
+        title="Sözleşme imzasını al",
+        defaults={
+            "description": message,
+            "due_date": due_date,
+            "priority": 3,
+            "assigned_to": assignee,
+            "assigned_role": "SALES",
+            "related_url": "/contracts",
+        },
+    )
+    if not created and task.status == "OPEN":
+        updates = {}
+        if task.due_date != due_date:
+            updates["due_date"] = due_date
+        if task.assigned_to_id != getattr(assignee, "id", None):
+            updates["assigned_to"] = assignee
+        if task.assigned_role != "SALES":
+            updates["assigned_role"] = "SALES"
+        if task.priority != 3:
+            updates["priority"] = 3
+        if task.description != message:
+            updates["description"] = message
+        _apply(task, updates)
+    return task
+
+
+def _write_audit_logs(*, proposal_id, actor, entries):
+    """Insert or overwrite one OfferAuditLog per action with a single upsert."""
+    OfferAuditLog.objects.bulk_create(
+        [
+            OfferAuditLog(proposal_id=proposal_id, actor=actor, action=action, message=message, metadata=metadata)
+            for action, message, metadata in entries
+        ],
+        update_conflicts=True,
+        unique_fields=["proposal", "action"],
+        update_fields=["actor", "message", "metadata", "updated_at"],
+    )
+
+
+def _notify_contract_created(*, actor, message):
+    """One notification per target (actor, ADMIN, SALES) unless sent in the last 24 hours."""
+    targets = [(None, role) for role in ("ADMIN", "SALES")]
+    if actor:
+        targets.insert(0, (actor.id, ""))
+
+    recipient_filter = Q(recipient_role__in=[role for _, role in targets if role])
+    if targets[0][0]:
+        recipient_filter |= Q(recipient_id=targets[0][0])
+    recent = set(
+        Notification.objects.filter(
+            recipient_filter,
+            title=CONTRACT_NOTIFICATION_TITLE,
+            message=message,
+            created_at__gte=timezone.now() - timedelta(hours=24),
+        ).values_list("recipient_id", "recipient_role")
+    )
+    missing = [
+        Notification(
+            recipient_id=recipient_id,
+            recipient_role=role,
+            title=CONTRACT_NOTIFICATION_TITLE,
+            message=message,
+            level="INFO",
+            related_url="/contracts",
+        )
+        for recipient_id, role in targets
+        if not any((recipient_id and r_id == recipient_id) or (role and r_role == role) for r_id, r_role in recent)
+    ]
+    if missing:
+        Notification.objects.bulk_create(missing)
+
+
+def _emit_dashboard_deltas(*, proposal_id, deltas):
+    seen = set(
+        SystemEvent.objects.filter(event_type="DASHBOARD_DELTA", payload__offer_id=proposal_id).values_list(
+            "payload__metric", flat=True
+        )
+    )
+    events = [
+        SystemEvent(
+            event_type="DASHBOARD_DELTA",
+            payload={"offer_id": proposal_id, "metric": metric, "delta": delta},
+        )
+        for metric, delta in deltas
+        if metric not in seen
+    ]
+    if events:
+        SystemEvent.objects.bulk_create(events)
+
+
+def apply_finalize_side_effects(payload, *, actor=None):
+    """Follow-up task, audit logs, notifications and dashboard deltas of one finalize.
+
+    ``payload`` is the ``crm.proposal_finalized`` outbox message built by
+    ``finalize_proposal``. Safe to repeat: every write is an upsert or
+    de-duplicated.
+    """
+    proposal_id = payload["proposal_id"]
+    approved_at = datetime.fromisoformat(payload["approved_at"])
+    message = payload["message"]
+    task = _ensure_task(proposal_id=proposal_id, assignee=actor, approved_at=approved_at, message=message)
+    _write_audit_logs(
+        proposal_id=proposal_id,
+        actor=actor,
+        entries=[
+            (
+                "CONTRACT_CREATED",
+                f"Sözleşme {'oluşturuldu' if payload['contract_created'] else 'güncellendi'}",
+                {"contract_id": payload["contract_id"], "contract_no": payload["contract_no"]},
+            ),
+            (
+                "PAYMENT_PLAN",
+                "Ödeme planı oluşturuldu/güncellendi",
+                {"payment_plan_id": payload["payment_plan_id"], "installment_count": payload["installment_count"]},
+            ),
+            ("RESERVATIONS", "Stok soft rezervasyonları oluşturuldu", {"reservation_ids": payload["reservation_ids"]}),
+            ("WORK_ORDERS", "Üretim iş emirleri oluşturuldu", {"work_order_ids": payload["work_order_ids"]}),
+            ("APPOINTMENT", "İmza randevusu oluşturuldu", {"appointment_ids": [payload["appointment_id"]]}),
+            ("TASK", "İmza görevi oluşturuldu", {"task_id": task.id}),
+            ("APPROVAL_FLOW", "Onay akışı kaydı güncellendi", {"flow_id": payload["flow_id"]}),
+        ],
+    )
+    _notify_contract_created(actor=actor, message=message)
+    _emit_dashboard_deltas(
+        proposal_id=proposal_id,
+        deltas=[("contracts_sign_pending", 1), ("pending_payment_plans", payload["installment_count"])],
+    )
+
+
+def finalize_proposal(proposal, *, actor, payload):
+    """Turn an approved proposal into contract, plan, reservations and work orders.
+
+    Must run inside ``transaction.atomic`` with ``proposal`` already locked.
+    Idempotent: re-running updates the existing rows instead of duplicating them.
+    Bookkeeping is published to the outbox and applied after commit.
+    """
+    approved_at = timezone.now()
+    # Reuses the viewset's prefetch when present; the serializer reads the same cache.
+    prefetch_related_objects([proposal], Prefetch("items", queryset=proposal_items_queryset()))
+    items = list(proposal.items.all())
+
+    contract, contract_created = _ensure_contract(proposal=proposal, items=items)
+    plan = _ensure_payment_plan(contract=contract, proposal=proposal, payload=payload)
+    work_orders = _ensure_work_orders(contract=contract, proposal=proposal, items=items)
+    appointment = _ensure_appointment(proposal=proposal, approved_at=approved_at)
+
+    reservations = _ensure_reservations(contract=contract, items=items)
+    reservation_ids = [r.id for r in reservations]
+
+    flow, _ = OfferApprovalFlow.objects.update_or_create(
+        proposal=proposal,
+        defaults={
+            "approved_by": actor,
+            "approved_at": approved_at,
+            "contract_id": contract.id,
+            "payment_plan_id": plan.id,
+            "reservation_ids": reservation_ids,
+        },
+    )
+    publish(
+        "crm.proposal_finalized",
+        {
+            "proposal_id": proposal.id,
+            "actor_id": getattr(actor, "id", None),
+            "approved_at": approved_at.isoformat(),
+            "message": f"{proposal.customer.name} • {contract.contract_no or proposal.proposal_number}",
+            "contract_id": contract.id,
+            "contract_no": contract.contract_no,
+            "contract_created": contract_created,
+            "payment_plan_id": plan.id,
+            "installment_count": plan.installment_count,
+            "reservation_ids": reservation_ids,
+            "work_order_ids": [wo.id for wo in work_orders],
+            "appointment_id": appointment.id,
+            "flow_id": flow.id,
+        },
+    )
+    return contract
@@ -0,0 +1,12 @@
+from apps.core.jobs import register
+from apps.crm.services import reconcile_customer_receivables, render_proposal_pdf
+
+
+@register("crm.reconcile_customer_receivables")
+def reconcile_receivables(customer_ids=None):
+    reconcile_customer_receivables(customer_ids=customer_ids)
+
+
+@register("crm.render_proposal_pdf")
+def render_proposal_pdf_job(proposal_id, force=False):
+    render_proposal_pdf(proposal_id, force=force)
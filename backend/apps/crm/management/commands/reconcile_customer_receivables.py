@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.crm.services import reconcile_customer_receivables
+
+
+class Command(BaseCommand):
+    help = "Müşteri tahsilat/risk kolonlarını finans kayıtlarından yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", type=int, action="append", dest="customers", help="Sadece bu müşteri (tekrarlanabilir).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        corrected = reconcile_customer_receivables(
+            customer_ids=options["customers"],
+            batch_size=max(1, options["batch_size"]),
+        )
+        self.stdout.write(self.style.SUCCESS(f"{corrected} müşteri kaydı düzeltildi."))
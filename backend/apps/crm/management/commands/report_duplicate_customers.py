@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.crm.services import DUPLICATE_KEYS, duplicate_customer_clusters
+
+KEY_LABELS = {
+    "phone_normalized": "Telefon",
+    "tax_number_normalized": "Vergi/TC No",
+}
+
+
+class Command(BaseCommand):
+    help = "Aynı telefon veya Vergi/TC No ile kayıtlı mükerrer müşteri gruplarını listeler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--key", choices=DUPLICATE_KEYS, action="append", dest="keys")
+        parser.add_argument("--json", action="store_true", help="Print clusters as JSON.")
+
+    def handle(self, *args, **options):
+        clusters = duplicate_customer_clusters(keys=options["keys"] or DUPLICATE_KEYS)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(clusters, ensure_ascii=False, indent=2))
+            return
+
+        for cluster in clusters:
+            self.stdout.write(f"{KEY_LABELS[cluster['key']]} {cluster['value']}:")
+            for customer in cluster["customers"]:
+                self.stdout.write(f"  #{customer['customer_number']} {customer['name']} (id={customer['id']})")
+        self.stdout.write(self.style.SUCCESS(f"{len(clusters)} mükerrer grup bulundu."))
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:28
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Max, Q, Sum
+
+
+def backfill_receivables(apps, schema_editor):
+    Customer = apps.get_model("crm", "Customer")
+    Transaction = apps.get_model("finance", "Transaction")
+    PaymentInstallment = apps.get_model("finance", "PaymentInstallment")
+    Cheque = apps.get_model("finance", "Cheque")
+    zero = Decimal("0.00")
+
+    ledger = {
+        row["related_customer_id"]: row
+        for row in Transaction.objects.filter(related_customer__isnull=False)
+        .values("related_customer_id")
+        .annotate(
+            incoming=Sum("amount", filter=Q(transaction_type="INCOME")),
+            outgoing=Sum("amount", filter=Q(transaction_type="EXPENSE")),
+            last=Max("date"),
+        )
+    }
+    installments = dict(
+        PaymentInstallment.objects.filter(status="PENDING", plan__contract__proposal__isnull=False)
+        .values("plan__contract__proposal__customer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("plan__contract__proposal__customer_id", "total")
+    )
+    cheques = dict(
+        Cheque.objects.filter(status__in=("PORTFOLIO", "BANK"), received_from_customer__isnull=False)
+        .values("received_from_customer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("received_from_customer_id", "total")
+    )
+
+    batch = []
+    ids = set(ledger) | set(installments) | set(cheques)
+    for customer in Customer.objects.filter(pk__in=ids).iterator():
+        row = ledger.get(customer.pk) or {}
+        customer.received_total = (row.get("incoming") or zero) - (row.get("outgoing") or zero)
+        customer.open_installment_total = installments.get(customer.pk) or zero
+        customer.portfolio_cheque_total = cheques.get(customer.pk) or zero
+        customer.exposure = customer.open_installment_total + customer.portfolio_cheque_total
+        customer.last_activity_date = row.get("last")
+        batch.append(customer)
+    Customer.objects.bulk_update(
+        batch,
+        ["received_total", "open_installment_total", "portfolio_cheque_total", "exposure", "last_activity_date"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0009_customer_status_color'),
+        ('finance', '0007_payment_reminder_dispatch'),
+        ('production', '0005_remove_contract_contract_pdf_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='exposure',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=19, verbose_name='Risk Bakiyesi'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_activity_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Son Hareket'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='open_installment_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=19, verbose_name='Açık Taksit Toplamı'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='portfolio_cheque_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=19, verbose_name='Portföy Çek Toplamı'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='received_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=19, verbose_name='Net Tahsilat'),
+        ),
+        migrations.RunPython(backfill_receivables, reverse_code=migrations.RunPython.noop),
+    ]
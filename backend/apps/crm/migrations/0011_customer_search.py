@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.utils.text import normalize_search_text
+
+TRIGRAM_INDEX = "crm_customer_name_trgm_idx"
+
+
+def backfill_name_normalized(apps, schema_editor):
+    Customer = apps.get_model("crm", "Customer")
+    batch = []
+    for customer in Customer.objects.only("pk", "name").iterator():
+        customer.name_normalized = normalize_search_text(customer.name)
+        batch.append(customer)
+    Customer.objects.bulk_update(batch, ["name_normalized"], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    # Substring search on Postgres; other databases fall back to the btree prefix index.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON crm_customer USING gin (name_normalized gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0010_customer_receivable_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_name_normalized, reverse_code=migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, reverse_code=drop_trigram_index),
+    ]
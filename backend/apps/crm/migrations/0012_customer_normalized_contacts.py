@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+from apps.core.utils.text import normalize_phone, normalize_tax_number
+
+
+def backfill_normalized_contacts(apps, schema_editor):
+    Customer = apps.get_model("crm", "Customer")
+    batch = []
+    for customer in Customer.objects.only("pk", "phone", "tax_number").iterator():
+        customer.phone_normalized = normalize_phone(customer.phone)
+        customer.tax_number_normalized = normalize_tax_number(customer.tax_number)
+        batch.append(customer)
+    Customer.objects.bulk_update(batch, ["phone_normalized", "tax_number_normalized"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_customer_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='tax_number_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(backfill_normalized_contacts, reverse_code=migrations.RunPython.noop),
+    ]
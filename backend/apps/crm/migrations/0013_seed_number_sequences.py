@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def seed_sequences(apps, schema_editor):
+    Sequence = apps.get_model("core", "Sequence")
+    Customer = apps.get_model("crm", "Customer")
+    Proposal = apps.get_model("crm", "Proposal")
+    for name, model, field in (("customer", Customer, "customer_number"), ("proposal", Proposal, "proposal_no")):
+        last = model.objects.aggregate(m=Max(field))["m"] or 0
+        Sequence.objects.update_or_create(name=name, defaults={"last_value": last})
+
+
+def unseed_sequences(apps, schema_editor):
+    apps.get_model("core", "Sequence").objects.filter(name__in=["customer", "proposal"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sequence'),
+        ('crm', '0012_customer_normalized_contacts'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sequences, reverse_code=unseed_sequences),
+    ]
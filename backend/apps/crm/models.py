@@ -1,5 +1,7 @@
-from django.db import models, transaction, IntegrityError
+from django.db import models
 from apps.core.models import TimeStampedModel
+from apps.core.sequences import allocate, next_value
+from apps.core.utils.text import normalize_phone, normalize_search_text, normalize_tax_number
 from apps.finance.models import Currency
 
 from decimal import Decimal
@@ -58,27 +60,56 @@ class Customer(TimeStampedModel):
         verbose_name="Müşteri Sorumlusu",
     )
     customer_number = models.PositiveIntegerField(unique=True, editable=False)
+    # Folded copy of `name` for indexed search (trigram on Postgres, prefix range elsewhere).
+    name_normalized = models.CharField(max_length=200, blank=True, default="", editable=False, db_index=True)
+    # Canonical forms used for duplicate detection and phone/tax number search.
+    phone_normalized = models.CharField(max_length=20, blank=True, default="", editable=False, db_index=True)
+    tax_number_normalized = models.CharField(max_length=50, blank=True, default="", editable=False, db_index=True)
+
+    # Maintained incrementally by apps.crm.signals; rebuilt by `reconcile_customer_receivables`.
+    received_total = models.DecimalField(
+        max_digits=19, decimal_places=2, default=0, editable=False, verbose_name="Net Tahsilat"
+    )
+    open_installment_total = models.DecimalField(
+        max_digits=19, decimal_places=2, default=0, editable=False, verbose_name="Açık Taksit Toplamı"
+    )
+    portfolio_cheque_total = models.DecimalField(
+        max_digits=19, decimal_places=2, default=0, editable=False, verbose_name="Portföy Çek Toplamı"
+    )
+    exposure = models.DecimalField(
+        max_digits=19, decimal_places=2, default=0, editable=False, db_index=True, verbose_name="Risk Bakiyesi"
+    )
+    last_activity_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Son Hareket")
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def _max_customer_number(cls):
+        return cls.objects.aggregate(m=models.Max("customer_number"))["m"] or 0
+
     def _assign_customer_number(self):
         if self.customer_number:
             return
-        last = Customer.objects.select_for_update().order_by("-customer_number").first()
-        next_no = (last.customer_number if last and last.customer_number else 0) + 1
-        self.customer_number = next_no
+        self.customer_number = next_value("customer", seed=Customer._max_customer_number)
+
+    @classmethod
+    def reserve_customer_numbers(cls, count):
+        """Reserve ``count`` consecutive numbers in one sequence increment (bulk imports)."""
+        return allocate("customer", count, seed=cls._max_customer_number)
 
     def save(self, *args, **kwargs):
-        if self.customer_number:
-            return super().save(*args, **kwargs)
-        for _ in range(3):
-            try:
-                with transaction.atomic():
-                    self._assign_customer_number()
-                    return super().save(*args, **kwargs)
-            except IntegrityError:
-                self.customer_number = None
+        self.name_normalized = normalize_search_text(self.name)
+        self.phone_normalized = normalize_phone(self.phone)
+        self.tax_number_normalized = normalize_tax_number(self.tax_number)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                *(f"{field}_normalized" for field in ("name", "phone", "tax_number") if field in update_fields),
+            }
+        if not self.customer_number:
+            self._assign_customer_number()
         return super().save(*args, **kwargs)
 
 
@@ -142,28 +173,23 @@ class Proposal(TimeStampedModel):
         verbose_name="KDV Oranı (%)",
     )
 
+    @classmethod
+    def _max_proposal_no(cls):
+        return cls.objects.aggregate(m=models.Max("proposal_no"))["m"] or 0
+
     def _assign_proposal_no(self):
         if self.proposal_no:
             return
-        last = Proposal.objects.select_for_update().order_by("-proposal_no").first()
-        next_no = (last.proposal_no if last and last.proposal_no else 0) + 1
+        next_no = next_value("proposal", seed=Proposal._max_proposal_no)
         self.proposal_no = next_no
         if not self.proposal_number or not str(self.proposal_number).isdigit():
             self.proposal_number = str(next_no)
 
     def save(self, *args, **kwargs):
-        if self.proposal_no:
-            if not self.proposal_number or not str(self.proposal_number).isdigit():
-                self.proposal_number = str(self.proposal_no)
-            return super().save(*args, **kwargs)
-        for _ in range(3):
-            try:
-                with transaction.atomic():
-                    self._assign_proposal_no()
-                    return super().save(*args, **kwargs)
-            except IntegrityError:
-                self.proposal_no = None
-                self.proposal_number = ""
+        if not self.proposal_no:
+            self._assign_proposal_no()
+        elif not self.proposal_number or not str(self.proposal_number).isdigit():
+            self.proposal_number = str(self.proposal_no)
         return super().save(*args, **kwargs)
 
     @property
@@ -231,15 +257,17 @@ class ProposalItem(models.Model):
 
     total_price = models.DecimalField(max_digits=19, decimal_places=2, editable=False, default=0)
 
-    def save(self, *args, **kwargs):
+    def compute_total_price(self):
         if self.total_measure is not None:
             base = Decimal(self.total_measure or 0) * Decimal(self.quantity or 0) * Decimal(self.unit_price or 0)
-            self.total_price = base.quantize(Decimal("0.01"))
-        else:
-            area_m2 = (self.width * self.length * Decimal(self.quantity)) / Decimal("10000")
-            waste_multiplier = Decimal("1") + (self.fire_rate / Decimal("100"))
-            material_cost = (area_m2 * self.unit_price * waste_multiplier)
-            self.total_price = (material_cost + self.labor_cost).quantize(Decimal("0.01"))
+            return base.quantize(Decimal("0.01"))
+        area_m2 = (self.width * self.length * Decimal(self.quantity)) / Decimal("10000")
+        waste_multiplier = Decimal("1") + (self.fire_rate / Decimal("100"))
+        material_cost = (area_m2 * self.unit_price * waste_multiplier)
+        return (material_cost + self.labor_cost).quantize(Decimal("0.01"))
+
+    def save(self, *args, **kwargs):
+        self.total_price = self.compute_total_price()
         super().save(*args, **kwargs)
 
 
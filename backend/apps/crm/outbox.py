@@ -0,0 +1,10 @@
+from apps.core.models import User
+from apps.core.outbox import subscriber
+from apps.crm.finalize import apply_finalize_side_effects
+
+
+@subscriber("crm.proposal_finalized")
+def proposal_finalized(payloads):
+    actors = User.objects.in_bulk({payload["actor_id"] for payload in payloads if payload.get("actor_id")})
+    for payload in payloads:
+        apply_finalize_side_effects(payload, actor=actors.get(payload.get("actor_id")))
@@ -1,11 +1,19 @@
 from rest_framework import serializers
 from decimal import Decimal
-from django.db.models import Sum
-from django.utils import timezone
 
 from apps.crm.models import Customer, Proposal, ProposalItem
-from apps.finance.models import Transaction, PaymentInstallment, Cheque
-from apps.production.models import Contract
+from apps.crm.services import customer_balance, customer_section_rows, find_duplicate_customer
+
+RECEIVABLE_FIELDS = (
+    "received_total",
+    "open_installment_total",
+    "portfolio_cheque_total",
+    "exposure",
+    "last_activity_date",
+)
+# Row caps of the sections embedded in the customer detail; the overview paginates instead.
+DETAIL_SECTION_LIMITS = {"last_transactions": 10, "payment_installments": 50}
+
 
 class CustomerSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source="get_status_display", read_only=True)
@@ -20,6 +28,8 @@ class CustomerSerializer(serializers.ModelSerializer):
             data.pop("internal_notes", None)
         if role not in {"ADMIN", "FINANCE"}:
             data.pop("risk_limit", None)
+            for key in RECEIVABLE_FIELDS:
+                data.pop(key, None)
         return data
 
     class Meta:
@@ -30,40 +40,31 @@ class CustomerSerializer(serializers.ModelSerializer):
         }
 
     def validate(self, data):
-        phone = data.get("phone")
-        tax_number = data.get("tax_number")
         instance = getattr(self, "instance", None)
-
-        if phone:
-            qs = Customer.objects.filter(phone=phone)
-            if instance:
-                qs = qs.exclude(pk=instance.pk)
-            existing = qs.first()
-            if existing:
-                raise serializers.ValidationError(
-                    {
-                        "phone": (
-                            "Bu telefon numarası "
-                            f"'{existing.name}' adlı müşteride zaten kayıtlı. "
-                            "Lütfen mevcut kaydı kullanın."
-                        )
-                    }
-                )
-
-        if tax_number:
-            qs = Customer.objects.filter(tax_number=tax_number)
-            if instance:
-                qs = qs.exclude(pk=instance.pk)
-            existing = qs.first()
-            if existing:
-                raise serializers.ValidationError(
-                    {
-                        "tax_number": (
-                            "Bu Vergi/TC No "
-                            f"'{existing.name}' adlı müşteride zaten kayıtlı."
-                        )
-                    }
-                )
+        field, existing = find_duplicate_customer(
+            phone=data.get("phone"),
+            tax_number=data.get("tax_number"),
+            exclude_pk=instance.pk if instance else None,
+        )
+        if field == "phone":
+            raise serializers.ValidationError(
+                {
+                    "phone": (
+                        "Bu telefon numarası "
+                        f"'{existing.name}' adlı müşteride zaten kayıtlı. "
+                        "Lütfen mevcut kaydı kullanın."
+                    )
+                }
+            )
+        if field == "tax_number":
+            raise serializers.ValidationError(
+                {
+                    "tax_number": (
+                        "Bu Vergi/TC No "
+                        f"'{existing.name}' adlı müşteride zaten kayıtlı."
+                    )
+                }
+            )
 
         return data
 
@@ -92,135 +93,30 @@ class CustomerDetailSerializer(serializers.ModelSerializer):
     def get_last_transactions(self, obj):
         if self._role() not in {"ADMIN", "FINANCE"}:
             return []
-        transactions = (
-            Transaction.objects.filter(related_customer=obj)
-            .order_by("-date", "-id")[:10]
-        )
-        return [
-            {
-                "id": t.id,
-                "date": t.date.isoformat() if t.date else None,
-                "description": t.description,
-                "amount": str(t.amount),
-                "transaction_type": t.transaction_type,
-                "transaction_type_display": t.get_transaction_type_display(),
-            }
-            for t in transactions
-        ]
+        return customer_section_rows(obj, "last_transactions", limit=DETAIL_SECTION_LIMITS["last_transactions"])
 
     def get_balance(self, obj):
         if self._role() not in {"ADMIN", "FINANCE"}:
             return None
-        incoming = (
-            Transaction.objects.filter(related_customer=obj, transaction_type="INCOME")
-            .aggregate(s=Sum("amount"))
-            .get("s")
-            or Decimal("0.00")
-        )
-        outgoing = (
-            Transaction.objects.filter(related_customer=obj, transaction_type="EXPENSE")
-            .aggregate(s=Sum("amount"))
-            .get("s")
-            or Decimal("0.00")
-        )
-        return str((incoming - outgoing).quantize(Decimal("0.01")))
+        return customer_balance(obj)
 
     def get_active_proposals(self, obj):
-        proposals = (
-            Proposal.objects.filter(customer=obj, status__in=["DRAFT", "SENT", "APPROVED"])
-            .order_by("-created_at", "-id")
-        )
-        return [
-            {
-                "id": p.id,
-                "number": p.proposal_number,
-                "date": p.created_at.date().isoformat() if p.created_at else None,
-                "total": str(p.total_amount),
-                "currency": p.currency,
-                "status": p.status,
-                "status_display": p.get_status_display(),
-            }
-            for p in proposals
-        ]
+        return customer_section_rows(obj, "active_proposals")
 
     def get_contracts(self, obj):
-        contracts = (
-            Contract.objects.filter(proposal__customer=obj)
-            .select_related("proposal")
-            .order_by("-id")
-        )
-        return [
-            {
-                "id": c.id,
-                "project_name": c.project_name,
-                "status": c.status,
-                "status_display": c.get_status_display(),
-                "start_date": c.start_date.isoformat() if c.start_date else None,
-                "deadline_date": c.deadline_date.isoformat() if c.deadline_date else None,
-                "is_overdue": c.is_overdue,
-                "proposal_number": getattr(c.proposal, "proposal_number", None),
-            }
-            for c in contracts
-        ]
+        return customer_section_rows(obj, "contracts")
 
     def get_payment_installments(self, obj):
         if self._role() not in {"ADMIN", "FINANCE"}:
             return []
-        today = timezone.localdate()
-        installments = (
-            PaymentInstallment.objects.filter(plan__contract__proposal__customer=obj)
-            .select_related("plan", "plan__contract", "plan__contract__proposal", "paid_transaction")
-            .order_by("-due_date", "-id")[:50]
+        return customer_section_rows(
+            obj, "payment_installments", limit=DETAIL_SECTION_LIMITS["payment_installments"]
         )
-        payload = []
-        for inst in installments:
-            plan = inst.plan
-            contract = getattr(plan, "contract", None)
-            proposal = getattr(contract, "proposal", None)
-            paid_txn = inst.paid_transaction
-            payload.append(
-                {
-                    "id": inst.id,
-                    "contract_id": contract.id if contract else None,
-                    "proposal_number": getattr(proposal, "proposal_number", None),
-                    "project_name": getattr(contract, "project_name", None),
-                    "installment_no": inst.installment_no,
-                    "due_date": inst.due_date.isoformat() if inst.due_date else None,
-                    "amount": str(inst.amount),
-                    "currency": inst.currency,
-                    "status": inst.status,
-                    "status_display": inst.get_status_display(),
-                    "paid_at": inst.paid_at.isoformat() if inst.paid_at else None,
-                    "paid_transaction_id": paid_txn.id if paid_txn else None,
-                    "paid_transaction_date": paid_txn.date.isoformat() if paid_txn and paid_txn.date else None,
-                    "method": plan.method if plan else None,
-                    "method_display": plan.get_method_display() if plan else None,
-                    "is_overdue": inst.status == "PENDING"
-                    and inst.due_date is not None
-                    and inst.due_date < today,
-                }
-            )
-        return payload
 
     def get_cheques(self, obj):
         if self._role() not in {"ADMIN", "FINANCE"}:
             return []
-        cheques = (
-            Cheque.objects.filter(received_from_customer=obj)
-            .order_by("due_date", "id")
-        )
-        return [
-            {
-                "id": c.id,
-                "serial": c.serial_number,
-                "amount": str(c.amount),
-                "currency": c.currency,
-                "due_date": c.due_date.isoformat() if c.due_date else None,
-                "status": c.status,
-                "status_display": c.get_status_display(),
-            }
-            for c in cheques
-        ]
+        return customer_section_rows(obj, "cheques")
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -230,7 +126,7 @@ class CustomerDetailSerializer(serializers.ModelSerializer):
             data.pop("internal_notes", None)
         if role not in {"ADMIN", "FINANCE"}:
             data.pop("risk_limit", None)
-            for key in ("balance", "last_transactions", "payment_installments", "cheques"):
+            for key in ("balance", "last_transactions", "payment_installments", "cheques", *RECEIVABLE_FIELDS):
                 data.pop(key, None)
         return data
 
@@ -254,6 +150,22 @@ class ProposalItemSerializer(serializers.ModelSerializer):
     def get_area_m2(self, obj):
         return (obj.width * obj.length * obj.quantity) / Decimal("10000")
 
+class ProposalItemBulkSerializer(serializers.ModelSerializer):
+    """One entry of ``PUT /api/proposals/{id}/items/``; FKs are plain ids checked in bulk."""
+
+    id = serializers.IntegerField(required=False)
+    product = serializers.IntegerField(required=False, allow_null=True)
+    slab = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = ProposalItem
+        fields = [
+            "id", "product", "slab", "description",
+            "stone_type", "size_text", "total_measure", "total_unit",
+            "width", "length", "quantity",
+            "fire_rate", "unit_price", "labor_cost",
+        ]
+
 class ProposalSerializer(serializers.ModelSerializer):
     items = ProposalItemSerializer(many=True, read_only=True)
     customer_name = serializers.CharField(source="customer.name", read_only=True)
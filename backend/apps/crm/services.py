@@ -0,0 +1,729 @@
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.utils import timezone
+
+from apps.core.pdf import render_pdf
+from apps.core.permissions import is_admin
+from apps.core.utils.text import normalize_phone, normalize_search_text, normalize_tax_number
+from apps.core.models import SystemEvent
+from apps.crm.models import Appointment, Customer, Proposal, ProposalItem
+from apps.finance.models import Cheque, PaymentInstallment, Transaction
+from apps.inventory.models import ProductDefinition, Slab
+from apps.production.models import Contract
+
+FINANCE_ROLES = {"ADMIN", "FINANCE"}
+OVERVIEW_SECTIONS = ("last_transactions", "active_proposals", "contracts", "payment_installments", "cheques")
+FINANCE_SECTIONS = {"balance", "last_transactions", "payment_installments", "cheques"}
+OVERVIEW_DEFAULT_LIMIT = 10
+OVERVIEW_MAX_LIMIT = 50
+# Customer lookup + one query per section; balance comes from the maintained columns.
+OVERVIEW_QUERY_BUDGET = 1 + len(OVERVIEW_SECTIONS)
+# Cheques still held by us or in collection count towards the customer's exposure.
+OPEN_CHEQUE_STATUSES = ("PORTFOLIO", "BANK")
+ZERO = Decimal("0.00")
+# Upper bound appended to a prefix to turn "starts with" into an index range scan.
+PREFIX_SENTINEL = "\uffff"
+
+
+def _can_see_finance(user):
+    return is_admin(user) or getattr(user, "role", None) in FINANCE_ROLES
+
+
+def _int_param(params, key, default, minimum=0, maximum=None):
+    try:
+        value = int(params.get(key, default))
+    except (TypeError, ValueError):
+        value = default
+    value = max(minimum, value)
+    return min(value, maximum) if maximum is not None else value
+
+
+def _page(queryset, offset, limit, serialize):
+    rows = list(queryset[offset : offset + limit + 1])
+    has_more = len(rows) > limit
+    return {
+        "results": [serialize(row) for row in rows[:limit]],
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if has_more else None,
+    }
+
+
+def customer_balance(customer):
+    """Net INCOME − EXPENSE for the customer, read from the maintained column."""
+    return str(Decimal(customer.received_total or 0).quantize(Decimal("0.01")))
+
+
+def transaction_contribution(transaction_type, amount):
+    if transaction_type == "INCOME":
+        return Decimal(amount or 0)
+    if transaction_type == "EXPENSE":
+        return -Decimal(amount or 0)
+    return ZERO
+
+
+def cheque_contribution(status, amount):
+    return Decimal(amount or 0) if status in OPEN_CHEQUE_STATUSES else ZERO
+
+
+def apply_receivable_delta(customer_id, *, received=ZERO, cheques=ZERO, activity_date=None):
+    """Shift a customer's maintained totals by the given deltas in one UPDATE."""
+    if not customer_id:
+        return
+    updates = {}
+    if received:
+        updates["received_total"] = F("received_total") + received
+    if cheques:
+        updates["portfolio_cheque_total"] = F("portfolio_cheque_total") + cheques
+        updates["exposure"] = F("exposure") + cheques
+    if updates:
+        Customer.objects.filter(pk=customer_id).update(**updates)
+    if activity_date:
+        Customer.objects.filter(pk=customer_id).filter(
+            Q(last_activity_date__isnull=True) | Q(last_activity_date__lt=activity_date)
+        ).update(last_activity_date=activity_date)
+
+
+def refresh_open_installments(customer_filter):
+    """Recompute open installment total and exposure for matching customers in one UPDATE."""
+    open_sum = (
+        PaymentInstallment.objects.filter(plan__contract__proposal__customer=OuterRef("pk"), status="PENDING")
+        .values("plan__contract__proposal__customer")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    total = Coalesce(Subquery(open_sum), Value(ZERO))
+    Customer.objects.filter(customer_filter).update(
+        open_installment_total=total,
+        exposure=total + F("portfolio_cheque_total"),
+    )
+
+
+def reconcile_customer_receivables(customer_ids=None, batch_size=1000):
+    """Rebuild the maintained receivable columns from the ledger with grouped queries.
+
+    Returns the number of customers whose stored values were corrected.
+    """
+    txn_qs = Transaction.objects.filter(related_customer__isnull=False)
+    inst_qs = PaymentInstallment.objects.filter(status="PENDING", plan__contract__proposal__isnull=False)
+    cheque_qs = Cheque.objects.filter(status__in=OPEN_CHEQUE_STATUSES, received_from_customer__isnull=False)
+    customers = Customer.objects.order_by("pk")
+    if customer_ids is not None:
+        txn_qs = txn_qs.filter(related_customer_id__in=customer_ids)
+        inst_qs = inst_qs.filter(plan__contract__proposal__customer_id__in=customer_ids)
+        cheque_qs = cheque_qs.filter(received_from_customer_id__in=customer_ids)
+        customers = customers.filter(pk__in=customer_ids)
+
+    ledger = {
+        row["related_customer_id"]: row
+        for row in txn_qs.values("related_customer_id").annotate(
+            incoming=Sum("amount", filter=Q(transaction_type="INCOME")),
+            outgoing=Sum("amount", filter=Q(transaction_type="EXPENSE")),
+            last=Max("date"),
+        )
+    }
+    installments = dict(
+        inst_qs.values("plan__contract__proposal__customer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("plan__contract__proposal__customer_id", "total")
+    )
+    cheques = dict(
+        cheque_qs.values("received_from_customer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("received_from_customer_id", "total")
+    )
+
+    fields = ["received_total", "open_installment_total", "portfolio_cheque_total", "exposure", "last_activity_date"]
+    changed = []
+    corrected = 0
+    for customer in customers.only("pk", *fields).iterator(chunk_size=batch_size):
+        row = ledger.get(customer.pk) or {}
+        values = {
+            "received_total": (row.get("incoming") or ZERO) - (row.get("outgoing") or ZERO),
+            "open_installment_total": installments.get(customer.pk) or ZERO,
+            "portfolio_cheque_total": cheques.get(customer.pk) or ZERO,
+            "last_activity_date": row.get("last"),
+        }
+        values["exposure"] = values["open_installment_total"] + values["portfolio_cheque_total"]
+        if all(getattr(customer, key) == value for key, value in values.items()):
+            continue
+        for key, value in values.items():
+            setattr(customer, key, value)
+        changed.append(customer)
+        if len(changed) >= batch_size:
+            Customer.objects.bulk_update(changed, fields)
+            corrected += len(changed)
+            changed = []
+    if changed:
+        Customer.objects.bulk_update(changed, fields)
+        corrected += len(changed)
+    return corrected
+
+
+def _prefix_range(field, prefix):
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + PREFIX_SENTINEL})
+
+
+def search_customers(queryset, query):
+    """Filter customers by name, phone, tax number or customer number.
+
+    Names are matched on ``name_normalized``: substring via the trigram index on
+    Postgres, prefix range scan on other databases. Phone and tax number use
+    prefix ranges on their normalized columns; an all-digit query also matches
+    the customer number exactly.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset
+
+    condition = Q()
+    name = normalize_search_text(query)
+    if name:
+        if connection.vendor == "postgresql":
+            condition |= Q(name_normalized__contains=name)
+        else:
+            condition |= _prefix_range("name_normalized", name)
+    digits = "".join(ch for ch in query if ch.isdigit())
+    if digits and len(digits) == len(query.replace(" ", "")):
+        # A typed trunk prefix ("0532...") is not stored in the normalized column.
+        condition |= _prefix_range("phone_normalized", normalize_phone(digits).lstrip("0") or digits)
+        condition |= _prefix_range("tax_number_normalized", digits)
+        if len(digits) <= 9:
+            condition |= Q(customer_number=int(digits))
+    return queryset.filter(condition)
+
+
+DUPLICATE_KEYS = ("phone_normalized", "tax_number_normalized")
+
+
+def find_duplicate_customer(*, phone=None, tax_number=None, exclude_pk=None):
+    """First existing customer sharing the normalized phone or tax number.
+
+    Returns ``(field, customer)`` with field ``"phone"``/``"tax_number"``, or
+    ``(None, None)``. Each check is a single lookup on an indexed column.
+    """
+    for field, value in (("phone", normalize_phone(phone)), ("tax_number", normalize_tax_number(tax_number))):
+        if not value:
+            continue
+        qs = Customer.objects.filter(**{f"{field}_normalized": value})
+        if exclude_pk:
+            qs = qs.exclude(pk=exclude_pk)
+        existing = qs.order_by("pk").first()
+        if existing:
+            return field, existing
+    return None, None
+
+
+def duplicate_customer_clusters(keys=DUPLICATE_KEYS):
+    """All groups of customers sharing a normalized phone or tax number.
+
+    One grouped query per key finds the duplicated values, one more loads the
+    members. Returns ``[{"key", "value", "customers": [...]}, ...]`` with the
+    oldest customer first in each cluster.
+    """
+    clusters = []
+    for key in keys:
+        values = list(
+            Customer.objects.exclude(**{key: ""})
+            .values(key)
+            .annotate(n=Count("id"))
+            .filter(n__gt=1)
+            .values_list(key, flat=True)
+        )
+        if not values:
+            continue
+        members = {}
+        rows = (
+            Customer.objects.filter(**{f"{key}__in": values})
+            .order_by(key, "pk")
+            .values("id", "customer_number", "name", "phone", "tax_number", "owner_id", key)
+        )
+        for row in rows:
+            members.setdefault(row.pop(key), []).append(row)
+        clusters.extend({"key": key, "value": value, "customers": group} for value, group in members.items())
+    return clusters
+
+
+# Blank survivor fields are filled from the first duplicate that has a value.
+MERGE_FILL_FIELDS = ("email", "address", "location_url", "tax_number", "tax_office", "internal_notes")
+
+
+def _contract_customer_fields(customer):
+    return {
+        "customer_name": customer.name,
+        "customer_address": customer.address,
+        "customer_phone": customer.phone,
+        "customer_email": customer.email,
+        "customer_tax_number": customer.tax_number,
+        "customer_tax_office": customer.tax_office,
+    }
+
+
+def merge_customers(survivor, duplicates, *, user=None):
+    """Fold ``duplicates`` into ``survivor`` and delete them.
+
+    Every reference is repointed with one UPDATE per related table, so the cost
+    does not depend on how many proposals or transactions the duplicates own.
+    Contracts still awaiting signature get the survivor's details copied into
+    their customer snapshot; signed contracts keep what was signed. Returns
+    the number of rows moved per table.
+    """
+    duplicate_ids = sorted({getattr(d, "pk", d) for d in duplicates} - {survivor.pk})
+    if not duplicate_ids:
+        raise ValueError("Birleştirilecek en az bir mükerrer müşteri seçilmelidir.")
+
+    with transaction.atomic():
+        locked = {
+            c.pk: c
+            for c in Customer.objects.select_for_update().filter(pk__in=[survivor.pk, *duplicate_ids]).order_by("pk")
+        }
+        missing = {survivor.pk, *duplicate_ids} - set(locked)
+        if missing:
+            raise ValueError(f"Müşteri bulunamadı: {sorted(missing)}")
+        survivor = locked[survivor.pk]
+        merged = [locked[pk] for pk in duplicate_ids]
+
+        filled = []
+        for field in MERGE_FILL_FIELDS:
+            if getattr(survivor, field):
+                continue
+            value = next((getattr(c, field) for c in merged if getattr(c, field)), "")
+            if value:
+                setattr(survivor, field, value)
+                filled.append(field)
+        if filled:
+            survivor.save(update_fields=filled)
+
+        moved = {
+            "contracts": Contract.objects.filter(
+                proposal__customer_id__in=duplicate_ids, status="IMZA_BEKLIYOR"
+            ).update(**_contract_customer_fields(survivor)),
+            "proposals": Proposal.objects.filter(customer_id__in=duplicate_ids).update(customer=survivor),
+            "appointments": Appointment.objects.filter(customer_id__in=duplicate_ids).update(customer=survivor),
+            "transactions": Transaction.objects.filter(related_customer_id__in=duplicate_ids).update(
+                related_customer=survivor
+            ),
+            "cheques": Cheque.objects.filter(received_from_customer_id__in=duplicate_ids).update(
+                received_from_customer=survivor
+            ),
+        }
+
+        SystemEvent.objects.create(
+            event_type="CUSTOMER_MERGED",
+            payload={
+                "survivor_id": survivor.pk,
+                "survivor_number": survivor.customer_number,
+                "merged": [
+                    {
+                        "id": c.pk,
+                        "customer_number": c.customer_number,
+                        "name": c.name,
+                        "phone": c.phone,
+                        "tax_number": c.tax_number,
+                    }
+                    for c in merged
+                ],
+                "filled_fields": filled,
+                "moved": moved,
+                "user_id": getattr(user, "pk", None),
+            },
+        )
+        Customer.objects.filter(pk__in=duplicate_ids).delete()
+        # Bulk UPDATEs bypass the receivable signals; rebuild the survivor's totals.
+        reconcile_customer_receivables(customer_ids=[survivor.pk])
+    return moved
+
+
+IMPORT_CHUNK_SIZE = 500
+
+
+def _choice_value(value, choices):
+    """Accept either the stored value or its Turkish label (case-insensitive)."""
+    if not value:
+        return None
+    key = normalize_search_text(value)
+    for stored, label in choices:
+        if key in {normalize_search_text(stored), normalize_search_text(label)}:
+            return stored
+    return False
+
+
+def import_customers(rows, *, owner=None, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """Validate and bulk insert customer rows from ``apps.crm.utils.read_customer_rows``.
+
+    Existing normalized phones and tax numbers are loaded once and every row is
+    checked against them (and against earlier rows of the same file) in memory.
+    Valid rows get a block of customer numbers and are inserted with
+    ``bulk_create``; invalid rows are reported by sheet row number.
+    """
+    existing_phones = set(Customer.objects.exclude(phone_normalized="").values_list("phone_normalized", flat=True))
+    existing_taxes = set(
+        Customer.objects.exclude(tax_number_normalized="").values_list("tax_number_normalized", flat=True)
+    )
+
+    valid, errors, total = [], [], 0
+    for row_number, values in rows:
+        total += 1
+        row_errors = {}
+        name = values.get("name", "")
+        phone = values.get("phone", "")
+        tax_number = values.get("tax_number", "")
+        email = values.get("email", "")
+        phone_key = normalize_phone(phone)
+        tax_key = normalize_tax_number(tax_number)
+
+        if not name:
+            row_errors["name"] = "Müşteri adı zorunludur."
+        if not phone_key:
+            row_errors["phone"] = "Telefon zorunludur."
+        elif phone_key in existing_phones:
+            row_errors["phone"] = "Bu telefon numarası zaten kayıtlı."
+        if tax_key and tax_key in existing_taxes:
+            row_errors["tax_number"] = "Bu Vergi/TC No zaten kayıtlı."
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                row_errors["email"] = "Geçersiz e-posta adresi."
+
+        choices = {}
+        for field, options in (
+            ("customer_type", Customer.TYPE_CHOICES),
+            ("status", Customer.STATUS_CHOICES),
+            ("segment", Customer.SEGMENT_CHOICES),
+        ):
+            value = _choice_value(values.get(field), options)
+            if value is False:
+                row_errors[field] = f"Geçersiz değer: {values.get(field)}"
+            elif value:
+                choices[field] = value
+
+        for field, limit in (("name", 200), ("phone", 20), ("tax_number", 50), ("tax_office", 100)):
+            if len(values.get(field, "")) > limit:
+                row_errors[field] = f"En fazla {limit} karakter olabilir."
+
+        if row_errors:
+            errors.append({"row": row_number, "errors": row_errors})
+            continue
+
+        existing_phones.add(phone_key)
+        if tax_key:
+            existing_taxes.add(tax_key)
+        valid.append(
+            Customer(
+                name=name,
+                phone=phone,
+                tax_number=tax_number,
+                tax_office=values.get("tax_office", ""),
+                email=email,
+                address=values.get("address", ""),
+                owner=owner,
+                # bulk_create skips save(); fill the derived columns here.
+                name_normalized=normalize_search_text(name),
+                phone_normalized=phone_key,
+                tax_number_normalized=tax_key,
+                **choices,
+            )
+        )
+
+    report = {"total": total, "created": 0, "errors": errors, "dry_run": dry_run}
+    if dry_run or not valid:
+        return report
+
+    with transaction.atomic():
+        for customer, number in zip(valid, Customer.reserve_customer_numbers(len(valid))):
+            customer.customer_number = number
+        Customer.objects.bulk_create(valid, batch_size=chunk_size)
+    report["created"] = len(valid)
+    report["first_customer_number"] = valid[0].customer_number
+    report["last_customer_number"] = valid[-1].customer_number
+    return report
+
+
+PROPOSAL_ITEM_FIELDS = (
+    "product_id", "slab_id", "description", "stone_type", "size_text", "total_measure", "total_unit",
+    "width", "length", "quantity", "fire_rate", "unit_price", "labor_cost",
+)
+
+
+def save_proposal_items(proposal, rows, *, replace=True):
+    """Write a proposal's items in one go and recompute its total once.
+
+    ``rows`` are validated item dicts; rows with an ``id`` update that item
+    (only the given fields), the rest are created. With ``replace`` items not
+    listed are deleted, otherwise they are kept as they are. Totals are
+    computed in memory, so the cost is a fixed number of queries whatever the
+    item count. Raises ValueError for ids that do not belong to the proposal
+    or unknown products/slabs. Returns the proposal's items in id order.
+    """
+    existing = {item.id: item for item in ProposalItem.objects.filter(proposal=proposal)}
+
+    unknown = sorted({row["id"] for row in rows if row.get("id")} - set(existing))
+    if unknown:
+        raise ValueError(f"Bu teklife ait olmayan kalem(ler): {unknown}")
+    product_ids = {row["product"] for row in rows if row.get("product")}
+    missing = sorted(product_ids - set(ProductDefinition.objects.filter(id__in=product_ids).values_list("id", flat=True)))
+    if missing:
+        raise ValueError(f"Ürün bulunamadı: {missing}")
+    slab_ids = {row["slab"] for row in rows if row.get("slab")}
+    missing = sorted(slab_ids - set(Slab.objects.filter(id__in=slab_ids).values_list("id", flat=True)))
+    if missing:
+        raise ValueError(f"Plaka bulunamadı: {missing}")
+
+    to_create, to_update, listed = [], [], set()
+    for row in rows:
+        values = {{"product": "product_id", "slab": "slab_id"}.get(key, key): value for key, value in row.items()}
+        item_id = values.pop("id", None)
+        if item_id:
+            item = existing[item_id]
+            listed.add(item_id)
+            to_update.append(item)
+        else:
+            item = ProposalItem(proposal=proposal)
+            to_create.append(item)
+        for key, value in values.items():
+            setattr(item, key, value)
+        item.total_price = item.compute_total_price()
+
+    removed = [item_id for item_id in existing if item_id not in listed] if replace else []
+    with transaction.atomic():
+        if removed:
+            ProposalItem.objects.filter(id__in=removed).delete()
+        if to_update:
+            ProposalItem.objects.bulk_update(to_update, [*PROPOSAL_ITEM_FIELDS, "total_price"])
+        if to_create:
+            ProposalItem.objects.bulk_create(to_create)
+
+        items = sorted(
+            [item for item_id, item in existing.items() if item_id not in removed] + to_create,
+            key=lambda item: item.id,
+        )
+        proposal.total_amount = sum((item.total_price for item in items), ZERO).quantize(Decimal("0.01"))
+        proposal.save(update_fields=["total_amount"])
+    return items
+
+
+PROPOSAL_PDF_TEMPLATE = "pdf/proposal.html"
+
+
+def proposal_pdf_data(proposal):
+    """Everything the proposal PDF shows; its hash decides whether a cached PDF is current."""
+    customer = proposal.customer
+    items = ProposalItem.objects.filter(proposal=proposal).select_related("product").order_by("id")
+    return {
+        "proposal": {
+            "number": proposal.proposal_number,
+            "date": timezone.localdate(proposal.created_at) if proposal.created_at else None,
+            "valid_until": proposal.valid_until,
+            "work_summary": proposal.work_summary,
+            "stone_summary": proposal.stone_summary,
+            "delivery_type": proposal.get_delivery_type_display(),
+            "notes": proposal.notes,
+            "currency": proposal.currency,
+            "include_tax": proposal.include_tax,
+            "tax_rate": proposal.tax_rate,
+            "subtotal_amount": proposal.subtotal_amount,
+            "tax_amount": proposal.tax_amount,
+            "grand_total": proposal.grand_total,
+        },
+        "customer": {
+            "name": customer.name,
+            "address": customer.address or "",
+            "phone": customer.phone or "",
+            "email": customer.email or "",
+            "tax_number": customer.tax_number or "",
+            "tax_office": customer.tax_office or "",
+        },
+        "items": [
+            {
+                "description": item.description or getattr(item.product, "name", ""),
+                "stone_type": item.stone_type,
+                "size_text": item.size_text,
+                "measure": item.total_measure,
+                "unit": item.get_total_unit_display() if item.total_unit else "",
+                "width": item.width,
+                "length": item.length,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "total_price": item.total_price,
+            }
+            for item in items
+        ],
+    }
+
+
+def render_proposal_pdf(proposal_id, *, force=False):
+    """Render one proposal's PDF if its data changed; returns "rendered", "cached" or "missing"."""
+    proposal = Proposal.objects.select_related("customer").filter(pk=proposal_id).first()
+    if proposal is None:
+        return "missing"
+    _, rendered = render_pdf("proposal", proposal.pk, PROPOSAL_PDF_TEMPLATE, proposal_pdf_data(proposal), force=force)
+    return "rendered" if rendered else "cached"
+
+
+def _transaction_row(t):
+    return {
+        "id": t.id,
+        "date": t.date.isoformat() if t.date else None,
+        "description": t.description,
+        "amount": str(t.amount),
+        "transaction_type": t.transaction_type,
+        "transaction_type_display": t.get_transaction_type_display(),
+    }
+
+
+def _proposal_row(p):
+    return {
+        "id": p.id,
+        "number": p.proposal_number,
+        "date": p.created_at.date().isoformat() if p.created_at else None,
+        "total": str(p.total_amount),
+        "currency": p.currency,
+        "status": p.status,
+        "status_display": p.get_status_display(),
+    }
+
+
+def _contract_row(c):
+    return {
+        "id": c.id,
+        "project_name": c.project_name,
+        "status": c.status,
+        "status_display": c.get_status_display(),
+        "start_date": c.start_date.isoformat() if c.start_date else None,
+        "deadline_date": c.deadline_date.isoformat() if c.deadline_date else None,
+        "is_overdue": c.is_overdue,
+        "proposal_number": getattr(c.proposal, "proposal_number", None),
+    }
+
+
+def _installment_row(inst, today):
+    plan = inst.plan
+    contract = getattr(plan, "contract", None)
+    proposal = getattr(contract, "proposal", None)
+    paid_txn = inst.paid_transaction
+    return {
+        "id": inst.id,
+        "contract_id": contract.id if contract else None,
+        "proposal_number": getattr(proposal, "proposal_number", None),
+        "project_name": getattr(contract, "project_name", None),
+        "installment_no": inst.installment_no,
+        "due_date": inst.due_date.isoformat() if inst.due_date else None,
+        "amount": str(inst.amount),
+        "currency": inst.currency,
+        "status": inst.status,
+        "status_display": inst.get_status_display(),
+        "paid_at": inst.paid_at.isoformat() if inst.paid_at else None,
+        "paid_transaction_id": paid_txn.id if paid_txn else None,
+        "paid_transaction_date": paid_txn.date.isoformat() if paid_txn and paid_txn.date else None,
+        "method": plan.method if plan else None,
+        "method_display": plan.get_method_display() if plan else None,
+        "is_overdue": inst.status == "PENDING" and inst.due_date is not None and inst.due_date < today,
+    }
+
+
+def _cheque_row(c):
+    return {
+        "id": c.id,
+        "serial": c.serial_number,
+        "amount": str(c.amount),
+        "currency": c.currency,
+        "due_date": c.due_date.isoformat() if c.due_date else None,
+        "status": c.status,
+        "status_display": c.get_status_display(),
+    }
+
+
+def customer_section(customer, section, *, today=None):
+    """Queryset and row builder of one customer section (see ``OVERVIEW_SECTIONS``).
+
+    Shared by the overview and ``CustomerDetailSerializer`` so both return the
+    same rows, each section in one query.
+    """
+    if section == "last_transactions":
+        return Transaction.objects.filter(related_customer=customer).order_by("-date", "-id"), _transaction_row
+    if section == "active_proposals":
+        proposals = Proposal.objects.filter(customer=customer, status__in=["DRAFT", "SENT", "APPROVED"])
+        return proposals.order_by("-created_at", "-id"), _proposal_row
+    if section == "contracts":
+        contracts = Contract.objects.filter(proposal__customer=customer).select_related("proposal")
+        return contracts.order_by("-id"), _contract_row
+    if section == "payment_installments":
+        today = today or timezone.localdate()
+        installments = (
+            PaymentInstallment.objects.filter(plan__contract__proposal__customer=customer)
+            .select_related("plan", "plan__contract", "plan__contract__proposal", "paid_transaction")
+            .order_by("-due_date", "-id")
+        )
+        return installments, lambda inst: _installment_row(inst, today)
+    if section == "cheques":
+        return Cheque.objects.filter(received_from_customer=customer).order_by("due_date", "id"), _cheque_row
+    raise ValueError(f"Unknown customer section: {section}")
+
+
+def customer_section_rows(customer, section, *, limit=None):
+    queryset, row = customer_section(customer, section)
+    if limit is not None:
+        queryset = queryset[:limit]
+    return [row(item) for item in queryset]
+
+
+def build_customer_overview(customer, *, user, params=None):
+    """Customer 360 payload limited to the sections the user's role may see.
+
+    Each section is capped at ``limit`` rows (max ``OVERVIEW_MAX_LIMIT``) and
+    paginated with ``<section>_offset``; ``sections`` narrows the response to a
+    comma separated subset. Finance sections are never queried for roles that
+    cannot see them, so the whole payload stays within ``OVERVIEW_QUERY_BUDGET``.
+    """
+    params = params or {}
+    limit = _int_param(params, "limit", OVERVIEW_DEFAULT_LIMIT, minimum=1, maximum=OVERVIEW_MAX_LIMIT)
+    requested = {s.strip() for s in (params.get("sections") or "").split(",") if s.strip()}
+    allowed = set(OVERVIEW_SECTIONS) | {"balance"}
+    if not _can_see_finance(user):
+        allowed -= FINANCE_SECTIONS
+    wanted = allowed & requested if requested else allowed
+
+    def offset(section):
+        return _int_param(params, f"{section}_offset", 0)
+
+    today = timezone.localdate()
+    payload = {
+        "customer": {
+            "id": customer.id,
+            "customer_number": customer.customer_number,
+            "name": customer.name,
+            "customer_type": customer.customer_type,
+            "phone": customer.phone,
+            "email": customer.email,
+            "status": customer.status,
+            "status_display": customer.get_status_display(),
+            "segment": customer.segment,
+            "segment_display": customer.get_segment_display(),
+            "status_color": customer.status_color,
+            "owner": customer.owner_id,
+        },
+        "sections": {},
+    }
+    sections = payload["sections"]
+
+    if "balance" in wanted:
+        payload["balance"] = customer_balance(customer)
+        payload["receivables"] = {
+            "received_total": str(customer.received_total),
+            "open_installment_total": str(customer.open_installment_total),
+            "portfolio_cheque_total": str(customer.portfolio_cheque_total),
+            "exposure": str(customer.exposure),
+            "risk_limit": str(customer.risk_limit),
+            "last_activity_date": customer.last_activity_date.isoformat() if customer.last_activity_date else None,
+        }
+    for section in OVERVIEW_SECTIONS:
+        if section in wanted:
+            queryset, row = customer_section(customer, section, today=today)
+            sections[section] = _page(queryset, offset(section), limit, row)
+    return payload
@@ -0,0 +1,78 @@
+"""Keep the denormalized receivable columns on Customer in step with finance rows.
+
+Transactions and cheques shift the totals by delta (old contribution out, new
+one in); installments recompute the open total of the affected customer with
+a single UPDATE. ``reconcile_customer_receivables`` rebuilds everything from
+scratch if the columns ever drift.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.crm.services import (
+    apply_receivable_delta,
+    cheque_contribution,
+    refresh_open_installments,
+    transaction_contribution,
+)
+from apps.finance.models import Cheque, PaymentInstallment, Transaction, installments_changed
+
+
+@receiver(post_save, sender=Transaction)
+def _transaction_saved(sender, instance, created, **kwargs):
+    new = transaction_contribution(instance.transaction_type, instance.amount)
+    if created or instance.previous("transaction_type") is None:
+        apply_receivable_delta(instance.related_customer_id, received=new, activity_date=instance.date)
+        return
+
+    old = transaction_contribution(instance.previous("transaction_type"), instance.previous("amount"))
+    prev_customer_id = instance.previous("related_customer")
+    if prev_customer_id != instance.related_customer_id:
+        apply_receivable_delta(prev_customer_id, received=-old)
+        apply_receivable_delta(instance.related_customer_id, received=new, activity_date=instance.date)
+    else:
+        apply_receivable_delta(instance.related_customer_id, received=new - old, activity_date=instance.date)
+
+
+@receiver(post_delete, sender=Transaction)
+def _transaction_deleted(sender, instance, **kwargs):
+    apply_receivable_delta(
+        instance.related_customer_id,
+        received=-transaction_contribution(instance.transaction_type, instance.amount),
+    )
+
+
+@receiver(post_save, sender=Cheque)
+def _cheque_saved(sender, instance, created, **kwargs):
+    new = cheque_contribution(instance.status, instance.amount)
+    if created or instance.previous("status") is None:
+        apply_receivable_delta(instance.received_from_customer_id, cheques=new)
+        return
+
+    old = cheque_contribution(instance.previous("status"), instance.previous("amount"))
+    prev_customer_id = instance.previous("received_from_customer")
+    if prev_customer_id != instance.received_from_customer_id:
+        apply_receivable_delta(prev_customer_id, cheques=-old)
+        apply_receivable_delta(instance.received_from_customer_id, cheques=new)
+    else:
+        apply_receivable_delta(instance.received_from_customer_id, cheques=new - old)
+
+
+@receiver(post_delete, sender=Cheque)
+def _cheque_deleted(sender, instance, **kwargs):
+    apply_receivable_delta(
+        instance.received_from_customer_id,
+        cheques=-cheque_contribution(instance.status, instance.amount),
+    )
+
+
+@receiver(post_save, sender=PaymentInstallment)
+@receiver(post_delete, sender=PaymentInstallment)
+def _installment_changed(sender, instance, **kwargs):
+    refresh_open_installments(Q(proposals__contract__payment_plan__id=instance.plan_id))
+
+
+@receiver(installments_changed)
+def _installments_bulk_changed(sender, plan, **kwargs):
+    refresh_open_installments(Q(proposals__contract__payment_plan__id=plan.pk))
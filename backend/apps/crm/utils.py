@@ -0,0 +1,79 @@
+import csv
+import io
+import zipfile
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from apps.core.utils.text import normalize_search_text
+
+# Accepted column headers (normalized) for each Customer field.
+IMPORT_COLUMNS = {
+    "name": ("name", "ad", "adi", "ad soyad", "musteri", "musteri adi", "firma", "musteri/firma adi", "unvan"),
+    "phone": ("phone", "telefon", "tel", "gsm", "cep"),
+    "tax_number": ("tax_number", "vergi no", "tc", "tc no", "tckn", "vkn", "tc / vergi no"),
+    "tax_office": ("tax_office", "vergi dairesi"),
+    "email": ("email", "e-posta", "eposta", "mail"),
+    "address": ("address", "adres"),
+    "customer_type": ("customer_type", "tip", "musteri tipi"),
+    "status": ("status", "durum"),
+    "segment": ("segment",),
+}
+_HEADER_LOOKUP = {alias: field for field, aliases in IMPORT_COLUMNS.items() for alias in aliases}
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Excel stores phone / tax numbers typed as numbers as floats.
+        value = int(value)
+    return str(value).strip()
+
+
+def _map_header(header):
+    return [_HEADER_LOOKUP.get(normalize_search_text(_cell_text(h))) for h in header]
+
+
+def _csv_rows(reader):
+    try:
+        yield from reader
+    except csv.Error as exc:
+        raise ValueError(f"CSV dosyası okunamadı: {exc}")
+
+
+def read_customer_rows(uploaded_file):
+    """Yield ``(row_number, {field: text})`` from an XLSX or CSV upload.
+
+    The first row is the header; unknown columns are ignored and fully blank
+    rows are skipped. Row numbers match what the user sees in the sheet.
+    """
+    name = (getattr(uploaded_file, "name", "") or "").lower()
+    if name.endswith(".csv"):
+        raw = uploaded_file.read()
+        text = raw.decode("utf-8-sig") if isinstance(raw, bytes) else raw
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            # Single-column (or empty) files have no delimiter to detect.
+            dialect = csv.excel
+        rows = _csv_rows(csv.reader(io.StringIO(text), dialect))
+    elif name.endswith(".xlsx"):
+        try:
+            workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile, KeyError):
+            raise ValueError("Excel dosyası okunamadı.")
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        raise ValueError("Sadece .xlsx veya .csv dosyaları içe aktarılabilir.")
+
+    header = None
+    for number, row in enumerate(rows, start=1):
+        if header is None:
+            header = _map_header(row)
+            if "name" not in header:
+                raise ValueError("Başlık satırında müşteri adı kolonu bulunamadı.")
+            continue
+        values = {field: _cell_text(value) for field, value in zip(header, row) if field}
+        if any(values.values()):
+            yield number, values
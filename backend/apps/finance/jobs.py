@@ -0,0 +1,17 @@
+from django.core.management import call_command
+
+from apps.core.jobs import register
+from apps.finance.services import REMINDER_BATCH_SIZE, dispatch_due_reminders, generate_payment_reminders
+
+
+@register("finance.dispatch_payment_reminders")
+def dispatch_payment_reminders(batch_size=REMINDER_BATCH_SIZE, generate=False, days_ahead=7):
+    if generate:
+        generate_payment_reminders(days_ahead=days_ahead)
+    while any(dispatch_due_reminders(batch_size=batch_size)):
+        pass
+
+
+@register("finance.check_cheque_due")
+def check_cheque_due():
+    call_command("check_cheque_due")
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.services import (
+    REMINDER_BATCH_SIZE,
+    dispatch_due_reminders,
+    generate_payment_reminders,
+    get_reminder_channel,
+)
+
+
+class Command(BaseCommand):
+    help = "Vadesi gelen ödeme hatırlatmalarını toplu olarak gönderir (birden fazla worker paralel çalışabilir)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REMINDER_BATCH_SIZE)
+        parser.add_argument(
+            "--generate",
+            action="store_true",
+            help="Göndermeden önce yaklaşan taksitler için eksik hatırlatmaları oluştur.",
+        )
+        parser.add_argument("--days-ahead", type=int, default=7)
+        parser.add_argument("--channel", default=None, help="Dotted path of the outbound channel class.")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Kuyruk boşaldığında çıkmak yerine bekleyip tekrar dene (worker modu).",
+        )
+        parser.add_argument("--sleep", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        channel = get_reminder_channel(options["channel"])
+        batch_size = max(1, options["batch_size"])
+
+        if options["generate"]:
+            created = generate_payment_reminders(days_ahead=options["days_ahead"])
+            self.stdout.write(f"{created} hatırlatma oluşturuldu.")
+
+        total_sent = 0
+        total_cancelled = 0
+        while True:
+            sent, cancelled = dispatch_due_reminders(batch_size=batch_size, channel=channel)
+            total_sent += sent
+            total_cancelled += cancelled
+            if sent or cancelled:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_sent} hatırlatma gönderildi, {total_cancelled} hatırlatma iptal edildi."
+            )
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_alter_paymentplan_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='paymentreminder',
+            index=models.Index(fields=['status', 'run_at'], name='finance_reminder_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentreminder',
+            constraint=models.UniqueConstraint(fields=('installment', 'run_at'), name='finance_reminder_unique_run'),
+        ),
+    ]
@@ -6,11 +6,15 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.db.models import Sum
-from django.db.models.signals import post_delete, post_save, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
 from django.utils import timezone
 
-from apps.core.models import TimeStampedModel, Notification
+from apps.core.models import TimeStampedModel, TrackedFieldsMixin
+from apps.core.outbox import publish_notification
+
+# Sent after PaymentPlan.build_installments writes installments in bulk (kwargs: plan).
+installments_changed = Signal()
 
 class Currency(models.TextChoices):
     TRY = "TRY", "Türk Lirası"
@@ -48,7 +52,7 @@ class Account(TimeStampedModel):
     def __str__(self):
         return f"{self.name} ({self.currency})"
 
-class Transaction(TimeStampedModel):
+class Transaction(TrackedFieldsMixin, TimeStampedModel):
     """
     Çift Taraflı Kayıt (Double-Entry) Mantığı:
     - Para Girişi: source_account=None, target_account=KASA/BANK
@@ -61,6 +65,8 @@ class Transaction(TimeStampedModel):
         ("EXPENSE", "Ödeme / Çıkış"),
         ("TRANSFER", "Virman / Transfer"),
     )
+    # Bakiye ve müşteri alacak sinyalleri eski değerleri buradan okur
+    tracked_fields = ("source_account", "target_account", "related_customer", "transaction_type", "amount")
 
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     date = models.DateField(default=timezone.now, verbose_name="İşlem Tarihi")
@@ -123,7 +129,7 @@ class Transaction(TimeStampedModel):
         self.full_clean()
         return super().save(*args, **kwargs)
 
-class Cheque(TimeStampedModel):
+class Cheque(TrackedFieldsMixin, TimeStampedModel):
     STATUS_CHOICES = (
         ("PORTFOLIO", "Portföyde (Bizde)"),
         ("ENDORSED", "Ciro Edildi (Tedarikçiye Verildi)"),
@@ -131,6 +137,7 @@ class Cheque(TimeStampedModel):
         ("COLLECTED", "Tahsil Edildi"),
         ("BOUNCED", "Karşılıksız/Döndü"),
     )
+    tracked_fields = ("status", "amount", "received_from_customer")
 
     serial_number = models.CharField(max_length=50, unique=True, verbose_name="Çek Seri No")
     drawer = models.CharField(max_length=200, default="", verbose_name="Keşideci (Çek Sahibi)")
@@ -165,28 +172,24 @@ class Cheque(TimeStampedModel):
         return delta.days
 
     def save(self, *args, **kwargs):
-        old_status = None
         creating = self.pk is None
-        if not creating:
-            old_status = Cheque.objects.filter(pk=self.pk).values_list("status", flat=True).first()
-
+        # Loaded state (TrackedFieldsMixin); apps.crm.signals reads the same snapshot.
+        old_status = None if creating else self.previous("status")
         super().save(*args, **kwargs)
 
-        # Notification hooks (role-based)
+        # Notification hooks (role-based), delivered through the outbox after commit
         if creating:
-            Notification.objects.create(
-                recipient_role="FINANCE",
+            publish_notification(
                 title="Yeni çek eklendi",
                 message=f"{self.serial_number} • {self.amount} {self.currency} • Vade: {self.due_date}",
-                level="INFO",
+                roles=("FINANCE",),
                 related_url="/finance",
             )
         elif old_status and old_status != self.status:
-            Notification.objects.create(
-                recipient_role="FINANCE",
+            publish_notification(
                 title="Çek durumu güncellendi",
                 message=f"{self.serial_number} • {old_status} → {self.status}",
-                level="INFO",
+                roles=("FINANCE",),
                 related_url="/finance",
             )
 
@@ -272,6 +275,8 @@ class PaymentPlan(TimeStampedModel):
 
         existing = {inst.installment_no: inst for inst in self.installments.all()}
         used_numbers = set()
+        to_create, to_update, update_fields = [], [], set()
+        now = timezone.now()
 
         for item in schedule:
             no = int(item["installment_no"])
@@ -282,35 +287,45 @@ class PaymentPlan(TimeStampedModel):
             if inst:
                 if inst.status == "PAID":
                     continue
-                updates = {}
+                changed = False
                 for field, value in (
                     ("due_date", item.get("due_date")),
                     ("amount", amount),
                     ("method", method),
                 ):
                     if value is not None and getattr(inst, field) != value:
-                        updates[field] = value
-                if updates:
-                    for key, value in updates.items():
-                        setattr(inst, key, value)
-                    inst.save(update_fields=list(updates.keys()))
+                        setattr(inst, field, value)
+                        update_fields.add(field)
+                        changed = True
+                if changed:
+                    inst.updated_at = now
+                    to_update.append(inst)
             else:
-                PaymentInstallment.objects.create(
-                    plan=self,
-                    installment_no=no,
-                    due_date=item.get("due_date"),
-                    amount=amount,
-                    currency=self.currency,
-                    method=method,
+                to_create.append(
+                    PaymentInstallment(
+                        plan=self,
+                        installment_no=no,
+                        due_date=item.get("due_date"),
+                        amount=amount,
+                        currency=self.currency,
+                        method=method,
+                    )
                 )
 
         # Cancel extra pending installments not in schedule
-        for no, inst in existing.items():
-            if no in used_numbers:
-                continue
-            if inst.status == "PENDING":
-                inst.status = "CANCELLED"
-                inst.save(update_fields=["status"])
+        to_cancel = [
+            inst.pk for no, inst in existing.items() if no not in used_numbers and inst.status == "PENDING"
+        ]
+
+        if to_create:
+            PaymentInstallment.objects.bulk_create(to_create)
+        if to_update:
+            PaymentInstallment.objects.bulk_update(to_update, [*sorted(update_fields), "updated_at"])
+        if to_cancel:
+            PaymentInstallment.objects.filter(pk__in=to_cancel).update(status="CANCELLED", updated_at=now)
+        if to_create or to_update or to_cancel:
+            # Bulk writes skip post_save; listeners (customer receivables) refresh once per plan.
+            installments_changed.send(sender=PaymentPlan, plan=self)
 
 
 class PaymentInstallment(TimeStampedModel):
@@ -365,9 +380,16 @@ class PaymentReminder(TimeStampedModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
     message = models.CharField(max_length=255, blank=True, default="")
     recipient_role = models.CharField(max_length=20, blank=True, default="")
+    sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["run_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="finance_reminder_due_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["installment", "run_at"], name="finance_reminder_unique_run"),
+        ]
 
 
 class FixedExpense(TimeStampedModel):
@@ -410,27 +432,13 @@ def _recalculate_account_balance(account_id):
     account.save(update_fields=["cached_balance"])
 
 
-@receiver(pre_save, sender=Transaction)
-def _track_transaction_accounts(sender, instance, **kwargs):
-    if not instance.pk:
-        return
-    prev = Transaction.objects.filter(pk=instance.pk).values(
-        "source_account_id",
-        "target_account_id",
-    ).first()
-    if not prev:
-        return
-    instance._prev_source_account_id = prev.get("source_account_id")
-    instance._prev_target_account_id = prev.get("target_account_id")
-
-
 @receiver(post_save, sender=Transaction)
 def _update_account_balances_on_save(sender, instance, **kwargs):
     account_ids = {
         instance.source_account_id,
         instance.target_account_id,
-        getattr(instance, "_prev_source_account_id", None),
-        getattr(instance, "_prev_target_account_id", None),
+        instance.previous("source_account"),
+        instance.previous("target_account"),
     }
     for account_id in {aid for aid in account_ids if aid}:
         _recalculate_account_balance(account_id)
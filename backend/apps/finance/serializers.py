@@ -4,6 +4,8 @@ from django.core.files.storage import default_storage
 from django.db.models import Sum
 from rest_framework import serializers
 
+from apps.core.images import derivative_url
+from apps.core.uploads import discard_upload
 from apps.finance.models import Account, Transaction, Cheque, PaymentPlan, PaymentInstallment, FixedExpense
 
 
@@ -34,8 +36,7 @@ class FilePathMixin:
 
         file_field = getattr(instance, field_name)
         if path_value == "":
-            if file_field:
-                file_field.delete(save=False)
+            discard_upload(file_field)
             setattr(instance, field_name, None)
         else:
             file_field.name = path_value
@@ -119,6 +120,8 @@ class ChequeSerializer(serializers.ModelSerializer, FilePathMixin):
 
     photo_front_url = serializers.SerializerMethodField(read_only=True)
     photo_back_url = serializers.SerializerMethodField(read_only=True)
+    photo_front_thumbnail_url = serializers.SerializerMethodField(read_only=True)
+    photo_back_thumbnail_url = serializers.SerializerMethodField(read_only=True)
     photo_front_path = serializers.CharField(write_only=True, required=False, allow_blank=True)
     photo_back_path = serializers.CharField(write_only=True, required=False, allow_blank=True)
 
@@ -138,6 +141,12 @@ class ChequeSerializer(serializers.ModelSerializer, FilePathMixin):
     def get_photo_back_url(self, obj):
         return self._file_url(getattr(obj, "photo_back", None))
 
+    def get_photo_front_thumbnail_url(self, obj):
+        return derivative_url(obj.photo_front, "thumb", self.context.get("request"))
+
+    def get_photo_back_thumbnail_url(self, obj):
+        return derivative_url(obj.photo_back, "thumb", self.context.get("request"))
+
     def _normalize_media_path(self, value, field_name):
         return self.validate_upload_path(value)
 
@@ -156,6 +165,7 @@ class ChequeSerializer(serializers.ModelSerializer, FilePathMixin):
             'given_to_supplier',
             'photo_front', 'photo_back',
             'photo_front_url', 'photo_back_url',
+            'photo_front_thumbnail_url', 'photo_back_thumbnail_url',
             'photo_front_path', 'photo_back_path',
             'days_to_due', 'created_at'
         ]
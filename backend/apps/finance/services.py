@@ -1,7 +1,17 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from django.utils.module_loading import import_string
 
 from apps.core.models import Notification
-from apps.finance.models import Transaction
+from apps.core.outbox import publish_notification
+from apps.finance.models import PaymentInstallment, PaymentReminder, Transaction
+
+REMINDER_LEAD_DAYS = (3, 0)
+REMINDER_HOUR = 9
+REMINDER_BATCH_SIZE = 200
 
 
 def record_installment_payment(*, installment, target_account, description=""):
@@ -33,13 +43,130 @@ def record_installment_payment(*, installment, target_account, description=""):
         f"{installment.amount} {installment.currency} tahsil edildi."
     )
 
-    for role in ("FINANCE", "ADMIN"):
-        Notification.objects.create(
-            recipient_role=role,
-            title="Taksit tahsil edildi",
-            message=message,
-            level="SUCCESS",
-            related_url="/finance",
-        )
+    publish_notification(
+        title="Taksit tahsil edildi",
+        message=message,
+        roles=("FINANCE", "ADMIN"),
+        level="SUCCESS",
+        related_url="/finance",
+    )
 
     return txn
+
+
+class NotificationReminderChannel:
+    """Default outbound channel: turns reminders into role-based notifications."""
+
+    title = "Taksit hatırlatması"
+
+    def send(self, reminders):
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient_role=reminder.recipient_role or "FINANCE",
+                    title=self.title,
+                    message=reminder.message,
+                    level="WARNING",
+                    related_url="/finance",
+                )
+                for reminder in reminders
+            ]
+        )
+
+
+def get_reminder_channel(path=None):
+    path = path or getattr(
+        settings,
+        "PAYMENT_REMINDER_CHANNEL",
+        "apps.finance.services.NotificationReminderChannel",
+    )
+    return import_string(path)()
+
+
+def _reminder_message(installment):
+    contract = getattr(installment.plan, "contract", None)
+    customer_name = getattr(contract, "customer_name", "") or "Müşteri"
+    return (
+        f"{customer_name} • Taksit #{installment.installment_no} • "
+        f"{installment.amount} {installment.currency} • Vade: {installment.due_date}"
+    )[:255]
+
+
+def generate_payment_reminders(*, days_ahead=7, lead_days=REMINDER_LEAD_DAYS, recipient_role="FINANCE"):
+    """Create missing reminders for pending installments due within ``days_ahead`` days.
+
+    Idempotent: reminders are unique per (installment, run_at), so re-running only
+    inserts the rows that do not exist yet.
+    """
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+    installments = (
+        PaymentInstallment.objects.select_related("plan", "plan__contract")
+        .filter(
+            status="PENDING",
+            plan__is_active=True,
+            due_date__gte=today,
+            due_date__lte=today + timedelta(days=days_ahead),
+        )
+        .order_by("due_date", "id")
+    )
+
+    reminders = []
+    for installment in installments:
+        message = _reminder_message(installment)
+        for lead in lead_days:
+            run_date = installment.due_date - timedelta(days=lead)
+            reminders.append(
+                PaymentReminder(
+                    installment=installment,
+                    run_at=timezone.make_aware(datetime.combine(run_date, time(REMINDER_HOUR)), tz),
+                    message=message,
+                    recipient_role=recipient_role,
+                )
+            )
+
+    if not reminders:
+        return 0
+    existing = set(
+        PaymentReminder.objects.filter(
+            installment_id__in={r.installment_id for r in reminders}
+        ).values_list("installment_id", "run_at")
+    )
+    missing = [r for r in reminders if (r.installment_id, r.run_at) not in existing]
+    PaymentReminder.objects.bulk_create(missing, batch_size=500, ignore_conflicts=True)
+    return len(missing)
+
+
+def dispatch_due_reminders(*, batch_size=REMINDER_BATCH_SIZE, channel=None, now=None):
+    """Claim one batch of due reminders, send them and mark them SENT.
+
+    Rows are claimed with ``SKIP LOCKED`` so several workers can drain the queue
+    side by side without sending the same reminder twice. Returns (sent, cancelled).
+    """
+    channel = channel or get_reminder_channel()
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        batch = list(
+            PaymentReminder.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("installment")
+            .filter(status="PENDING", run_at__lte=now)
+            .order_by("run_at", "id")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        deliverable = [r for r in batch if r.installment.status == "PENDING"]
+        stale_ids = [r.id for r in batch if r.installment.status != "PENDING"]
+
+        if deliverable:
+            channel.send(deliverable)
+            PaymentReminder.objects.filter(id__in=[r.id for r in deliverable]).update(
+                status="SENT",
+                sent_at=now,
+                updated_at=now,
+            )
+        if stale_ids:
+            PaymentReminder.objects.filter(id__in=stale_ids).update(status="CANCELLED", updated_at=now)
+
+    return len(deliverable), len(stale_ids)
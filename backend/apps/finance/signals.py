@@ -0,0 +1,4 @@
+from apps.core.images import watch_image_fields
+from apps.finance.models import Cheque
+
+watch_image_fields(Cheque, "photo_front", "photo_back")
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import ProductDefinition, Slab, StockReservation
+from .models import ProductDefinition, Slab, StockReservation, StockSummary
 
 admin.site.register(ProductDefinition)
 admin.site.register(Slab)
 admin.site.register(StockReservation)
+admin.site.register(StockSummary)
@@ -1,9 +1,24 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
 from django.utils import timezone
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from apps.inventory.models import ProductDefinition, Slab
-from apps.inventory.serializers import ProductDefinitionSerializer, SlabSerializer
+from apps.inventory.models import ProductDefinition, Slab, StockSummary
+from apps.inventory.serializers import (
+    ProductDefinitionSerializer,
+    SlabConsumeSerializer,
+    SlabFitQuerySerializer,
+    SlabFitSerializer,
+    SlabScanSerializer,
+    SlabSerializer,
+    StockSummarySerializer,
+)
+from apps.inventory.services import consume_slab, find_fitting_slabs, remnant_stock_summary, scan_slabs
 from apps.core.permissions import RolePermission
 
 
@@ -35,3 +50,111 @@ class SlabViewSet(viewsets.ModelViewSet):
                 updated.reserved_at = None
                 updated.reserved_for = None
                 updated.save(update_fields=["reserved_at", "reserved_for"])
+
+    @action(detail=False, methods=["get"], url_path="fit")
+    def fit(self, request):
+        """
+        GET /api/slabs/fit/?product=1&thickness=2&width=60&length=240&rotate=1&limit=20
+        Parçanın sığdığı boştaki plakalar / parça stoklar, en az artan alana göre sıralı.
+        """
+        params = SlabFitQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        slabs = find_fitting_slabs(
+            product=data["product"],
+            thickness=data["thickness"],
+            width=data["width"],
+            length=data["length"],
+            allow_rotation=data["rotate"],
+            contract=data.get("contract"),
+            limit=data["limit"],
+        )
+        return Response(SlabFitSerializer(slabs, many=True, context={"request": request}).data)
+
+    @action(detail=True, methods=["post"], url_path="consume")
+    def consume(self, request, pk=None):
+        """
+        POST /api/slabs/{id}/consume/
+        {"work_order": 5, "remnants": [{"width": 60, "length": 120}]}
+        veya {"pieces": [{"width": 62, "length": 310, "quantity": 1}]}
+        Plakayı kesildi olarak işaretler; artıkları parça stok (PART_STOCK) olarak kaydeder.
+        """
+        slab = self.get_object()
+        serializer = SlabConsumeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            remnants = consume_slab(
+                slab,
+                remnants=data.get("remnants"),
+                pieces=data.get("pieces"),
+                work_order=data.get("work_order"),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        slab.refresh_from_db()
+        context = {"request": request}
+        return Response(
+            {
+                "slab": SlabSerializer(slab, context=context).data,
+                "remnants": SlabSerializer(remnants, many=True, context=context).data,
+            },
+            status=status.HTTP_201_CREATED if remnants else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="scan")
+    def scan(self, request):
+        """
+        POST /api/slabs/scan/
+        {"operation": "move|use|scrap|count", "barcodes": ["PLK-1", ...], "location": "A-3"}
+        Okutulan barkodlar tek sorguyla bulunur, değişiklik toplu yazılır;
+        her barkod için sonuç döner. Sayımda (count) hiçbir şey yazılmaz.
+        """
+        serializer = SlabScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        with transaction.atomic():
+            result = scan_slabs(data["barcodes"], operation=data["operation"], location=data["location"])
+        return Response(result)
+
+    @action(detail=False, methods=["get"], url_path="remnant-stock")
+    def remnant_stock(self, request):
+        """
+        GET /api/slabs/remnant-stock/?product=1
+        Parça stok raporu: ürün / kalınlık bazında adet, m² ve alan aralıkları.
+        """
+        product = request.query_params.get("product")
+        if product and not product.isdigit():
+            return Response({"product": ["Geçerli bir ürün id'si olmalıdır."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(remnant_stock_summary(product=product or None))
+
+
+class StockSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET /api/stock-summary/?product=1&status=AVAILABLE,PART_STOCK&thickness=2
+    Ürün / kalınlık / durum bazında plaka adedi ve m² (StockSummary tablosundan).
+    """
+
+    serializer_class = StockSummarySerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    read_roles = {"ADMIN", "SALES", "PRODUCTION"}
+    write_roles = {"ADMIN"}
+
+    def get_queryset(self):
+        qs = StockSummary.objects.select_related("product").order_by("product__name", "thickness", "status")
+        params = self.request.query_params
+        product = params.get("product")
+        if product:
+            if not product.isdigit():
+                raise ValidationError({"product": ["Geçerli bir ürün id'si olmalıdır."]})
+            qs = qs.filter(product_id=product)
+        statuses = [s for s in params.get("status", "").split(",") if s]
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+        thickness = params.get("thickness")
+        if thickness:
+            try:
+                qs = qs.filter(thickness=Decimal(thickness))
+            except InvalidOperation:
+                raise ValidationError({"thickness": ["Geçerli bir sayı olmalıdır."]})
+        return qs
@@ -0,0 +1,8 @@
+from django.core.management import call_command
+
+from apps.core.jobs import register
+
+
+@register("inventory.release_expired_reservations")
+def release_expired_reservations():
+    call_command("release_expired_reservations")
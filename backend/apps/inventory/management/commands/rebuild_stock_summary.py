@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services import rebuild_stock_summary
+
+
+class Command(BaseCommand):
+    help = "Stok özeti tablosunu plakalardan tek gruplu sorguyla yeniden kurar."
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_stock_summary()
+        self.stdout.write(self.style.SUCCESS(f"{count} stok özeti satırı oluşturuldu."))
@@ -1,39 +1,29 @@
+import time
+
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 
-from apps.inventory.models import StockReservation
-from apps.crm.models import OfferAuditLog
+from apps.inventory.services import RELEASE_BATCH_SIZE, release_expired_reservations
 
 
 class Command(BaseCommand):
-    help = "Süresi dolan soft rezervasyonları serbest bırakır."
-
-    def handle(self, *args, **kwargs):
-        now = timezone.now()
-        expired = StockReservation.objects.filter(status="SOFT_RESERVED", expires_at__lt=now)
-        count = expired.count()
-
-        for res in expired:
-            res.status = "RELEASED"
-            res.released_at = now
-            res.release_reason = "Süre doldu"
-            res.save(update_fields=["status", "released_at", "release_reason"])
-
-            if res.slab and res.slab.soft_reserved_for_id == res.contract_id:
-                slab = res.slab
-                slab.soft_reserved_for = None
-                slab.soft_reserved_until = None
-                slab.save(update_fields=["soft_reserved_for", "soft_reserved_until"])
-
-            proposal = getattr(res.contract, "proposal", None)
-            if proposal:
-                OfferAuditLog.objects.get_or_create(
-                    proposal=proposal,
-                    action=f"RESERVATION_RELEASED_{res.id}",
-                    defaults={
-                        "message": "Soft rezervasyon süresi doldu ve serbest bırakıldı.",
-                        "metadata": {"reservation_id": res.id},
-                    },
-                )
-
-        self.stdout.write(self.style.SUCCESS(f"{count} rezervasyon serbest bırakıldı."))
+    help = "Süresi dolan soft rezervasyonları partiler halinde, toplu UPDATE'lerle serbest bırakır."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RELEASE_BATCH_SIZE,
+            help="Bir transaction'da işlenecek en fazla rezervasyon",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        released, slabs, batches = release_expired_reservations(batch_size=max(1, options["batch_size"]))
+        elapsed = time.monotonic() - started
+        rate = released / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{released} rezervasyon serbest bırakıldı ({slabs} plaka, {batches} parti, "
+                f"{elapsed:.2f} sn, {rate:.0f} rezervasyon/sn)."
+            )
+        )
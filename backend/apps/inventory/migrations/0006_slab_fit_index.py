@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_slab_soft_reserve_and_reservations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slab',
+            index=models.Index(fields=['product', 'status', 'thickness', 'width', 'length'], name='inv_slab_fit_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_slab_fit_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slab',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Parça stok ise kesimden arta kaldığı ana plaka', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='remnants', to='inventory.slab', verbose_name='Kesildiği Plaka'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:34
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_area_and_summary(apps, schema_editor):
+    Slab = apps.get_model("inventory", "Slab")
+    StockSummary = apps.get_model("inventory", "StockSummary")
+
+    batch = []
+    for slab in Slab.objects.only("id", "width", "length").iterator(chunk_size=2000):
+        slab.area_m2 = (slab.width * slab.length / Decimal("10000")).quantize(Decimal("0.0001"))
+        batch.append(slab)
+        if len(batch) == 2000:
+            Slab.objects.bulk_update(batch, ["area_m2"])
+            batch = []
+    Slab.objects.bulk_update(batch, ["area_m2"])
+
+    StockSummary.objects.bulk_create(
+        StockSummary(
+            product_id=row["product_id"],
+            thickness=row["thickness"],
+            status=row["status"],
+            slab_count=row["slab_count"],
+            area_m2=row["total_area"] or 0,
+        )
+        for row in Slab.objects.values("product_id", "thickness", "status")
+        .annotate(slab_count=Count("id"), total_area=Sum("area_m2"))
+        .order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_slab_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slab',
+            name='area_m2',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19, verbose_name='Alan (m²)'),
+        ),
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thickness', models.DecimalField(decimal_places=2, max_digits=5, verbose_name='Kalınlık (mm)')),
+                ('status', models.CharField(choices=[('AVAILABLE', 'Stokta'), ('RESERVED', 'Rezerve (Projeye Atandı)'), ('USED', 'Kesildi/Kullanıldı'), ('SOLD', 'Doğrudan Satıldı'), ('PART_STOCK', 'Parça Stok'), ('SCRAP', 'Çöp/Fire')], max_length=20)),
+                ('slab_count', models.PositiveIntegerField(default=0, verbose_name='Plaka Adedi')),
+                ('area_m2', models.DecimalField(decimal_places=4, default=0, max_digits=19, verbose_name='Toplam m²')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Tarihi')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_summaries', to='inventory.productdefinition')),
+            ],
+            options={
+                'verbose_name': 'Stok Özeti',
+                'verbose_name_plural': 'Stok Özetleri',
+                'constraints': [models.UniqueConstraint(fields=('product', 'thickness', 'status'), name='inv_stocksummary_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_area_and_summary, reverse_code=migrations.RunPython.noop),
+    ]
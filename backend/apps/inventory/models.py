@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 from apps.core.models import TimeStampedModel
 
@@ -31,6 +33,7 @@ class Slab(TimeStampedModel):
     width = models.DecimalField(max_digits=10, decimal_places=2)
     length = models.DecimalField(max_digits=10, decimal_places=2)
     thickness = models.DecimalField(max_digits=5, decimal_places=2, verbose_name="Kalınlık (mm)")
+    area_m2 = models.DecimalField(max_digits=19, decimal_places=4, default=0, editable=False, verbose_name="Alan (m²)")
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="AVAILABLE")
 
@@ -54,12 +57,61 @@ class Slab(TimeStampedModel):
     soft_reserved_until = models.DateTimeField(null=True, blank=True)
     warehouse_location = models.CharField(max_length=50, blank=True, help_text="Depo Raf/Bölüm Kodu")
 
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="remnants",
+        verbose_name="Kesildiği Plaka",
+        help_text="Parça stok ise kesimden arta kaldığı ana plaka",
+    )
+
     photo = models.ImageField(upload_to="slabs/", blank=True, null=True, verbose_name="Plaka Fotoğrafı")
     photo_url = models.URLField(blank=True, verbose_name="Plaka Fotoğraf URL")
 
-    @property
-    def area_m2(self):
-        return (self.width * self.length) / 10000
+    class Meta:
+        indexes = [
+            # Ölçüye uyan plaka araması (apps.inventory.services.find_fitting_slabs)
+            models.Index(
+                fields=["product", "status", "thickness", "width", "length"],
+                name="inv_slab_fit_idx",
+            ),
+        ]
+
+    def compute_area_m2(self):
+        return (Decimal(self.width or 0) * Decimal(self.length or 0) / Decimal("10000")).quantize(Decimal("0.0001"))
+
+    def save(self, *args, **kwargs):
+        self.area_m2 = self.compute_area_m2()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"width", "length"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "area_m2"}
+        super().save(*args, **kwargs)
+
+
+class StockSummary(models.Model):
+    """
+    Ürün / kalınlık / durum bazında plaka adedi ve m² toplamı.
+
+    Slab kaydedildikçe ilgili satırlar sinyallerle yeniden hesaplanır
+    (apps.inventory.signals); tamamı tek bir gruplu sorguyla
+    ``rebuild_stock_summary`` ile yeniden kurulabilir.
+    """
+
+    product = models.ForeignKey(ProductDefinition, on_delete=models.CASCADE, related_name="stock_summaries")
+    thickness = models.DecimalField(max_digits=5, decimal_places=2, verbose_name="Kalınlık (mm)")
+    status = models.CharField(max_length=20, choices=Slab.STATUS_CHOICES)
+    slab_count = models.PositiveIntegerField(default=0, verbose_name="Plaka Adedi")
+    area_m2 = models.DecimalField(max_digits=19, decimal_places=4, default=0, verbose_name="Toplam m²")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Tarihi")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "thickness", "status"], name="inv_stocksummary_unique"),
+        ]
+        verbose_name = "Stok Özeti"
+        verbose_name_plural = "Stok Özetleri"
 
 
 class StockReservation(TimeStampedModel):
@@ -1,7 +1,13 @@
+from decimal import Decimal
+
 from django.core.files.storage import default_storage
 from rest_framework import serializers
 
-from apps.inventory.models import ProductDefinition, Slab
+from apps.core.images import derivative_url
+from apps.core.uploads import discard_upload
+from apps.inventory.models import ProductDefinition, Slab, StockSummary
+from apps.inventory.services import SCAN_OPERATIONS
+from apps.production.models import WorkOrder
 
 
 class ProductDefinitionSerializer(serializers.ModelSerializer):
@@ -13,8 +19,9 @@ class ProductDefinitionSerializer(serializers.ModelSerializer):
 class SlabSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
     reserved_for_project = serializers.CharField(source="reserved_for.project_name", read_only=True)
-    area_m2 = serializers.DecimalField(max_digits=19, decimal_places=4, read_only=True)
     photo_url = serializers.SerializerMethodField(read_only=True)
+    thumbnail_url = serializers.SerializerMethodField(read_only=True)
+    medium_url = serializers.SerializerMethodField(read_only=True)
 
     # Allow setting ImageField using an already-uploaded path (from /api/upload/)
     photo_path = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -29,6 +36,12 @@ class SlabSerializer(serializers.ModelSerializer):
             return None
         return request.build_absolute_uri(url) if request else url
 
+    def get_thumbnail_url(self, obj):
+        return derivative_url(obj.photo, "thumb", self.context.get("request"))
+
+    def get_medium_url(self, obj):
+        return derivative_url(obj.photo, "medium", self.context.get("request"))
+
     def validate_photo_path(self, value):
         if value in (None, ""):
             return value
@@ -61,8 +74,7 @@ class SlabSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         if photo_path is not None:
             if photo_path == "":
-                if instance.photo:
-                    instance.photo.delete(save=False)
+                discard_upload(instance.photo)
                 instance.photo = None
                 instance.save(update_fields=["photo"])
             else:
@@ -73,3 +85,77 @@ class SlabSerializer(serializers.ModelSerializer):
     class Meta:
         model = Slab
         fields = "__all__"
+
+
+class SlabFitQuerySerializer(serializers.Serializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=ProductDefinition.objects.all())
+    thickness = serializers.DecimalField(max_digits=5, decimal_places=2)
+    width = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    length = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    rotate = serializers.BooleanField(required=False, default=True)
+    contract = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+
+class SlabFitSerializer(SlabSerializer):
+    leftover_m2 = serializers.SerializerMethodField()
+
+    def get_leftover_m2(self, obj):
+        return str((obj.leftover_cm2 / 10000).quantize(Decimal("0.0001")))
+
+
+class RemnantSerializer(serializers.Serializer):
+    width = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    length = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    warehouse_location = serializers.CharField(max_length=50, required=False, allow_blank=True)
+
+
+class CutPieceSerializer(serializers.Serializer):
+    width = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0.01"))
+    length = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0.01"))
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class SlabConsumeSerializer(serializers.Serializer):
+    work_order = serializers.PrimaryKeyRelatedField(queryset=WorkOrder.objects.all(), required=False, allow_null=True)
+    remnants = RemnantSerializer(many=True, required=False)
+    pieces = CutPieceSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if "remnants" in attrs and "pieces" in attrs:
+            raise serializers.ValidationError("remnants veya pieces alanlarından yalnızca biri gönderilmelidir.")
+        return attrs
+
+
+class StockSummarySerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True)
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+
+    class Meta:
+        model = StockSummary
+        fields = [
+            "id",
+            "product",
+            "product_name",
+            "thickness",
+            "status",
+            "status_display",
+            "slab_count",
+            "area_m2",
+            "updated_at",
+        ]
+
+
+class SlabScanSerializer(serializers.Serializer):
+    operation = serializers.ChoiceField(choices=SCAN_OPERATIONS)
+    barcodes = serializers.ListField(
+        child=serializers.CharField(max_length=50, allow_blank=True),
+        allow_empty=False,
+        max_length=2000,
+    )
+    location = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+
+    def validate(self, attrs):
+        if attrs["operation"] == "move" and not attrs["location"]:
+            raise serializers.ValidationError({"location": "Taşıma için raf/bölüm kodu zorunludur."})
+        return attrs
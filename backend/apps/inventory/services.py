@@ -0,0 +1,430 @@
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.locks import lock_key
+from apps.crm.models import OfferAuditLog
+from apps.inventory.models import Slab, StockReservation, StockSummary
+from apps.production.nesting import plan_cuts
+
+FIT_STATUSES = ("AVAILABLE", "PART_STOCK")
+CONSUMABLE_STATUSES = ("AVAILABLE", "RESERVED", "PART_STOCK")
+
+# Bu ölçünün altında kalan artıklar parça stoğa alınmaz (cm).
+MIN_REMNANT_SIDE_CM = Decimal("20")
+IN_STOCK_STATUSES = ("AVAILABLE", "RESERVED", "PART_STOCK")
+SCAN_OPERATIONS = ("move", "use", "scrap", "count")
+
+RELEASE_BATCH_SIZE = 1000
+EXPIRED_RELEASE_REASON = "Süre doldu"
+
+# Parça stok raporundaki alan aralıkları (m²): küçük < 0.5 <= orta < 1.5 <= büyük
+REMNANT_AREA_BANDS = (Decimal("0.5"), Decimal("1.5"))
+
+
+def available_slabs(*, product, thickness=None, contract=None):
+    """Kesime açık plakalar: AVAILABLE / PART_STOCK ve aktif soft rezervi olmayanlar."""
+    free = Q(soft_reserved_for__isnull=True) | Q(soft_reserved_until__lt=timezone.now())
+    if contract is not None:
+        free |= Q(soft_reserved_for=contract)
+    slabs = Slab.objects.filter(free, product=product, status__in=FIT_STATUSES)
+    if thickness is not None:
+        slabs = slabs.filter(thickness=thickness)
+    return slabs
+
+
+def find_fitting_slabs(*, product, thickness, width, length, allow_rotation=True, contract=None, limit=20):
+    """
+    Parçanın (width x length, cm) sığdığı kullanılabilir plakalar, en az artan alana göre.
+
+    Sadece AVAILABLE / PART_STOCK ve aktif soft rezervi olmayan plakalar döner;
+    ``contract`` verilirse o sözleşmeye soft rezerve edilmiş plakalar da dahil edilir.
+    Sorgu (product, status, thickness, width, length) indeksini kullanır.
+    """
+    fits = Q(width__gte=width, length__gte=length)
+    if allow_rotation:
+        fits |= Q(width__gte=length, length__gte=width)
+
+    piece_area = Decimal(width) * Decimal(length)
+    return (
+        available_slabs(product=product, thickness=thickness, contract=contract)
+        .filter(fits)
+        .select_related("product")
+        .annotate(
+            leftover_cm2=ExpressionWrapper(
+                F("width") * F("length") - Value(piece_area),
+                output_field=DecimalField(max_digits=21, decimal_places=4),
+            )
+        )
+        .order_by("leftover_cm2", "id")[:limit]
+    )
+
+
+def _fits_in(width, length, slab):
+    return (width <= slab.width and length <= slab.length) or (length <= slab.width and width <= slab.length)
+
+
+def _offcut_from_pieces(slab, pieces):
+    """Kesilen parçalar plakaya yerleştirilir; en büyük boş dikdörtgen artık olarak döner."""
+    plan = plan_cuts(
+        [{"key": n, **piece} for n, piece in enumerate(pieces)],
+        [{"key": slab.id, "width": slab.width, "length": slab.length}],
+        time_limit=0,
+    )
+    if plan["unplaced"]:
+        raise ValueError("Kesilen parçalar plakaya sığmıyor.")
+    if not plan["layouts"]:
+        return []
+    offcut = plan["layouts"][0]["largest_offcut"]
+    return [{"width": offcut["width"], "length": offcut["length"]}] if offcut else []
+
+
+@transaction.atomic
+def consume_slab(slab, *, remnants=None, pieces=None, work_order=None):
+    """
+    Plakayı kesildi (USED) olarak işaretler ve artıkları parça stok olarak kaydeder.
+
+    ``remnants``: ölçülen artıklar ``[{"width", "length", "warehouse_location"?}]`` (cm).
+    Verilmezse ``pieces`` (kesilen parçalar) plakaya yerleştirilip en büyük artık
+    hesaplanır. Kenarı ``MIN_REMNANT_SIDE_CM`` altındaki artıklar fire sayılır.
+    Yeni parça stoklar ``parent`` ile ana plakaya bağlanır ve listesi döner.
+    """
+    slab = Slab.objects.select_for_update().get(pk=slab.pk)
+    if slab.status not in CONSUMABLE_STATUSES:
+        raise ValueError(f"{slab.get_status_display()} durumundaki plaka kesilemez.")
+    if work_order is not None and work_order.slab_id not in (None, slab.id):
+        raise ValueError("İş emri başka bir plakaya bağlı.")
+
+    if remnants is None:
+        remnants = _offcut_from_pieces(slab, pieces or [])
+    for remnant in remnants:
+        if not _fits_in(remnant["width"], remnant["length"], slab):
+            raise ValueError("Artık ölçüsü plakadan büyük olamaz.")
+    if sum(r["width"] * r["length"] for r in remnants) > slab.width * slab.length:
+        raise ValueError("Artıkların toplam alanı plakayı aşıyor.")
+
+    usable = [r for r in remnants if min(r["width"], r["length"]) >= MIN_REMNANT_SIDE_CM]
+    start = slab.remnants.count()
+    created = Slab.objects.bulk_create(
+        [
+            Slab(
+                product_id=slab.product_id,
+                parent=slab,
+                barcode=f"{slab.barcode[:44]}-P{start + n}",
+                width=r["width"],
+                length=r["length"],
+                area_m2=Slab(width=r["width"], length=r["length"]).compute_area_m2(),
+                thickness=slab.thickness,
+                status="PART_STOCK",
+                warehouse_location=r.get("warehouse_location") or slab.warehouse_location,
+            )
+            for n, r in enumerate(usable, start=1)
+        ]
+    )
+    if created:
+        # bulk_create bypasses the post_save signal that maintains the rollup.
+        refresh_stock_summary([stock_key(created[0])])
+
+    slab.status = "USED"
+    slab.fire_disposition = "PART_STOCK" if created else "SCRAP"
+    slab.soft_reserved_for = None
+    slab.soft_reserved_until = None
+    slab.save(update_fields=["status", "fire_disposition", "soft_reserved_for", "soft_reserved_until", "updated_at"])
+    if work_order is not None and work_order.slab_id is None:
+        work_order.slab = slab
+        work_order.save(update_fields=["slab", "updated_at"])
+    return created
+
+
+def remnant_stock_summary(*, product=None):
+    """Parça stok özeti: ürün ve kalınlık bazında adet, toplam m² ve alan aralıkları."""
+    small, large = REMNANT_AREA_BANDS
+
+    def band(condition):
+        return Sum(Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField()))
+
+    qs = Slab.objects.filter(status="PART_STOCK")
+    if product is not None:
+        qs = qs.filter(product=product)
+    return list(
+        qs.values("product_id", "product__name", "thickness")
+        .annotate(
+            small=band(Q(area_m2__lt=small)),
+            medium=band(Q(area_m2__gte=small, area_m2__lt=large)),
+            large=band(Q(area_m2__gte=large)),
+        )
+        # count / area_m2 last: "area_m2" must still name the column in the bands above
+        .annotate(count=Count("id"), area_m2=Sum("area_m2"))
+        .order_by("product__name", "thickness")
+    )
+
+
+def stock_key(slab):
+    """StockSummary satırının anahtarı: (product_id, thickness, status)."""
+    return (slab.product_id, Decimal(str(slab.thickness)).quantize(Decimal("0.01")), slab.status)
+
+
+def refresh_stock_summary(keys):
+    """Verilen (product_id, thickness, status) gruplarını commit sonrasında yeniden hesaplatır.
+
+    Counting inside the writer's transaction would miss concurrent writers'
+    uncommitted rows and let a stale count overwrite a newer one. After
+    commit every write is visible, and recounts are serialised by a lock, so
+    the last recount of a group always sees all committed rows.
+    """
+    keys = {key for key in keys if key[0] is not None}
+    if keys:
+        transaction.on_commit(lambda: _recount_stock_summary(keys))
+
+
+@transaction.atomic
+def _recount_stock_summary(keys):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_key("inventory.stock_summary")])
+    match = reduce(or_, (Q(product_id=p, thickness=t, status=st) for p, t, st in keys))
+    rows = {
+        (row["product_id"], row["thickness"].quantize(Decimal("0.01")), row["status"]): row
+        for row in Slab.objects.filter(match)
+        .values("product_id", "thickness", "status")
+        .annotate(slab_count=Count("id"), total_area=Sum("area_m2"))
+        .order_by()
+    }
+    if rows:
+        StockSummary.objects.bulk_create(
+            [
+                StockSummary(
+                    product_id=p,
+                    thickness=t,
+                    status=st,
+                    slab_count=row["slab_count"],
+                    area_m2=row["total_area"] or 0,
+                )
+                for (p, t, st), row in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["product", "thickness", "status"],
+            update_fields=["slab_count", "area_m2", "updated_at"],
+        )
+    empty = keys - rows.keys()
+    if empty:
+        StockSummary.objects.filter(
+            reduce(or_, (Q(product_id=p, thickness=t, status=st) for p, t, st in empty))
+        ).delete()
+
+
+@transaction.atomic
+def rebuild_stock_summary():
+    """Özet tablosunu baştan kurar: tek gruplu sorgu + toplu yazma. Satır sayısını döner."""
+    rows = [
+        StockSummary(
+            product_id=row["product_id"],
+            thickness=row["thickness"],
+            status=row["status"],
+            slab_count=row["slab_count"],
+            area_m2=row["total_area"] or 0,
+        )
+        for row in Slab.objects.values("product_id", "thickness", "status")
+        .annotate(slab_count=Count("id"), total_area=Sum("area_m2"))
+        .order_by()
+    ]
+    StockSummary.objects.all().delete()
+    StockSummary.objects.bulk_create(rows)
+    return len(rows)
+
+
+def release_expired_reservations(*, now=None, batch_size=RELEASE_BATCH_SIZE):
+    """
+    Süresi dolan soft rezervasyonları küme işlemleriyle serbest bırakır.
+
+    Her parti kendi transaction'ında: rezervasyonlar tek UPDATE ile RELEASED olur,
+    aynı sözleşmeye soft rezerve plakalar alt sorgulu tek UPDATE ile boşaltılır ve
+    denetim kayıtları tek ``bulk_create`` ile yazılır. Başka bir çalıştırmanın
+    kilitlediği satırlar atlanır. ``(reservations, slabs, batches)`` döner.
+    """
+    now = now or timezone.now()
+    released = slabs_cleared = batches = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockReservation.objects.filter(status="SOFT_RESERVED", expires_at__lt=now)
+                .select_for_update(skip_locked=True, of=("self",))
+                .order_by("id")
+                .values_list("id", "contract__proposal_id")[:batch_size]
+            )
+            if not rows:
+                break
+            ids = [reservation_id for reservation_id, _ in rows]
+
+            StockReservation.objects.filter(id__in=ids).update(
+                status="RELEASED",
+                released_at=now,
+                release_reason=EXPIRED_RELEASE_REASON,
+                updated_at=now,
+            )
+            slabs_cleared += Slab.objects.filter(
+                Exists(
+                    StockReservation.objects.filter(
+                        id__in=ids,
+                        slab=OuterRef("pk"),
+                        contract=OuterRef("soft_reserved_for"),
+                    )
+                )
+            ).update(soft_reserved_for=None, soft_reserved_until=None, updated_at=now)
+            OfferAuditLog.objects.bulk_create(
+                [
+                    OfferAuditLog(
+                        proposal_id=proposal_id,
+                        action=f"RESERVATION_RELEASED_{reservation_id}",
+                        message="Soft rezervasyon süresi doldu ve serbest bırakıldı.",
+                        metadata={"reservation_id": reservation_id},
+                    )
+                    for reservation_id, proposal_id in rows
+                    if proposal_id
+                ],
+                ignore_conflicts=True,
+            )
+        released += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+    return released, slabs_cleared, batches
+
+
+def _contract_slabs(contract, reservations):
+    """Rezervasyonları verilen sözleşmenin plakaları (EXISTS alt sorgusu)."""
+    return Slab.objects.filter(Exists(reservations.filter(contract=contract, slab=OuterRef("pk"))))
+
+
+def _stock_keys(slabs):
+    return {stock_key(Slab(**row)) for row in slabs.values("product_id", "thickness", "status").distinct()}
+
+
+def hard_reserve_contract_slabs(contract, *, now=None):
+    """
+    Sözleşme imzalanınca soft rezervasyonları HARD_RESERVED, plakalarını RESERVED yapar.
+
+    Plaka ve rezervasyon sayısından bağımsız olarak iki UPDATE ve stok özeti
+    için birkaç sorgu çalışır.
+    """
+    now = now or timezone.now()
+    soft = StockReservation.objects.filter(status="SOFT_RESERVED")
+    slabs = _contract_slabs(contract, soft)
+    keys = _stock_keys(slabs)
+    slabs.update(
+        status="RESERVED",
+        reserved_for=contract,
+        reserved_at=Coalesce(F("reserved_at"), Value(now)),
+        soft_reserved_for=None,
+        soft_reserved_until=None,
+        updated_at=now,
+    )
+    count = soft.filter(contract=contract).update(status="HARD_RESERVED", updated_at=now)
+    if keys:
+        refresh_stock_summary(keys | {(product, thickness, "RESERVED") for product, thickness, _ in keys})
+    return count
+
+
+def release_contract_reservations(contract, *, reason, now=None):
+    """Sözleşme iptalinde rezervasyonları RELEASED yapar, plakalarını boşa çıkarır."""
+    now = now or timezone.now()
+    open_reservations = StockReservation.objects.exclude(status="RELEASED")
+    slabs = _contract_slabs(contract, open_reservations)
+    slabs.filter(soft_reserved_for=contract).update(soft_reserved_for=None, soft_reserved_until=None, updated_at=now)
+    reserved = slabs.filter(reserved_for=contract, status="RESERVED")
+    keys = _stock_keys(reserved)
+    reserved.update(status="AVAILABLE", reserved_for=None, reserved_at=None, updated_at=now)
+    count = open_reservations.filter(contract=contract).update(
+        status="RELEASED", released_at=now, release_reason=reason, updated_at=now
+    )
+    if keys:
+        refresh_stock_summary(keys | {(product, thickness, "AVAILABLE") for product, thickness, _ in keys})
+    return count
+
+
+def scan_slabs(barcodes, *, operation, location=""):
+    """
+    Depo okutma partisi: barkodlar tek ``barcode__in`` sorgusuyla bulunur, değişiklik toplu yazılır.
+
+    ``move``: raf/bölümü ``location`` yapar; ``use`` / ``scrap``: stoktaki plakaları USED / SCRAP
+    yapar; ``count``: yazmadan sayım doğrular (``location`` verilirse orada olup okutulmayanlar
+    ``missing`` içinde döner). Her barkod için ``{"barcode", "result", "slab"?, "message"?}`` döner.
+    """
+    now = timezone.now()
+    ordered = list(dict.fromkeys(code.strip() for code in barcodes if code and code.strip()))
+    found = Slab.objects.filter(barcode__in=ordered).only(
+        "id", "barcode", "status", "product_id", "thickness", "warehouse_location"
+    )
+    if operation != "count":
+        found = found.select_for_update()
+    slabs = {slab.barcode: slab for slab in found}
+
+    results, changed = [], []
+    for code in ordered:
+        slab = slabs.get(code)
+        if slab is None:
+            results.append({"barcode": code, "result": "not_found"})
+            continue
+        row = {"barcode": code, "slab": slab.id, "status": slab.status, "location": slab.warehouse_location}
+        if operation in ("use", "scrap") and slab.status not in IN_STOCK_STATUSES:
+            row.update(result="rejected", message=f"{slab.get_status_display()} durumundaki plaka işlenemez.")
+        elif operation == "count":
+            if slab.status not in IN_STOCK_STATUSES:
+                row.update(result="not_in_stock")
+            elif location and slab.warehouse_location != location:
+                row.update(result="misplaced")
+            else:
+                row.update(result="ok")
+        elif operation == "move" and slab.warehouse_location == location:
+            row.update(result="unchanged")
+        else:
+            row.update(result="ok")
+            changed.append(slab)
+        results.append(row)
+
+    ids = [slab.id for slab in changed]
+    if ids and operation == "move":
+        Slab.objects.filter(id__in=ids).update(warehouse_location=location, updated_at=now)
+    elif ids:
+        new_status = "USED" if operation == "use" else "SCRAP"
+        updates = {"status": new_status, "soft_reserved_for": None, "soft_reserved_until": None, "updated_at": now}
+        if operation == "scrap":
+            updates["fire_disposition"] = "SCRAP"
+        Slab.objects.filter(id__in=ids).update(**updates)
+        keys = {stock_key(slab) for slab in changed}
+        refresh_stock_summary(keys | {(product, thickness, new_status) for product, thickness, _ in keys})
+    for row in results:
+        if row["result"] == "ok" and operation == "move":
+            row["location"] = location
+        elif row["result"] == "ok" and operation in ("use", "scrap"):
+            row["status"] = "USED" if operation == "use" else "SCRAP"
+
+    summary = {}
+    for row in results:
+        summary[row["result"]] = summary.get(row["result"], 0) + 1
+    response = {"operation": operation, "summary": summary, "results": results}
+    if operation == "count" and location:
+        expected = Slab.objects.filter(warehouse_location=location, status__in=IN_STOCK_STATUSES)
+        scanned = set(ordered)
+        response["missing"] = sorted(
+            code for code in expected.values_list("barcode", flat=True) if code not in scanned
+        )
+    return response
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.core.images import watch_image_fields
+from apps.inventory.models import Slab
+from apps.inventory.services import refresh_stock_summary, stock_key
+
+# Bu alanlar değişmeden yapılan kayıtlar (ör. sadece soft rezerv) özeti etkilemez.
+SUMMARY_FIELDS = {"product", "product_id", "thickness", "status", "width", "length", "area_m2"}
+
+
+@receiver(post_init, sender=Slab)
+def _remember_stock_key(sender, instance, **kwargs):
+    # Read __dict__ so deferred fields (.only()/.defer()) are not fetched one by one.
+    loaded = instance.__dict__
+    if instance.pk and all(loaded.get(field) is not None for field in ("product_id", "thickness", "status")):
+        instance._stock_key = stock_key(instance)
+    else:
+        instance._stock_key = None
+
+
+@receiver(post_save, sender=Slab)
+def _update_stock_summary(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not SUMMARY_FIELDS & set(update_fields):
+        return
+    keys = {stock_key(instance)}
+    if instance._stock_key:
+        keys.add(instance._stock_key)
+    refresh_stock_summary(keys)
+    instance._stock_key = stock_key(instance)
+
+
+@receiver(post_delete, sender=Slab)
+def _drop_from_stock_summary(sender, instance, **kwargs):
+    refresh_stock_summary({stock_key(instance)})
+
+
+watch_image_fields(Slab, "photo")
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from .models import Contract, ContractSequence
+from .models import Contract
 
 admin.site.register(Contract)
-admin.site.register(ContractSequence)
@@ -1,9 +1,22 @@
-from rest_framework import viewsets
+from django.utils.dateparse import parse_date
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from apps.production.models import Contract
 from apps.production.serializers import (
     ContractSerializer,
+    CuttingPlanQuerySerializer,
 )
+from apps.production.services import (
+    CONTRACT_PDF_TEMPLATE,
+    contract_pdf_data,
+    contract_pdf_kind,
+    cutting_plan,
+    material_demand,
+    product_sales_summary,
+)
+from apps.core.pdf import pdf_response
 from apps.core.permissions import RolePermission, is_admin
 
 
@@ -20,3 +33,62 @@ class ContractViewSet(viewsets.ModelViewSet):
         if not is_admin(user) and getattr(user, "role", None) == "SALES":
             qs = qs.filter(proposal__customer__owner=user)
         return qs
+
+    @action(detail=False, methods=["get"], url_path="product-sales")
+    def product_sales(self, request):
+        """
+        GET /api/contracts/product-sales/?from=YYYY-MM-DD&to=YYYY-MM-DD&status=IMZALANDI
+        Ürün bazında sözleşmeye bağlanan m², adet ve tutar (start_date dönemine göre).
+        """
+        params = {}
+        for key, param in (("date_from", "from"), ("date_to", "to")):
+            raw = request.query_params.get(param)
+            if raw:
+                params[key] = parse_date(raw)
+                if params[key] is None:
+                    return Response({param: ["YYYY-AA-GG formatında olmalıdır."]}, status=status.HTTP_400_BAD_REQUEST)
+        statuses = [s for s in request.query_params.get("status", "").split(",") if s]
+        rows = product_sales_summary(statuses=statuses or None, contracts=self.get_queryset(), **params)
+        if getattr(request.user, "role", None) == "PRODUCTION":
+            for row in rows:
+                row.pop("revenue", None)
+        return Response(rows)
+
+    @action(detail=False, methods=["get"], url_path="material-demand")
+    def material_demand_report(self, request):
+        """
+        GET /api/contracts/material-demand/
+        Açık sözleşmelerde ürün ve taş cinsine göre gereken m² (fire dahil).
+        """
+        return Response(material_demand(contracts=self.get_queryset()))
+
+    @action(detail=True, methods=["get"], url_path="pdf")
+    def pdf(self, request, pk=None):
+        """
+        GET /api/contracts/{id}/pdf/
+        Sözleşme PDF'i kalem snapshot'ından üretilir; güncel dosya yoksa 202 döner.
+        PRODUCTION rolü fiyatsız nüshayı alır.
+        """
+        contract = self.get_object()
+        prices = getattr(request.user, "role", None) != "PRODUCTION"
+        return pdf_response(
+            request,
+            kind=contract_pdf_kind(prices),
+            object_id=contract.id,
+            template_name=CONTRACT_PDF_TEMPLATE,
+            data=contract_pdf_data(contract, prices=prices),
+            job_name="production.render_contract_pdf",
+            job_payload={"contract_id": contract.id, "prices": prices},
+            filename=f"sozlesme-{contract.contract_no or contract.id}.pdf",
+        )
+
+    @action(detail=True, methods=["get"], url_path="cutting-plan")
+    def cutting_plan_report(self, request, pk=None):
+        """
+        GET /api/contracts/{id}/cutting-plan/?kerf=4&time_limit=1&method=guillotine
+        Sözleşme kalemlerinin stoktaki plaka / parça stoklara kesim yerleşimi.
+        """
+        contract = self.get_object()
+        params = CuttingPlanQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(cutting_plan(contract.items.order_by("position"), contract=contract, **params.plan_options()))
@@ -0,0 +1,7 @@
+from apps.core.jobs import register
+from apps.production.services import render_contract_pdf
+
+
+@register("production.render_contract_pdf")
+def render_contract_pdf_job(contract_id, force=False, prices=True):
+    render_contract_pdf(contract_id, force=force, prices=prices)
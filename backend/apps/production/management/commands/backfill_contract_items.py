@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.production.services import backfill_contract_items
+
+
+class Command(BaseCommand):
+    help = "Sözleşme items_snapshot verisinden ContractItem satırlarını toplu olarak oluşturur."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--rebuild", action="store_true", help="Satırı olan sözleşmeleri de yeniden yaz.")
+
+    def handle(self, *args, **options):
+        contracts, items = backfill_contract_items(
+            batch_size=max(1, options["batch_size"]),
+            rebuild=options["rebuild"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{contracts} sözleşme için {items} kalem yazıldı."))
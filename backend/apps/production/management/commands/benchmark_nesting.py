@@ -0,0 +1,59 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.production.nesting import DEFAULT_KERF_MM, DEFAULT_TIME_LIMIT, METHODS, plan_cuts
+
+BENCHMARK_FILE = Path(__file__).resolve().parents[2] / "benchmarks" / "nesting_jobs.json"
+
+
+def load_jobs(path=BENCHMARK_FILE):
+    """Benchmark işleri; ``quantity`` verilen plaka satırları tekil plakalara açılır."""
+    with open(path, encoding="utf-8") as fh:
+        jobs = json.load(fh)
+    for job in jobs:
+        slabs = []
+        for row in job["slabs"]:
+            count = int(row.get("quantity", 1))
+            for n in range(count):
+                key = f"{row['key']}-{n + 1}" if count > 1 else row["key"]
+                slabs.append({"key": key, "width": row["width"], "length": row["length"]})
+        job["slabs"] = slabs
+    return jobs
+
+
+class Command(BaseCommand):
+    help = "Kesim planı motorunu gerçek iş örnekleriyle ölçer (plaka sayısı, fire %, süre)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=str(BENCHMARK_FILE), help="Benchmark JSON dosyası")
+        parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="İş başına süre (sn)")
+        parser.add_argument("--kerf", type=float, default=DEFAULT_KERF_MM, help="Testere payı (mm)")
+        parser.add_argument("--method", choices=METHODS, help="Sadece bu yerleşim kuralını kullan")
+
+    def handle(self, *args, **options):
+        try:
+            jobs = load_jobs(options["file"])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Benchmark dosyası okunamadı: {exc}")
+        methods = (options["method"],) if options["method"] else METHODS
+
+        for job in jobs:
+            started = time.monotonic()
+            plan = plan_cuts(
+                job["pieces"],
+                job["slabs"],
+                kerf_mm=options["kerf"],
+                time_limit=options["time_limit"],
+                methods=methods,
+            )
+            elapsed = time.monotonic() - started
+            pieces = sum(len(layout["placements"]) for layout in plan["layouts"]) + len(plan["unplaced"])
+            self.stdout.write(
+                f"{job['name']}: {pieces} parça / {len(job['slabs'])} plaka -> "
+                f"{plan['slab_count']} plaka, fire %{plan['waste_percent']}, "
+                f"yerleşmeyen {len(plan['unplaced'])}, {plan['method']}, "
+                f"{plan['attempts']} deneme, {elapsed:.2f} sn"
+            )
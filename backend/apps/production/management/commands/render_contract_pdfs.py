@@ -0,0 +1,79 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.production.models import Contract
+from apps.production.services import render_contract_pdf
+
+
+def _init_pool_process():
+    # Same as run_worker: spawned children need Django set up, forked ones
+    # must not share the parent's database connections.
+    django.setup()
+    connections.close_all()
+
+
+def _render(args):
+    contract_id, force = args
+    try:
+        return render_contract_pdf(contract_id, force=force)
+    except Exception as exc:
+        return f"error: {exc}"
+
+
+def _render_in_pool(args):
+    try:
+        return _render(args)
+    finally:
+        connections.close_all()
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Geçersiz tarih: {value} (YYYY-AA-GG bekleniyor)")
+
+
+class Command(BaseCommand):
+    help = "Bir dönemdeki sözleşmelerin PDF'lerini süreç havuzuyla üretir; değişmeyenler önbellekten atlanır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="Başlangıç tarihi (start_date, dahil)")
+        parser.add_argument("--to", dest="date_to", required=True, help="Bitiş tarihi (start_date, dahil)")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 2,
+            help="Process pool size. 0 renders inline in this process.",
+        )
+        parser.add_argument("--force", action="store_true", help="Önbellekte olsa da yeniden üret.")
+
+    def handle(self, *args, **options):
+        date_from, date_to = _parse_date(options["date_from"]), _parse_date(options["date_to"])
+        contract_ids = list(
+            Contract.objects.filter(start_date__gte=date_from, start_date__lte=date_to)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        work = [(contract_id, options["force"]) for contract_id in contract_ids]
+        processes = max(0, options["processes"])
+
+        if processes and len(work) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_pool_process) as pool:
+                results = list(pool.map(_render_in_pool, work, chunksize=max(1, len(work) // (processes * 4))))
+        else:
+            results = [_render(item) for item in work]
+
+        errors = [(contract_id, result) for (contract_id, _), result in zip(work, results) if result.startswith("error")]
+        for contract_id, result in errors:
+            self.stderr.write(f"Sözleşme #{contract_id}: {result}")
+        counts = Counter("error" if result.startswith("error") else result for result in results)
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        self.stdout.write(self.style.SUCCESS(f"{len(work)} sözleşme işlendi. {summary or 'Sözleşme yok.'}"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:43
+
+from django.db import migrations
+
+
+def copy_contract_sequences(apps, schema_editor):
+    ContractSequence = apps.get_model("production", "ContractSequence")
+    Sequence = apps.get_model("core", "Sequence")
+    for row in ContractSequence.objects.all():
+        Sequence.objects.update_or_create(name=f"contract:{row.year}", defaults={"last_value": row.last_number})
+
+
+def restore_contract_sequences(apps, schema_editor):
+    ContractSequence = apps.get_model("production", "ContractSequence")
+    Sequence = apps.get_model("core", "Sequence")
+    for row in Sequence.objects.filter(name__startswith="contract:"):
+        ContractSequence.objects.update_or_create(
+            year=int(row.name.split(":", 1)[1]), defaults={"last_number": row.last_value}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sequence'),
+        ('production', '0005_remove_contract_contract_pdf_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_contract_sequences, reverse_code=restore_contract_sequences),
+        migrations.DeleteModel(
+            name='ContractSequence',
+        ),
+    ]
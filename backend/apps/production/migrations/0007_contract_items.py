@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_slab_soft_reserve_and_reservations'),
+        ('production', '0006_remove_contractsequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contract',
+            name='start_date',
+            field=models.DateField(db_index=True, default=django.utils.timezone.localdate),
+        ),
+        migrations.CreateModel(
+            name='ContractItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('source_item_id', models.PositiveIntegerField(blank=True, help_text='Teklif kalemi id (snapshot)', null=True)),
+                ('description', models.CharField(blank=True, default='', max_length=200)),
+                ('stone_type', models.CharField(blank=True, default='', max_length=200)),
+                ('total_measure', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('unit', models.CharField(blank=True, default='', max_length=10)),
+                ('width', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('length', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('quantity', models.IntegerField(default=1)),
+                ('area_m2', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('fire_rate', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('labor_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('total_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=19)),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='production.contract')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contract_items', to='inventory.productdefinition')),
+                ('slab', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contract_items', to='inventory.slab')),
+            ],
+            options={
+                'verbose_name': 'Sözleşme Kalemi',
+                'verbose_name_plural': 'Sözleşme Kalemleri',
+                'ordering': ['contract_id', 'position'],
+                'indexes': [models.Index(fields=['product', 'contract'], name='prod_contractitem_product_idx')],
+            },
+        ),
+    ]
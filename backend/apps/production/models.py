@@ -4,10 +4,10 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
-from apps.core.models import TimeStampedModel
+from apps.core.models import TimeStampedModel, TrackedFieldsMixin
 
 
-class Contract(TimeStampedModel):
+class Contract(TrackedFieldsMixin, TimeStampedModel):
     STATUS_CHOICES = (
         ("IMZA_BEKLIYOR", "İmza Bekliyor"),
         ("IMZALANDI", "İmzalandı"),
@@ -15,12 +15,14 @@ class Contract(TimeStampedModel):
         ("COMPLETED", "Tamamlandı"),
         ("CANCELLED", "İptal"),
     )
+    # Durum geçişleri (apps.production.signals) önceki değeri sorgusuz okur
+    tracked_fields = ("status",)
 
     proposal = models.OneToOneField("crm.Proposal", on_delete=models.PROTECT, related_name="contract")
     contract_no = models.CharField(max_length=20, unique=True, blank=True, null=True, verbose_name="Sözleşme No")
     project_name = models.CharField(max_length=200, blank=True)
     job_address = models.TextField(blank=True, default="", verbose_name="İş/Adres")
-    start_date = models.DateField(default=timezone.localdate)
+    start_date = models.DateField(default=timezone.localdate, db_index=True)
     deadline_date = models.DateField(null=True, blank=True, verbose_name="Teslim Tarihi")
     special_terms = models.TextField(blank=True, verbose_name="Özel Şartlar")
     contract_file = models.FileField(
@@ -59,6 +61,45 @@ class Contract(TimeStampedModel):
         return self.proposal_id
 
 
+class ContractItem(models.Model):
+    """Queryable copy of one ``Contract.items_snapshot`` entry.
+
+    Written together with the snapshot (``apps.production.services.sync_contract_items``)
+    so product sales and material demand can be aggregated in SQL.
+    """
+
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name="items")
+    position = models.PositiveIntegerField(default=0)
+    source_item_id = models.PositiveIntegerField(null=True, blank=True, help_text="Teklif kalemi id (snapshot)")
+    product = models.ForeignKey(
+        "inventory.ProductDefinition", on_delete=models.SET_NULL, null=True, blank=True, related_name="contract_items"
+    )
+    slab = models.ForeignKey("inventory.Slab", on_delete=models.SET_NULL, null=True, blank=True, related_name="contract_items")
+    description = models.CharField(max_length=200, blank=True, default="")
+    stone_type = models.CharField(max_length=200, blank=True, default="")
+    total_measure = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    unit = models.CharField(max_length=10, blank=True, default="")
+    width = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    length = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    quantity = models.IntegerField(default=1)
+    area_m2 = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
+    unit_price = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    fire_rate = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0.00"))
+    labor_cost = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    total_price = models.DecimalField(max_digits=19, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["contract_id", "position"]
+        verbose_name = "Sözleşme Kalemi"
+        verbose_name_plural = "Sözleşme Kalemleri"
+        indexes = [
+            models.Index(fields=["product", "contract"], name="prod_contractitem_product_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.contract_id} #{self.position} {self.description}"
+
+
 class WorkOrder(TimeStampedModel):
     STAGE_CHOICES = (
         ("PLANLANACAK", "Planlanacak"),
@@ -136,12 +177,3 @@ class ProductionLog(TimeStampedModel):
     changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
     work_order = models.ForeignKey("production.WorkOrder", on_delete=models.CASCADE, related_name="logs")
     note = models.TextField(blank=True, default="")
-
-
-class ContractSequence(TimeStampedModel):
-    year = models.PositiveSmallIntegerField(unique=True)
-    last_number = models.PositiveIntegerField(default=0)
-
-    class Meta:
-        verbose_name = "Sözleşme Seri"
-        verbose_name_plural = "Sözleşme Serileri"
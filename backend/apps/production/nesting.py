@@ -0,0 +1,298 @@
+"""Cutting plans: pack rectangular pieces onto slabs.
+
+Pieces and slabs are measured in centimetres, like ``ProposalItem`` and
+``Slab``; internally everything is converted to whole millimetres. The saw
+kerf is handled by growing every piece and every slab by one kerf, so pieces
+touching the slab edge do not lose material to a cut that is never made.
+
+Packing is greedy: pieces are placed one by one into the open slab where they
+fit best, and a new slab is opened only when none can take the piece. New
+slabs are picked smallest-first, so remnants are used before full slabs.
+Two placement rules are available:
+
+* ``maxrects`` keeps every maximal free rectangle and gives the tightest
+  packings;
+* ``guillotine`` only produces edge-to-edge cuts, which matches what a
+  bridge saw can cut without repositioning.
+
+``plan_cuts`` runs each rule with a few piece orderings, then keeps
+perturbing the best ordering until ``time_limit`` runs out or it stops
+improving.
+"""
+
+import random
+import time
+from decimal import Decimal
+
+DEFAULT_KERF_MM = 4
+DEFAULT_TIME_LIMIT = 1.0
+
+MAXRECTS = "maxrects"
+GUILLOTINE = "guillotine"
+METHODS = (MAXRECTS, GUILLOTINE)
+
+SORT_KEYS = (
+    lambda p: (p.w * p.h, max(p.w, p.h)),
+    lambda p: (max(p.w, p.h), min(p.w, p.h)),
+    lambda p: (p.w + p.h, p.w * p.h),
+    lambda p: (p.w, p.h),
+    lambda p: (p.h, p.w),
+)
+
+
+def _mm(value):
+    return int((Decimal(str(value)) * 10).to_integral_value())
+
+
+def _cm(value):
+    return Decimal(value) / 10
+
+
+class Piece:
+    __slots__ = ("key", "w", "h", "rotatable")
+
+    def __init__(self, key, w, h, rotatable=True):
+        self.key = key
+        self.w = w
+        self.h = h
+        self.rotatable = rotatable
+
+
+class Stock:
+    __slots__ = ("key", "w", "h")
+
+    def __init__(self, key, w, h):
+        self.key = key
+        self.w = w
+        self.h = h
+
+
+class _Bin:
+    """One opened slab. Free space is a list of ``(x, y, w, h)`` rectangles."""
+
+    def __init__(self, stock, kerf):
+        self.stock = stock
+        self.free = [(0, 0, stock.w + kerf, stock.h + kerf)]
+        self.placed = []
+        self.free_area = (stock.w + kerf) * (stock.h + kerf)
+
+    def find(self, w, h, rotatable):
+        """Best ``(score, x, y, w, h)`` for the piece, lower score is better."""
+        if w * h > self.free_area:
+            return None
+        best = None
+        for fx, fy, fw, fh in self.free:
+            for pw, ph in ((w, h), (h, w)) if rotatable and w != h else ((w, h),):
+                if pw <= fw and ph <= fh:
+                    leftover_w, leftover_h = fw - pw, fh - ph
+                    score = (
+                        fw * fh - pw * ph,
+                        min(leftover_w, leftover_h),
+                        fy,
+                        fx,
+                    )
+                    if best is None or score < best[0]:
+                        best = (score, fx, fy, pw, ph)
+        return best
+
+    def place(self, piece, x, y, w, h):
+        self.placed.append((piece, x, y, w, h))
+        self.free_area -= w * h
+        self._split(x, y, w, h)
+
+    def largest_free(self):
+        return max(self.free, key=lambda r: r[2] * r[3], default=None)
+
+
+class _MaxRectsBin(_Bin):
+    def _split(self, x, y, w, h):
+        right, top = x + w, y + h
+        result = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or right <= fx or y >= fy + fh or top <= fy:
+                result.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                result.append((fx, fy, x - fx, fh))
+            if right < fx + fw:
+                result.append((right, fy, fx + fw - right, fh))
+            if y > fy:
+                result.append((fx, fy, fw, y - fy))
+            if top < fy + fh:
+                result.append((fx, top, fw, fy + fh - top))
+        # Drop rectangles contained in another one.
+        result.sort(key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for r in result:
+            rx, ry, rw, rh = r
+            if not any(
+                rx >= kx and ry >= ky and rx + rw <= kx + kw and ry + rh <= ky + kh for kx, ky, kw, kh in kept
+            ):
+                kept.append(r)
+        self.free = kept
+
+
+class _GuillotineBin(_Bin):
+    def _split(self, x, y, w, h):
+        for index, (fx, fy, fw, fh) in enumerate(self.free):
+            if fx == x and fy == y and w <= fw and h <= fh:
+                break
+        else:  # pragma: no cover - find() only returns corners of free rectangles
+            raise ValueError("placement is not at a free rectangle corner")
+        del self.free[index]
+        leftover_w, leftover_h = fw - w, fh - h
+        # Cut along the shorter leftover so the larger offcut stays in one piece.
+        if leftover_w < leftover_h:
+            right, top = (x + w, y, leftover_w, h), (x, y + h, fw, leftover_h)
+        else:
+            right, top = (x + w, y, leftover_w, fh), (x, y + h, w, leftover_h)
+        self.free.extend(r for r in (right, top) if r[2] > 0 and r[3] > 0)
+
+
+BIN_CLASSES = {MAXRECTS: _MaxRectsBin, GUILLOTINE: _GuillotineBin}
+
+
+def _pack(order, stocks, method, kerf):
+    """Place pieces in ``order``; ``stocks`` must be sorted smallest first."""
+    bin_class = BIN_CLASSES[method]
+    bins = []
+    unused = list(stocks)
+    unplaced = []
+    for piece in order:
+        w, h = piece.w + kerf, piece.h + kerf
+        best = None
+        for b in bins:
+            found = b.find(w, h, piece.rotatable)
+            if found and (best is None or found[0] < best[1][0]):
+                best = (b, found)
+        if best is None:
+            for index, stock in enumerate(unused):
+                b = bin_class(stock, kerf)
+                found = b.find(w, h, piece.rotatable)
+                if found:
+                    del unused[index]
+                    bins.append(b)
+                    best = (b, found)
+                    break
+        if best is None:
+            unplaced.append(piece)
+            continue
+        b, (_, x, y, pw, ph) = best
+        b.place(piece, x, y, pw, ph)
+    return bins, unplaced
+
+
+def _cost(bins, unplaced):
+    # Unplaced pieces dominate, then slab count, then the slab area consumed.
+    # Among equal plans prefer the one leaving the largest single offcut.
+    used_area = sum(b.stock.w * b.stock.h for b in bins)
+    offcut = max((r[2] * r[3] for b in bins for r in b.free), default=0)
+    return (sum(p.w * p.h for p in unplaced), len(bins), used_area, -offcut)
+
+
+def plan_cuts(pieces, slabs, *, kerf_mm=DEFAULT_KERF_MM, time_limit=DEFAULT_TIME_LIMIT, methods=METHODS, seed=0):
+    """
+    Yerleşim planı: parçaları plakalara yerleştirir.
+
+    ``pieces``: ``{"key", "width", "length", "quantity"?, "rotatable"?}`` (cm)
+    ``slabs``: ``{"key", "width", "length"}`` (cm); küçük plakalar (parça stok) önce kullanılır.
+    """
+    started = time.monotonic()
+    deadline = started + max(time_limit, 0)
+    kerf = _mm(Decimal(kerf_mm) / 10)
+
+    items = []
+    for row in pieces:
+        for n in range(int(row.get("quantity") or 1)):
+            key = (row["key"], n + 1)
+            items.append(Piece(key, _mm(row["width"]), _mm(row["length"]), row.get("rotatable", True)))
+    stocks = sorted(
+        (Stock(row["key"], _mm(row["width"]), _mm(row["length"])) for row in slabs),
+        key=lambda s: (s.w * s.h, str(s.key)),
+    )
+
+    best = None
+    attempts = stale = 0
+
+    def consider(order, method):
+        nonlocal best, attempts, stale
+        attempts += 1
+        bins, unplaced = _pack(order, stocks, method, kerf)
+        cost = _cost(bins, unplaced)
+        if best is None or cost < best[0]:
+            best = (cost, order, method, bins, unplaced)
+            stale = 0
+        else:
+            stale += 1
+
+    for method in methods:
+        for sort_key in SORT_KEYS:
+            consider(sorted(items, key=sort_key, reverse=True), method)
+
+    # Improvement: swap pieces in the best ordering and keep better plans,
+    # until time runs out or many attempts in a row brought nothing.
+    rng = random.Random(seed)
+    patience = max(200, 20 * len(items))
+    while len(items) > 1 and stale < patience and time.monotonic() < deadline:
+        order = list(best[1])
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(order))
+            j = min(len(order) - 1, i + rng.randint(1, 8))
+            order[i], order[j] = order[j], order[i]
+        consider(order, rng.choice(methods) if rng.random() < 0.2 else best[2])
+
+    return _result(best, kerf, attempts, time.monotonic() - started)
+
+
+def _result(best, kerf, attempts, elapsed):
+    _, _, method, bins, unplaced = best
+    layouts = []
+    slab_area = piece_area = 0
+    for b in bins:
+        placements = []
+        for piece, x, y, w, h in sorted(b.placed, key=lambda p: (p[2], p[1])):
+            placements.append(
+                {
+                    "key": piece.key[0],
+                    "piece": piece.key[1],
+                    "x": _cm(x),
+                    "y": _cm(y),
+                    "width": _cm(w - kerf),
+                    "length": _cm(h - kerf),
+                    "rotated": (w - kerf, h - kerf) != (piece.w, piece.h),
+                }
+            )
+            piece_area += piece.w * piece.h
+        slab_area += b.stock.w * b.stock.h
+        offcut = b.largest_free()
+        layouts.append(
+            {
+                "slab": b.stock.key,
+                "width": _cm(b.stock.w),
+                "length": _cm(b.stock.h),
+                "placements": placements,
+                "largest_offcut": (
+                    {
+                        "x": _cm(offcut[0]),
+                        "y": _cm(offcut[1]),
+                        "width": _cm(max(offcut[2] - kerf, 0)),
+                        "length": _cm(max(offcut[3] - kerf, 0)),
+                    }
+                    if offcut
+                    else None
+                ),
+            }
+        )
+
+    waste = (Decimal(slab_area - piece_area) * 100 / slab_area) if slab_area else Decimal("0")
+    return {
+        "method": method,
+        "slab_count": len(layouts),
+        "slab_area_m2": (Decimal(slab_area) / 1000000).quantize(Decimal("0.0001")),
+        "piece_area_m2": (Decimal(piece_area) / 1000000).quantize(Decimal("0.0001")),
+        "waste_percent": waste.quantize(Decimal("0.01")),
+        "layouts": layouts,
+        "unplaced": [{"key": p.key[0], "piece": p.key[1], "width": _cm(p.w), "length": _cm(p.h)} for p in unplaced],
+        "attempts": attempts,
+        "elapsed_ms": int(elapsed * 1000),
+    }
@@ -1,7 +1,10 @@
 from django.core.files.storage import default_storage
 from rest_framework import serializers
 
+from apps.core.uploads import discard_upload
 from apps.production.models import Contract
+from apps.production.nesting import DEFAULT_KERF_MM, DEFAULT_TIME_LIMIT, METHODS
+from apps.production.services import sync_contract_items
 
 
 class FilePathMixin:
@@ -31,8 +34,7 @@ class FilePathMixin:
 
         file_field = getattr(instance, field_name)
         if path_value == "":
-            if file_field:
-                file_field.delete(save=False)
+            discard_upload(file_field)
             setattr(instance, field_name, None)
         else:
             file_field.name = path_value
@@ -100,14 +102,35 @@ class ContractSerializer(serializers.ModelSerializer, FilePathMixin):
         contract_file_path = validated_data.pop("contract_file_path", None)
         instance = super().create(validated_data)
         self.save_file_from_path(instance, "contract_file", contract_file_path)
+        if instance.items_snapshot:
+            sync_contract_items(instance, created=True)
         return instance
 
     def update(self, instance, validated_data):
         contract_file_path = validated_data.pop("contract_file_path", None)
+        snapshot_changed = (
+            "items_snapshot" in validated_data and validated_data["items_snapshot"] != instance.items_snapshot
+        )
         instance = super().update(instance, validated_data)
         self.save_file_from_path(instance, "contract_file", contract_file_path)
+        if snapshot_changed:
+            sync_contract_items(instance)
         return instance
 
     class Meta:
         model = Contract
         fields = "__all__"
+
+
+class CuttingPlanQuerySerializer(serializers.Serializer):
+    kerf = serializers.DecimalField(max_digits=4, decimal_places=1, min_value=0, max_value=20, default=DEFAULT_KERF_MM)
+    time_limit = serializers.FloatField(min_value=0, max_value=5, default=DEFAULT_TIME_LIMIT)
+    method = serializers.ChoiceField(choices=METHODS, required=False)
+
+    def plan_options(self):
+        data = self.validated_data
+        return {
+            "kerf_mm": data["kerf"],
+            "time_limit": data["time_limit"],
+            "methods": (data["method"],) if data.get("method") else METHODS,
+        }
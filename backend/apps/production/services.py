@@ -1,16 +1,290 @@
+from decimal import Decimal, InvalidOperation
+
 from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
 from django.utils import timezone
 
-from apps.production.models import ContractSequence
+from apps.core.pdf import render_pdf
+from apps.core.sequences import next_value
+from apps.inventory.models import ProductDefinition, Slab
+from apps.inventory.services import available_slabs
+from apps.production.models import Contract, ContractItem
+from apps.production.nesting import DEFAULT_KERF_MM, DEFAULT_TIME_LIMIT, METHODS, plan_cuts
+
+OPEN_CONTRACT_STATUSES = ("IMZA_BEKLIYOR", "IMZALANDI", "ACTIVE")
+
+
+def _max_contract_number(year):
+    prefix = f"YG-{year}-"
+    numbers = Contract.objects.filter(contract_no__startswith=prefix).values_list("contract_no", flat=True)
+    return max((int(no[len(prefix):]) for no in numbers if no[len(prefix):].isdigit()), default=0)
 
 
 def next_contract_no() -> str:
     year = timezone.localdate().year
+    number = next_value(f"contract:{year}", seed=lambda: _max_contract_number(year))
+    return f"YG-{year}-{number:06d}"
+
+
+CONTRACT_PDF_TEMPLATE = "pdf/contract.html"
+
+
+# Price-free variant for PRODUCTION, mirroring ContractSerializer's masking.
+CONTRACT_PRICE_FIELDS = ("currency", "include_tax", "tax_rate", "subtotal_amount", "discount_amount", "tax_amount", "total_amount")
+ITEM_PRICE_FIELDS = {"unit_price", "labor_cost", "total_price", "fire_rate"}
+
+
+def contract_pdf_kind(prices=True):
+    # Own storage directory per variant: render_pdf prunes other files in it.
+    return "contract" if prices else "contract-noprice"
+
+
+def contract_pdf_data(contract, *, prices=True):
+    """The contract PDF is rendered from the signed snapshot, never from live proposal data.
+
+    ``prices=False`` leaves out every amount (the variant shown to PRODUCTION).
+    """
+    data = {
+        "contract": {
+            "number": contract.contract_no or str(contract.pk),
+            "proposal_number": getattr(contract.proposal, "proposal_number", ""),
+            "project_name": contract.project_name,
+            "job_address": contract.job_address,
+            "start_date": contract.start_date,
+            "deadline_date": contract.deadline_date,
+            "special_terms": contract.special_terms,
+            "notes": contract.notes,
+            "currency": contract.currency,
+            "include_tax": contract.include_tax,
+            "tax_rate": contract.tax_rate,
+            "subtotal_amount": contract.subtotal_amount,
+            "discount_amount": contract.discount_amount,
+            "tax_amount": contract.tax_amount,
+            "total_amount": contract.total_amount,
+        },
+        "customer": {
+            "name": contract.customer_name,
+            "address": contract.customer_address,
+            "phone": contract.customer_phone,
+            "email": contract.customer_email,
+            "tax_number": contract.customer_tax_number,
+            "tax_office": contract.customer_tax_office,
+        },
+        "items": contract.items_snapshot or [],
+        "show_prices": prices,
+    }
+    if not prices:
+        for field in CONTRACT_PRICE_FIELDS:
+            data["contract"].pop(field)
+        data["items"] = [
+            {key: value for key, value in item.items() if key not in ITEM_PRICE_FIELDS}
+            for item in data["items"]
+            if isinstance(item, dict)
+        ]
+    return data
+
+
+def render_contract_pdf(contract_id, *, force=False, prices=True):
+    """Render one contract's PDF if its snapshot changed; returns "rendered", "cached" or "missing"."""
+    contract = Contract.objects.select_related("proposal").filter(pk=contract_id).first()
+    if contract is None:
+        return "missing"
+    _, rendered = render_pdf(
+        contract_pdf_kind(prices),
+        contract.pk,
+        CONTRACT_PDF_TEMPLATE,
+        contract_pdf_data(contract, prices=prices),
+        force=force,
+    )
+    return "rendered" if rendered else "cached"
+
+
+def _decimal(value, default="0"):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else Decimal(default)
+    except (InvalidOperation, ValueError):
+        return Decimal(default)
+
+
+def _int(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def contract_item_rows(contract, snapshot=None):
+    """Build unsaved ContractItem rows from a snapshot (defaults to the contract's own)."""
+    snapshot = contract.items_snapshot if snapshot is None else snapshot
+    rows = []
+    for position, entry in enumerate(snapshot or []):
+        if not isinstance(entry, dict):
+            continue
+        width, length = _decimal(entry.get("width")), _decimal(entry.get("length"))
+        quantity = _int(entry.get("quantity")) or 1
+        area_m2 = entry.get("area_m2")
+        rows.append(
+            ContractItem(
+                contract=contract,
+                position=position,
+                source_item_id=_int(entry.get("id")),
+                product_id=_int(entry.get("product_id")),
+                slab_id=_int(entry.get("slab_id")),
+                description=(entry.get("description") or entry.get("product_name") or "")[:200],
+                stone_type=(entry.get("stone_type") or "")[:200],
+                total_measure=_decimal(entry["total_measure"]) if entry.get("total_measure") not in (None, "") else None,
+                unit=(entry.get("total_unit") or "")[:10],
+                width=width,
+                length=length,
+                quantity=quantity,
+                area_m2=(
+                    _decimal(area_m2) if area_m2 not in (None, "") else width * length * quantity / Decimal("10000")
+                ).quantize(Decimal("0.0001")),
+                unit_price=_decimal(entry.get("unit_price")),
+                fire_rate=_decimal(entry.get("fire_rate")),
+                labor_cost=_decimal(entry.get("labor_cost")),
+                total_price=_decimal(entry.get("total_price")),
+            )
+        )
+    return rows
+
+
+def _drop_missing_references(rows):
+    """Null product/slab ids that no longer exist (deleted slabs, hand-edited snapshots).
+
+    One query per model for the whole batch; the text stays in description/stone_type.
+    """
+    for field, model in (("product_id", ProductDefinition), ("slab_id", Slab)):
+        ids = {getattr(row, field) for row in rows} - {None}
+        if not ids:
+            continue
+        existing = set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+        for row in rows:
+            if getattr(row, field) not in existing:
+                setattr(row, field, None)
+    return rows
+
+
+def sync_contract_items(contract, *, created=False, check_references=True):
+    """Rewrite the contract's ContractItem rows from its current items_snapshot.
+
+    Call it wherever the snapshot is written; ``created`` skips the delete for
+    a contract that cannot have rows yet. ``check_references=False`` is for
+    snapshots just built from live proposal items, whose ids are known to exist.
+    """
+    rows = contract_item_rows(contract)
+    if check_references:
+        rows = _drop_missing_references(rows)
     with transaction.atomic():
-        seq, _ = ContractSequence.objects.select_for_update().get_or_create(
-            year=year,
-            defaults={"last_number": 0},
+        if not created:
+            ContractItem.objects.filter(contract=contract).delete()
+        if rows:
+            ContractItem.objects.bulk_create(rows)
+    return rows
+
+
+def backfill_contract_items(*, batch_size=500, rebuild=False):
+    """Create ContractItem rows for contracts that have a snapshot but no rows yet.
+
+    Works in id-ordered batches with one insert per batch; with ``rebuild``
+    every contract is rewritten. Returns ``(contracts, items)`` written.
+    """
+    qs = Contract.objects.exclude(items_snapshot=[]).order_by("id")
+    if not rebuild:
+        qs = qs.filter(items__isnull=True)
+    contracts_done = items_done = 0
+    last_id = 0
+    while True:
+        batch = list(qs.filter(id__gt=last_id).only("id", "items_snapshot")[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        rows = _drop_missing_references([row for contract in batch for row in contract_item_rows(contract)])
+        with transaction.atomic():
+            if rebuild:
+                ContractItem.objects.filter(contract__in=batch).delete()
+            ContractItem.objects.bulk_create(rows)
+        contracts_done += len(batch)
+        items_done += len(rows)
+    return contracts_done, items_done
+
+
+def product_sales_summary(*, date_from=None, date_to=None, statuses=None, contracts=None):
+    """Signed area, quantity and revenue per product over contracts started in the period."""
+    qs = ContractItem.objects.exclude(contract__status="CANCELLED")
+    if contracts is not None:
+        qs = qs.filter(contract__in=contracts)
+    if statuses:
+        qs = qs.filter(contract__status__in=statuses)
+    if date_from:
+        qs = qs.filter(contract__start_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(contract__start_date__lte=date_to)
+    return list(
+        qs.values("product_id", "product__name")
+        .annotate(
+            area_m2=Sum("area_m2"),
+            quantity=Sum("quantity"),
+            revenue=Sum("total_price"),
+            contracts=Count("contract", distinct=True),
+        )
+        .order_by("-area_m2", "product_id")
+    )
+
+
+def material_demand(*, statuses=OPEN_CONTRACT_STATUSES, contracts=None):
+    """Area still to be produced per product and stone type, including the quoted fire rate."""
+    required = ExpressionWrapper(
+        F("area_m2") * (Value(Decimal("1")) + F("fire_rate") * Value(Decimal("0.01"))),
+        output_field=DecimalField(max_digits=18, decimal_places=4),
+    )
+    qs = ContractItem.objects.filter(contract__status__in=statuses)
+    if contracts is not None:
+        qs = qs.filter(contract__in=contracts)
+    return list(
+        qs.values("product_id", "product__name", "stone_type")
+        # required_m2 first: once "area_m2" names the aggregate, F("area_m2") would resolve to it
+        .annotate(required_m2=Sum(required))
+        .annotate(area_m2=Sum("area_m2"), contracts=Count("contract", distinct=True))
+        .order_by("product_id", "stone_type")
+    )
+
+
+def cutting_plan(items, *, contract=None, kerf_mm=DEFAULT_KERF_MM, time_limit=DEFAULT_TIME_LIMIT, methods=METHODS):
+    """
+    Kalemleri ürün bazında, o ürünün kesime açık plakalarına yerleştirir.
+
+    ``items``: ``id``, ``product_id``, ``width``, ``length``, ``quantity`` alanları olan
+    ProposalItem / ContractItem nesneleri. Ölçüsü olmayan kalemler ``skipped`` içinde döner.
+    ``contract`` verilirse o sözleşmeye soft rezerve edilmiş plakalar da aday olur.
+    """
+    groups = {}
+    skipped = []
+    for item in items:
+        if not item.product_id or not item.width or not item.length or (item.quantity or 0) < 1:
+            skipped.append(item.id)
+            continue
+        groups.setdefault(item.product_id, []).append(
+            {"key": item.id, "width": item.width, "length": item.length, "quantity": item.quantity}
+        )
+
+    plans = []
+    for product_id, pieces in sorted(groups.items()):
+        slabs = list(
+            available_slabs(product=product_id, contract=contract)
+            .values("id", "barcode", "width", "length")
+            .order_by("id")
+        )
+        plan = plan_cuts(
+            pieces,
+            [{"key": slab["id"], "width": slab["width"], "length": slab["length"]} for slab in slabs],
+            kerf_mm=kerf_mm,
+            time_limit=time_limit / len(groups),
+            methods=methods,
         )
-        seq.last_number += 1
-        seq.save(update_fields=["last_number"])
-    return f"YG-{year}-{seq.last_number:06d}"
+        barcodes = {slab["id"]: slab["barcode"] for slab in slabs}
+        for layout in plan["layouts"]:
+            layout["barcode"] = barcodes[layout["slab"]]
+        plan["product"] = product_id
+        plans.append(plan)
+    return {"plans": plans, "skipped": skipped}
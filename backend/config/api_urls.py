@@ -3,7 +3,7 @@ from django.urls import path
 from apps.finance.api import TransactionViewSet, AccountViewSet, ChequeViewSet, PaymentPlanViewSet, FixedExpenseViewSet, FinanceInsightsViewSet
 from apps.crm.api import ProposalViewSet, ProposalItemViewSet, CustomerViewSet
 from apps.production.api import ContractViewSet
-from apps.inventory.api import ProductDefinitionViewSet, SlabViewSet
+from apps.inventory.api import ProductDefinitionViewSet, SlabViewSet, StockSummaryViewSet
 
 from apps.hr.api import EmployeeViewSet, PayrollViewSet
 from apps.core.api import DashboardStatsView, NotificationViewSet, CurrentUserView
@@ -21,6 +21,7 @@ router.register(r"proposal-items", ProposalItemViewSet, basename="proposalitem")
 router.register(r"contracts", ContractViewSet, basename="contract")
 router.register(r"product-definitions", ProductDefinitionViewSet, basename="productdefinition")
 router.register(r"slabs", SlabViewSet, basename="slab")
+router.register(r"stock-summary", StockSummaryViewSet, basename="stocksummary")
 router.register(r"employees", EmployeeViewSet, basename="employee")
 router.register(r"payrolls", PayrollViewSet, basename="payroll")
 router.register(r"notifications", NotificationViewSet, basename="notification")
@@ -117,6 +117,9 @@ if "sqlite3" in SQL_ENGINE:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # File-backed test database (not :memory:) so tests can run real
+            # concurrent writers from several threads/connections.
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
 else:
@@ -169,6 +172,9 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
 STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },
@@ -178,6 +184,11 @@ STORAGES = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Chunked uploads (apps.core.uploads): unfinished files are staged here, outside MEDIA_ROOT
+UPLOAD_STAGING_DIR = os.getenv('UPLOAD_STAGING_DIR', str(BASE_DIR / 'upload_staging'))
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 100 * 1024 * 1024))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024))
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
@@ -244,3 +255,67 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 APPEND_SLASH = True
+
+# Outbound channel used by `dispatch_payment_reminders` (dotted path to a class with send(reminders))
+PAYMENT_REMINDER_CHANNEL = os.getenv(
+    "PAYMENT_REMINDER_CHANNEL",
+    "apps.finance.services.NotificationReminderChannel",
+)
+
+# Hi-lo block sizes per sequence for apps.core.sequences ("customer", "proposal", "contract").
+# Larger blocks mean fewer sequence round trips but gaps when a process restarts; 1 = no caching.
+SEQUENCE_BLOCK_SIZES = {}
+
+# HTML -> PDF renderer for apps.core.pdf: callable or dotted path taking (html, base_url), returning bytes.
+PDF_RENDERER = os.getenv("PDF_RENDERER", "apps.core.pdf.weasyprint_renderer")
+
+# Outbox messages are relayed by a `core.relay_outbox` job queued after the publishing
+# transaction commits. Set to True to relay inline instead (only without a worker: the
+# request then waits for the fan-out).
+OUTBOX_RELAY_ON_COMMIT = env_bool("OUTBOX_RELAY_ON_COMMIT", "False")
+
+# Declarative periodic task table for `run_scheduler` (job names come from apps/*/jobs.py).
+# Each entry takes either an `interval` in seconds or a 5-field `cron` expression (TIME_ZONE).
+PERIODIC_TASKS = [
+    {
+        "name": "release_expired_reservations",
+        "job": "inventory.release_expired_reservations",
+        "interval": 300,
+    },
+    {
+        "name": "check_cheque_due",
+        "job": "finance.check_cheque_due",
+        "cron": "0 8 * * *",
+    },
+    {
+        "name": "generate_payment_reminders",
+        "job": "finance.dispatch_payment_reminders",
+        "cron": "0 6 * * *",
+        "payload": {"generate": True},
+    },
+    {
+        "name": "dispatch_payment_reminders",
+        "job": "finance.dispatch_payment_reminders",
+        "interval": 300,
+    },
+    {
+        "name": "reconcile_customer_receivables",
+        "job": "crm.reconcile_customer_receivables",
+        "cron": "30 3 * * *",
+    },
+    {
+        "name": "relay_outbox",
+        "job": "core.relay_outbox",
+        "interval": 30,
+    },
+    {
+        "name": "purge_outbox",
+        "job": "core.purge_outbox",
+        "cron": "15 4 * * *",
+    },
+    {
+        "name": "purge_upload_sessions",
+        "job": "core.purge_upload_sessions",
+        "interval": 3600,
+    },
+]
@@ -1,14 +1,47 @@
-import os
-import uuid
-
 from django.core.files.storage import default_storage
-from django.utils.text import get_valid_filename
+from django.shortcuts import get_object_or_404
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 
+from apps.core.models import UploadSession
+from apps.core.serializers import UploadSessionCreateSerializer
+from apps.core.uploads import (
+    UploadChecksumMismatch,
+    UploadOffsetMismatch,
+    clean_filename,
+    complete_session,
+    max_chunk_size,
+    open_session,
+    store_file,
+    write_chunk,
+)
+
+
+def _file_payload(request, path, name, *, sha256, size, deduplicated):
+    relative_url = default_storage.url(path)
+    return {
+        "url": request.build_absolute_uri(relative_url),
+        "path": relative_url,
+        "name": name,
+        "size": size,
+        "sha256": sha256,
+        "deduplicated": deduplicated,
+    }
+
+
+def _session_payload(session):
+    return {
+        "id": str(session.pk),
+        "status": session.status,
+        "filename": session.filename,
+        "size": session.size,
+        "offset": session.received,
+        "chunk_size": max_chunk_size(),
+    }
+
 
 class UploadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -19,20 +52,105 @@ class UploadView(APIView):
         if not uploaded_file:
             return Response({"detail": "Missing file. Use multipart field 'file'."}, status=status.HTTP_400_BAD_REQUEST)
 
-        original_name = get_valid_filename(uploaded_file.name or "upload")
-        _, ext = os.path.splitext(original_name)
-        file_name = f"{uuid.uuid4().hex}{ext.lower()}"
+        original_name = clean_filename(uploaded_file.name)
+        storage_path, digest, deduplicated = store_file(uploaded_file, original_name, user=request.user)
+        return Response(
+            _file_payload(
+                request,
+                storage_path,
+                original_name,
+                sha256=digest,
+                size=uploaded_file.size,
+                deduplicated=deduplicated,
+            ),
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class UploadSessionView(APIView):
+    """
+    POST /api/upload/sessions/ {"filename": "plaka.jpg", "size": 7340032, "sha256": "..."}
+    Parçalı yükleme başlatır. Aynı içerik daha önce yüklendiyse dosya yolu hemen döner (200).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        params = UploadSessionCreateSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        try:
+            session, existing = open_session(
+                user=request.user, filename=data["filename"], size=data["size"], sha256=data.get("sha256", "")
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if existing:
+            name = clean_filename(data["filename"])
+            return Response(
+                {
+                    "status": "COMPLETE",
+                    **_file_payload(
+                        request, existing, name, sha256=data["sha256"].lower(), size=data["size"], deduplicated=True
+                    ),
+                }
+            )
+        return Response(_session_payload(session), status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    GET /api/upload/sessions/{id}/  -> alınan bayt sayısı (offset); kopan yükleme buradan devam eder.
+    PUT /api/upload/sessions/{id}/  gövde: ham bayt, başlık: Upload-Offset: <offset>
+    Konum sunucudakiyle uyuşmazsa 409 ve doğru offset döner.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, pk):
+        return get_object_or_404(UploadSession, pk=pk, user=request.user)
 
-        storage_path = default_storage.save(f"uploads/{file_name}", uploaded_file)
-        relative_url = default_storage.url(storage_path)
-        absolute_url = request.build_absolute_uri(relative_url)
+    def get(self, request, pk):
+        return Response(_session_payload(self.get_session(request, pk)))
 
+    def put(self, request, pk):
+        session = self.get_session(request, pk)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return Response({"error": "Upload-Offset başlığı gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Read the raw body in blocks; request.data is never touched.
+            received = write_chunk(session, offset, request._request)
+        except UploadOffsetMismatch as exc:
+            return Response({"error": str(exc), "offset": exc.expected}, status=status.HTTP_409_CONFLICT)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"id": str(session.pk), "offset": received, "size": session.size})
+
+
+class UploadSessionCompleteView(APIView):
+    """
+    POST /api/upload/sessions/{id}/complete/
+    Tüm parçalar alındıysa dosyayı SHA-256 adıyla saklar; /api/upload/ ile aynı yanıtı döner.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        try:
+            path, deduplicated = complete_session(session)
+        except UploadChecksumMismatch as exc:
+            # The staged bytes were discarded; the client sends the file again from 0.
+            return Response({"error": str(exc), "offset": 0}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        session.refresh_from_db()
         return Response(
-            {
-                "url": absolute_url,
-                "path": relative_url,
-                "name": original_name,
-                "size": uploaded_file.size,
-            },
-            status=status.HTTP_201_CREATED,
+            _file_payload(
+                request, path, session.filename, sha256=session.sha256, size=session.size, deduplicated=deduplicated
+            )
         )
@@ -23,7 +23,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from config.upload_api import UploadView
+from config.upload_api import UploadSessionCompleteView, UploadSessionDetailView, UploadSessionView, UploadView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,6 +31,14 @@ urlpatterns = [
 
     # File upload (multipart)
     path('api/upload/', UploadView.as_view(), name='upload'),
+    # Chunked, resumable upload
+    path('api/upload/sessions/', UploadSessionView.as_view(), name='upload-session'),
+    path('api/upload/sessions/<uuid:pk>/', UploadSessionDetailView.as_view(), name='upload-session-detail'),
+    path(
+        'api/upload/sessions/<uuid:pk>/complete/',
+        UploadSessionCompleteView.as_view(),
+        name='upload-session-complete',
+    ),
     
     # JWT Authentication Endpoints
     path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
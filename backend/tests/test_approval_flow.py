@@ -6,8 +6,9 @@ from django.core.management import call_command
 from django.utils import timezone
 from rest_framework.test import APIClient
 
+from apps.crm.models import OfferAuditLog
 from apps.finance.models import PaymentPlan
-from apps.inventory.models import StockReservation
+from apps.inventory.models import Slab, StockReservation, StockSummary
 from apps.production.models import Contract
 
 
@@ -83,6 +84,41 @@ def test_release_expired_reservations(make_stock_reservation):
     assert slab.soft_reserved_until is None
 
 
+def test_release_expired_reservations_runs_in_set_based_batches(
+    make_stock_reservation, make_contract, django_assert_max_num_queries
+):
+    past = timezone.now() - timedelta(hours=1)
+    expired = []
+    for _ in range(5):
+        reservation = make_stock_reservation(expires_at=past)
+        slab = reservation.slab
+        slab.soft_reserved_for = reservation.contract
+        slab.soft_reserved_until = past
+        slab.save(update_fields=["soft_reserved_for", "soft_reserved_until"])
+        expired.append(reservation)
+    # Slab now soft-reserved by another contract: must be left alone.
+    taken = expired[0].slab
+    other = make_contract()
+    taken.soft_reserved_for = other
+    taken.save(update_fields=["soft_reserved_for"])
+    active = make_stock_reservation(expires_at=timezone.now() + timedelta(days=1))
+
+    # 3 batches (2 + 2 + 1) x (savepoint, select, 2 updates, insert, release)
+    with django_assert_max_num_queries(18):
+        call_command("release_expired_reservations", "--batch-size", "2")
+
+    assert StockReservation.objects.filter(status="RELEASED").count() == 5
+    active.refresh_from_db()
+    assert active.status == "SOFT_RESERVED"
+    taken.refresh_from_db()
+    assert taken.soft_reserved_for_id == other.id
+    assert Slab.objects.filter(soft_reserved_for__isnull=False).count() == 1
+    assert OfferAuditLog.objects.filter(action__startswith="RESERVATION_RELEASED_").count() == 5
+
+    call_command("release_expired_reservations")
+    assert OfferAuditLog.objects.filter(action__startswith="RESERVATION_RELEASED_").count() == 5
+
+
 def test_contract_signed_moves_to_hard_reserved(make_stock_reservation):
     reservation = make_stock_reservation()
     contract = reservation.contract
@@ -99,3 +135,45 @@ def test_contract_signed_moves_to_hard_reserved(make_stock_reservation):
     assert slab.reserved_for_id == contract.id
     assert slab.soft_reserved_for is None
     assert slab.soft_reserved_until is None
+
+
+def test_signing_and_cancelling_large_contract_uses_bulk_updates(
+    make_contract,
+    make_proposal_item,
+    make_product,
+    make_slab,
+    django_assert_max_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    product = make_product()
+    contract = make_contract()
+    reservations = [
+        StockReservation(
+            contract=contract,
+            proposal_item=make_proposal_item(proposal=contract.proposal, product=product),
+            product=product,
+            slab=make_slab(product=product, soft_reserved_for=contract),
+            area_m2=Decimal("2.0000"),
+        )
+        for _ in range(60)
+    ]
+    StockReservation.objects.bulk_create(reservations)
+    contract = Contract.objects.get(id=contract.id)
+
+    contract.status = "IMZALANDI"
+    with django_capture_on_commit_callbacks(execute=True), django_assert_max_num_queries(8):
+        contract.save(update_fields=["status"])
+
+    assert StockReservation.objects.filter(contract=contract, status="HARD_RESERVED").count() == 60
+    assert Slab.objects.filter(reserved_for=contract, status="RESERVED", soft_reserved_for=None).count() == 60
+    assert not Slab.objects.filter(reserved_for=contract, reserved_at=None).exists()
+    assert StockSummary.objects.get(product=product, status="RESERVED").slab_count == 60
+    assert not StockSummary.objects.filter(product=product, status="AVAILABLE").exists()
+
+    contract.status = "CANCELLED"
+    with django_capture_on_commit_callbacks(execute=True), django_assert_max_num_queries(8):
+        contract.save(update_fields=["status"])
+
+    assert StockReservation.objects.filter(contract=contract, status="RELEASED").count() == 60
+    assert Slab.objects.filter(product=product, status="AVAILABLE", reserved_for=None).count() == 60
+    assert StockSummary.objects.get(product=product, status="AVAILABLE").slab_count == 60
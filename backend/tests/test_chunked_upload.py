@@ -0,0 +1,167 @@
+import hashlib
+import io
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import UploadSession
+from apps.core.uploads import UploadOffsetMismatch, purge_stale_sessions, staging_path, write_chunk
+
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = bytes(range(256)) * 40  # 10 KB
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def _upload_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.UPLOAD_STAGING_DIR = str(tmp_path / "staging")
+    settings.UPLOAD_MAX_CHUNK_SIZE = 4096
+
+
+@pytest.fixture
+def client(users):
+    client = APIClient()
+    client.force_authenticate(user=users["PRODUCTION"])
+    return client
+
+
+def _put_chunk(client, session_id, offset, data):
+    return client.put(
+        f"/api/upload/sessions/{session_id}/",
+        data=data,
+        content_type="application/octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def test_chunked_upload_resumes_and_is_content_addressed(client):
+    resp = client.post("/api/upload/sessions/", {"filename": "Saha Foto.JPG", "size": len(CONTENT)}, format="json")
+    assert resp.status_code == 201
+    session_id = resp.data["id"]
+    assert resp.data["offset"] == 0
+    assert resp.data["chunk_size"] == 4096
+
+    assert _put_chunk(client, session_id, 0, CONTENT[:4096]).data["offset"] == 4096
+    # A retried chunk whose response was lost: the server reports where to go on.
+    resp = _put_chunk(client, session_id, 0, CONTENT[:4096])
+    assert resp.status_code == 409
+    assert resp.data["offset"] == 4096
+    assert _put_chunk(client, session_id, 4096, CONTENT[4096:4096 * 3]).status_code == 400
+
+    resp = client.post(f"/api/upload/sessions/{session_id}/complete/")
+    assert resp.status_code == 400
+
+    assert client.get(f"/api/upload/sessions/{session_id}/").data["offset"] == 4096
+    _put_chunk(client, session_id, 4096, CONTENT[4096:8192])
+    _put_chunk(client, session_id, 8192, CONTENT[8192:])
+
+    resp = client.post(f"/api/upload/sessions/{session_id}/complete/")
+    assert resp.status_code == 200
+    assert resp.data["sha256"] == DIGEST
+    assert resp.data["deduplicated"] is False
+    path = f"uploads/sha256/{DIGEST[:2]}/{DIGEST}.jpg"
+    assert resp.data["path"] == default_storage.url(path)
+    with default_storage.open(path, "rb") as fh:
+        assert fh.read() == CONTENT
+    assert not os.path.exists(staging_path(UploadSession.objects.get(pk=session_id)))
+
+    # Same content again: known hash answers at once, without a session.
+    resp = client.post(
+        "/api/upload/sessions/", {"filename": "kopya.jpg", "size": len(CONTENT), "sha256": DIGEST}, format="json"
+    )
+    assert resp.status_code == 200
+    assert resp.data["status"] == "COMPLETE"
+    assert resp.data["path"] == default_storage.url(path)
+    assert UploadSession.objects.count() == 1
+
+    # Single-shot uploads share the same storage.
+    resp = client.post("/api/upload/", {"file": SimpleUploadedFile("a.jpg", CONTENT)})
+    assert resp.status_code == 201
+    assert resp.data["deduplicated"] is True
+    assert resp.data["path"] == default_storage.url(path)
+
+
+def test_sha256_mismatch_restarts_the_session(client):
+    resp = client.post(
+        "/api/upload/sessions/", {"filename": "x.bin", "size": 4, "sha256": hashlib.sha256(b"abcd").hexdigest()},
+        format="json",
+    )
+    session_id = resp.data["id"]
+    _put_chunk(client, session_id, 0, b"abxd")
+    resp = client.post(f"/api/upload/sessions/{session_id}/complete/")
+    assert resp.status_code == 400
+    assert resp.data["offset"] == 0
+
+    # The corrupt bytes are gone; the client starts over instead of being stuck.
+    session = UploadSession.objects.get(pk=session_id)
+    assert session.status == "OPEN"
+    assert session.received == 0
+    assert os.path.getsize(staging_path(session)) == 0
+    assert client.get(f"/api/upload/sessions/{session_id}/").data["offset"] == 0
+
+    assert _put_chunk(client, session_id, 0, b"abcd").data["offset"] == 4
+    resp = client.post(f"/api/upload/sessions/{session_id}/complete/")
+    assert resp.status_code == 200
+    assert resp.data["sha256"] == hashlib.sha256(b"abcd").hexdigest()
+
+
+def test_chunk_overtaken_while_streaming_is_rejected(client):
+    resp = client.post("/api/upload/sessions/", {"filename": "x.bin", "size": len(CONTENT)}, format="json")
+    session = UploadSession.objects.get(pk=resp.data["id"])
+
+    class SlowStream:
+        # A retry of the same chunk lands while this request is still reading the body.
+        def __init__(self):
+            self.body = io.BytesIO(CONTENT[:4096])
+
+        def read(self, size):
+            if self.body.tell() == 0:
+                write_chunk(UploadSession.objects.get(pk=session.pk), 0, io.BytesIO(CONTENT[:4096]))
+            return self.body.read(size)
+
+    with pytest.raises(UploadOffsetMismatch) as exc:
+        write_chunk(session, 0, SlowStream())
+    assert exc.value.expected == 4096
+    session.refresh_from_db()
+    assert session.received == 4096
+    with open(staging_path(session), "rb") as fh:
+        assert fh.read() == CONTENT[:4096]
+
+
+def test_sessions_are_private_and_stale_ones_purged(client, users):
+    resp = client.post("/api/upload/sessions/", {"filename": "x.bin", "size": 10}, format="json")
+    session_id = resp.data["id"]
+    other = APIClient()
+    other.force_authenticate(user=users["SALES"])
+    assert other.get(f"/api/upload/sessions/{session_id}/").status_code == 404
+    assert _put_chunk(other, session_id, 0, b"x").status_code == 404
+
+    session = UploadSession.objects.get(pk=session_id)
+    UploadSession.objects.filter(pk=session_id).update(updated_at=timezone.now() - timedelta(days=2))
+    assert purge_stale_sessions() == 1
+    assert not os.path.exists(staging_path(session))
+
+
+def test_scheduler_purges_abandoned_sessions(client, settings):
+    resp = client.post("/api/upload/sessions/", {"filename": "x.bin", "size": len(CONTENT)}, format="json")
+    session = UploadSession.objects.get(pk=resp.data["id"])
+    _put_chunk(client, session.pk, 0, CONTENT[:4096])
+    assert os.path.exists(staging_path(session))
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+    settings.PERIODIC_TASKS = [
+        task for task in settings.PERIODIC_TASKS if task["job"] == "core.purge_upload_sessions"
+    ]
+    assert settings.PERIODIC_TASKS
+    call_command("run_scheduler", "--once")
+    assert not os.path.exists(staging_path(session))
+    assert not UploadSession.objects.filter(pk=session.pk).exists()
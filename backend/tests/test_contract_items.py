@@ -0,0 +1,122 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.production.models import Contract, ContractItem
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _snapshot_entry(product, *, width="100", length="200", quantity=1, total_price="500.00", fire_rate="10"):
+    return {
+        "product_id": product.id,
+        "description": "Tezgah",
+        "width": width,
+        "length": length,
+        "quantity": quantity,
+        "unit_price": "250.00",
+        "fire_rate": fire_rate,
+        "total_price": total_price,
+    }
+
+
+def test_finalize_writes_contract_items_with_snapshot(users, make_proposal, make_proposal_item):
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales)
+    item = make_proposal_item(proposal=proposal, width=Decimal("100"), length=Decimal("250"), quantity=2)
+    client = APIClient()
+    client.force_authenticate(user=sales)
+
+    assert client.post(f"/api/proposals/{proposal.id}/finalize/", {}, format="json").status_code == 200
+    contract = Contract.objects.get(proposal=proposal)
+    row = ContractItem.objects.get(contract=contract)
+    assert row.product_id == item.product_id
+    assert row.source_item_id == item.id
+    assert row.area_m2 == Decimal("5.0000")
+    assert row.total_price == item.total_price
+
+    item.quantity = 3
+    item.save()
+    assert client.post(f"/api/proposals/{proposal.id}/finalize/", {}, format="json").status_code == 200
+    row = ContractItem.objects.get(contract=contract)
+    assert row.quantity == 3
+    assert row.area_m2 == Decimal("7.5000")
+
+
+def test_backfill_command_fills_missing_rows_once(make_contract, make_product):
+    product = make_product()
+    contracts = [make_contract(items_snapshot=[_snapshot_entry(product), _snapshot_entry(product)]) for _ in range(3)]
+    make_contract(items_snapshot=[])
+
+    call_command("backfill_contract_items", "--batch-size", "2")
+    assert ContractItem.objects.count() == 6
+    assert set(ContractItem.objects.values_list("contract_id", flat=True)) == {c.id for c in contracts}
+
+    call_command("backfill_contract_items")
+    assert ContractItem.objects.count() == 6
+
+
+def test_stale_product_and_slab_ids_are_dropped(users, make_contract, make_product, make_slab):
+    product = make_product()
+    slab = make_slab(product=product)
+    gone = make_slab(product=product)
+    gone_id = gone.id
+    gone.delete()
+    stale = [
+        {**_snapshot_entry(product), "slab_id": slab.id},
+        {**_snapshot_entry(product), "product_id": 999999, "slab_id": gone_id, "stone_type": "Granit"},
+    ]
+    old = make_contract(items_snapshot=stale)
+
+    call_command("backfill_contract_items")
+    rows = list(ContractItem.objects.filter(contract=old).order_by("position"))
+    assert [(row.product_id, row.slab_id) for row in rows] == [(product.id, slab.id), (None, None)]
+    assert rows[1].stone_type == "Granit"
+
+    contract = make_contract()
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.patch(f"/api/contracts/{contract.id}/", {"items_snapshot": stale}, format="json")
+    assert resp.status_code == 200
+    rows = ContractItem.objects.filter(contract=contract).order_by("position")
+    assert [(row.product_id, row.slab_id) for row in rows] == [(product.id, slab.id), (None, None)]
+
+
+def test_product_sales_and_material_demand_aggregate_in_sql(users, make_contract, make_product):
+    granite, marble = make_product(name="Granit"), make_product(name="Mermer")
+    make_contract(
+        start_date=date(2026, 1, 10),
+        status="IMZALANDI",
+        items_snapshot=[_snapshot_entry(granite), _snapshot_entry(marble, quantity=2, total_price="1000.00")],
+    )
+    make_contract(start_date=date(2026, 2, 5), status="ACTIVE", items_snapshot=[_snapshot_entry(granite)])
+    make_contract(start_date=date(2026, 2, 6), status="CANCELLED", items_snapshot=[_snapshot_entry(granite)])
+    make_contract(start_date=date(2026, 5, 1), status="COMPLETED", items_snapshot=[_snapshot_entry(granite)])
+    call_command("backfill_contract_items")
+
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.get("/api/contracts/product-sales/", {"from": "2026-01-01", "to": "2026-03-31"})
+    assert resp.status_code == 200
+    rows = {row["product__name"]: row for row in resp.data}
+    assert rows["Granit"]["area_m2"] == Decimal("4.0000")
+    assert rows["Granit"]["contracts"] == 2
+    assert rows["Granit"]["revenue"] == Decimal("1000.00")
+    assert rows["Mermer"]["quantity"] == 2
+
+    client.force_authenticate(user=users["PRODUCTION"])
+    resp = client.get("/api/contracts/product-sales/", {"from": "2026-01-01"})
+    assert all("revenue" not in row for row in resp.data)
+
+    resp = client.get("/api/contracts/material-demand/")
+    assert resp.status_code == 200
+    demand = {row["product__name"]: row for row in resp.data}
+    assert demand["Granit"]["area_m2"] == Decimal("4.0000")
+    assert Decimal(demand["Granit"]["required_m2"]).quantize(Decimal("0.01")) == Decimal("4.40")
+
+    resp = client.get("/api/contracts/product-sales/", {"from": "31-01-2026"})
+    assert resp.status_code == 400
@@ -0,0 +1,62 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.core.utils.text import normalize_phone, normalize_tax_number
+from apps.crm.services import duplicate_customer_clusters
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "raw",
+    ["+90 (555) 123 45 67", "0555 123 45 67", "5551234567", "0090 555 1234567", "90-555-123-4567"],
+)
+def test_normalize_phone_variants(raw):
+    assert normalize_phone(raw) == "5551234567"
+
+
+def test_normalize_tax_number():
+    assert normalize_tax_number(" 123.456 789-0 ") == "1234567890"
+    assert normalize_tax_number("") == ""
+
+
+def test_create_rejects_formatted_duplicates(users, make_customer):
+    existing = make_customer(name="Mevcut", phone="0555 123 45 67", tax_number="123 456 7890")
+    assert existing.phone_normalized == "5551234567"
+
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.post("/api/customers/", {"name": "Yeni", "phone": "+905551234567"}, format="json")
+    assert resp.status_code == 400
+    assert "Mevcut" in resp.json()["phone"][0]
+
+    resp = client.post("/api/customers/", {"name": "Yeni", "phone": "5329998877", "tax_number": "1234567890"}, format="json")
+    assert resp.status_code == 400
+    assert "tax_number" in resp.json()
+
+    resp = client.patch(f"/api/customers/{existing.id}/", {"phone": "+90 555 123 4567"}, format="json")
+    assert resp.status_code == 200
+    existing.refresh_from_db()
+    assert existing.phone_normalized == "5551234567"
+
+
+def test_duplicate_report_groups_clusters(make_customer):
+    first = make_customer(phone="0555 000 11 22")
+    second = make_customer(phone="+90 555 000 1122")
+    make_customer(tax_number="11111111111")
+    make_customer(tax_number="111 111 111 11")
+    make_customer(phone="5559999999")
+
+    clusters = duplicate_customer_clusters()
+    assert len(clusters) == 2
+    phone_cluster = next(c for c in clusters if c["key"] == "phone_normalized")
+    assert [c["id"] for c in phone_cluster["customers"]] == [first.id, second.id]
+
+    out = StringIO()
+    call_command("report_duplicate_customers", "--json", stdout=out)
+    assert len(json.loads(out.getvalue())) == 2
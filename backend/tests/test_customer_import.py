@@ -0,0 +1,111 @@
+from io import BytesIO
+
+import openpyxl
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from apps.crm.models import Customer
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _xlsx(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile(
+        "musteriler.xlsx",
+        buffer.getvalue(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def test_xlsx_import_reports_rows_and_bulk_creates(users, make_customer, django_assert_max_num_queries):
+    make_customer(name="Mevcut", phone="05550000001")
+    rows = [["Müşteri Adı", "Telefon", "Vergi No", "E-posta", "Durum"]]
+    rows += [[f"Bayi Müşteri {i}", 5320000000 + i, None, f"m{i}@example.com", "Aktif / Çalışılıyor"] for i in range(40)]
+    rows += [
+        ["Tekrar", "+90 555 000 00 01", None, None, None],
+        ["", "5329999999", None, None, None],
+        ["Kötü Mail", "5328888888", None, "not-an-email", "UNKNOWN"],
+        ["Dosya İçi Tekrar", "0532 000 00 00", None, None, None],
+    ]
+
+    client = APIClient()
+    client.force_authenticate(user=users["SALES"])
+    with django_assert_max_num_queries(15):
+        resp = client.post("/api/customers/import/", {"file": _xlsx(rows)}, format="multipart")
+
+    assert resp.status_code == 201
+    report = resp.json()
+    assert report["total"] == 44
+    assert report["created"] == 40
+    assert {e["row"]: sorted(e["errors"]) for e in report["errors"]} == {
+        42: ["phone"],
+        43: ["name"],
+        44: ["email", "status"],
+        45: ["phone"],
+    }
+
+    imported = Customer.objects.filter(name__startswith="Bayi Müşteri")
+    assert imported.count() == 40
+    first = imported.get(name="Bayi Müşteri 0")
+    assert first.phone_normalized == "5320000000"
+    assert first.status == "ACTIVE"
+    assert first.owner == users["SALES"]
+    assert first.name_normalized == "bayi musteri 0"
+    numbers = sorted(imported.values_list("customer_number", flat=True))
+    assert numbers == list(range(numbers[0], numbers[0] + 40))
+    assert Customer.objects.create(name="Sonraki", phone="5000000000").customer_number == numbers[-1] + 1
+
+
+def test_csv_dry_run_creates_nothing(users):
+    content = "Ad;Telefon;Segment\nDeneme A.Ş.;0532 111 22 33;VIP\n".encode("utf-8")
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.post(
+        "/api/customers/import/",
+        {"file": SimpleUploadedFile("list.csv", content, content_type="text/csv"), "dry_run": "1"},
+        format="multipart",
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"total": 1, "created": 0, "errors": [], "dry_run": True}
+    assert not Customer.objects.exists()
+
+
+def test_import_rejects_unknown_files(users):
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.post(
+        "/api/customers/import/",
+        {"file": SimpleUploadedFile("list.txt", b"x", content_type="text/plain")},
+        format="multipart",
+    )
+    assert resp.status_code == 400
+    resp = client.post(
+        "/api/customers/import/",
+        {"file": SimpleUploadedFile("list.xlsx", b"not a zip", content_type="application/octet-stream")},
+        format="multipart",
+    )
+    assert resp.status_code == 400
+
+
+def test_single_column_csv_is_read_not_rejected(users):
+    # No delimiter to sniff: the file is still read and validated row by row.
+    content = "Ad\nTek Kolon Ltd.\nİkinci Firma\n".encode("utf-8")
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.post(
+        "/api/customers/import/",
+        {"file": SimpleUploadedFile("list.csv", content, content_type="text/csv"), "dry_run": "1"},
+        format="multipart",
+    )
+    assert resp.status_code == 200
+    assert resp.json()["total"] == 2
+    assert [error["row"] for error in resp.json()["errors"]] == [2, 3]
+    assert all(set(error["errors"]) == {"phone"} for error in resp.json()["errors"])
@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.core.models import SystemEvent
+from apps.crm.models import Appointment, Customer
+from apps.crm.services import merge_customers
+from apps.finance.models import Cheque, Transaction
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def duplicate_pair(make_customer, make_proposal, make_contract, make_transaction, make_cheque):
+    survivor = make_customer(name="Ahmet Yılmaz", phone="05551112233", email="")
+    duplicate = make_customer(name="Ahmet Yilmaz", phone="+905551112233", email="ahmet@example.com")
+    pending = make_contract(proposal=make_proposal(customer=duplicate), customer_name="Ahmet Yilmaz")
+    signed = make_contract(
+        proposal=make_proposal(customer=duplicate), customer_name="Ahmet Yilmaz", status="IMZALANDI"
+    )
+    Appointment.objects.create(customer=duplicate, date=date(2025, 5, 1))
+    for _ in range(3):
+        make_transaction(related_customer=duplicate, amount=Decimal("100.00"))
+    make_cheque(customer=duplicate, amount=Decimal("70.00"))
+    return survivor, duplicate, pending, signed
+
+
+def test_merge_repoints_everything_and_audits(duplicate_pair):
+    survivor, duplicate, pending, signed = duplicate_pair
+
+    moved = merge_customers(survivor, [duplicate])
+
+    assert moved == {"contracts": 1, "proposals": 2, "appointments": 1, "transactions": 3, "cheques": 1}
+    assert not Customer.objects.filter(pk=duplicate.pk).exists()
+    assert Transaction.objects.filter(related_customer=survivor).count() == 3
+    assert Cheque.objects.filter(received_from_customer=survivor).count() == 1
+    assert survivor.proposals.count() == 2
+
+    pending.refresh_from_db()
+    signed.refresh_from_db()
+    assert pending.customer_name == "Ahmet Yılmaz"
+    assert signed.customer_name == "Ahmet Yilmaz"
+
+    survivor.refresh_from_db()
+    assert survivor.email == "ahmet@example.com"
+    assert survivor.received_total == Decimal("300.00")
+    assert survivor.portfolio_cheque_total == Decimal("70.00")
+
+    event = SystemEvent.objects.get(event_type="CUSTOMER_MERGED")
+    assert event.payload["survivor_id"] == survivor.pk
+    assert event.payload["merged"][0]["id"] == duplicate.pk
+
+
+def test_merge_query_count_does_not_grow_with_rows(
+    duplicate_pair, make_transaction, django_assert_max_num_queries
+):
+    survivor, duplicate, _, _ = duplicate_pair
+    for _ in range(50):
+        make_transaction(related_customer=duplicate, amount=Decimal("10.00"))
+
+    with django_assert_max_num_queries(25):
+        moved = merge_customers(survivor, [duplicate])
+    assert moved["transactions"] == 53
+
+
+def test_merge_endpoint_is_admin_only(users, duplicate_pair):
+    survivor, duplicate, _, _ = duplicate_pair
+    client = APIClient()
+
+    client.force_authenticate(user=users["SALES"])
+    resp = client.post(f"/api/customers/{survivor.id}/merge/", {"duplicates": [duplicate.id]}, format="json")
+    assert resp.status_code in (403, 404)
+
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.post(f"/api/customers/{survivor.id}/merge/", {"duplicates": [survivor.id]}, format="json")
+    assert resp.status_code == 400
+
+    resp = client.post(f"/api/customers/{survivor.id}/merge/", {"duplicates": [duplicate.id]}, format="json")
+    assert resp.status_code == 200
+    assert resp.json()["moved"]["proposals"] == 2
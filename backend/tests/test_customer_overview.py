@@ -0,0 +1,99 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.crm.services import OVERVIEW_QUERY_BUDGET
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def busy_customer(users, make_customer, make_proposal, make_contract, make_payment_plan,
+                  make_account, make_transaction, make_cheque):
+    customer = make_customer(owner=users["SALES"])
+    account = make_account()
+    for i in range(15):
+        make_transaction(account=account, related_customer=customer, amount=Decimal("100.00"))
+    make_transaction(
+        account=None,
+        transaction_type="EXPENSE",
+        source_account=account,
+        target_account=None,
+        related_customer=customer,
+        amount=Decimal("250.00"),
+    )
+    for i in range(12):
+        make_cheque(customer=customer, due_date=timezone.localdate() + timedelta(days=i))
+    for i in range(3):
+        proposal = make_proposal(customer=customer)
+        contract = make_contract(proposal=proposal)
+        plan = make_payment_plan(
+            contract=contract, method="INSTALLMENT", installment_count=6, total_amount=Decimal("600.00")
+        )
+        plan.build_installments()
+    return customer
+
+
+def test_overview_stays_within_query_budget(users, busy_customer, django_assert_max_num_queries):
+    client = APIClient()
+    client.force_authenticate(user=users["FINANCE"])
+
+    with django_assert_max_num_queries(OVERVIEW_QUERY_BUDGET):
+        resp = client.get(f"/api/customers/{busy_customer.id}/overview/")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["balance"] == "1250.00"
+    sections = data["sections"]
+    assert len(sections["last_transactions"]["results"]) == 10
+    assert sections["last_transactions"]["next_offset"] == 10
+    assert len(sections["payment_installments"]["results"]) == 10
+    assert len(sections["contracts"]["results"]) == 3
+    assert sections["contracts"]["next_offset"] is None
+
+
+def test_overview_paginates_sections(users, busy_customer):
+    client = APIClient()
+    client.force_authenticate(user=users["FINANCE"])
+
+    resp = client.get(
+        f"/api/customers/{busy_customer.id}/overview/",
+        {"sections": "cheques", "limit": 5, "cheques_offset": 10},
+    )
+    data = resp.json()
+    assert set(data["sections"]) == {"cheques"}
+    assert "balance" not in data
+    assert len(data["sections"]["cheques"]["results"]) == 2
+    assert data["sections"]["cheques"]["next_offset"] is None
+
+
+def test_overview_skips_finance_sections_for_sales(users, busy_customer, django_assert_max_num_queries):
+    client = APIClient()
+    client.force_authenticate(user=users["SALES"])
+
+    with django_assert_max_num_queries(3):
+        resp = client.get(f"/api/customers/{busy_customer.id}/overview/")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert "balance" not in data
+    assert set(data["sections"]) == {"active_proposals", "contracts"}
+
+
+
+def test_detail_sections_match_overview(users, busy_customer, django_assert_max_num_queries):
+    client = APIClient()
+    client.force_authenticate(user=users["FINANCE"])
+
+    with django_assert_max_num_queries(OVERVIEW_QUERY_BUDGET):
+        detail = client.get(f"/api/customers/{busy_customer.id}/").json()
+    overview = client.get(f"/api/customers/{busy_customer.id}/overview/", {"limit": 50}).json()
+
+    sections = overview["sections"]
+    assert detail["last_transactions"] == sections["last_transactions"]["results"][:10]
+    for name in ("active_proposals", "contracts", "payment_installments", "cheques"):
+        assert detail[name] == sections[name]["results"]
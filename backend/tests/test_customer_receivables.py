@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.crm.models import Customer
+from apps.crm.services import reconcile_customer_receivables
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _totals(customer):
+    return Customer.objects.values(
+        "received_total", "open_installment_total", "portfolio_cheque_total", "exposure", "last_activity_date"
+    ).get(pk=customer.pk)
+
+
+def test_transactions_and_cheques_update_columns(make_customer, make_account, make_transaction, make_cheque):
+    customer = make_customer()
+    other = make_customer()
+    account = make_account()
+
+    txn = make_transaction(account=account, related_customer=customer, amount=Decimal("300.00"), date=date(2025, 3, 1))
+    make_transaction(
+        transaction_type="EXPENSE",
+        source_account=account,
+        target_account=None,
+        related_customer=customer,
+        amount=Decimal("50.00"),
+        date=date(2025, 2, 1),
+    )
+    cheque = make_cheque(customer=customer, amount=Decimal("400.00"))
+
+    totals = _totals(customer)
+    assert totals["received_total"] == Decimal("250.00")
+    assert totals["portfolio_cheque_total"] == Decimal("400.00")
+    assert totals["exposure"] == Decimal("400.00")
+    assert totals["last_activity_date"] == date(2025, 3, 1)
+
+    txn.amount = Decimal("500.00")
+    txn.save()
+    cheque.status = "COLLECTED"
+    cheque.save()
+    assert _totals(customer)["received_total"] == Decimal("450.00")
+    assert _totals(customer)["exposure"] == Decimal("0.00")
+
+    txn.related_customer = other
+    txn.save()
+    assert _totals(customer)["received_total"] == Decimal("-50.00")
+    assert _totals(other)["received_total"] == Decimal("500.00")
+
+    txn.delete()
+    assert _totals(other)["received_total"] == Decimal("0.00")
+
+
+def test_installments_update_open_total(make_customer, make_proposal, make_contract, make_payment_plan):
+    customer = make_customer()
+    contract = make_contract(proposal=make_proposal(customer=customer))
+    plan = make_payment_plan(
+        contract=contract, method="INSTALLMENT", installment_count=4, total_amount=Decimal("1000.00")
+    )
+    plan.build_installments()
+    assert _totals(customer)["open_installment_total"] == Decimal("1000.00")
+
+    first = plan.installments.order_by("installment_no").first()
+    first.status = "PAID"
+    first.save(update_fields=["status"])
+    totals = _totals(customer)
+    assert totals["open_installment_total"] == Decimal("750.00")
+    assert totals["exposure"] == Decimal("750.00")
+
+
+def test_reconcile_repairs_drift(make_customer, make_transaction, make_cheque):
+    customer = make_customer()
+    make_transaction(related_customer=customer, amount=Decimal("120.00"))
+    make_cheque(customer=customer, amount=Decimal("80.00"))
+    expected = _totals(customer)
+
+    Customer.objects.filter(pk=customer.pk).update(received_total=0, exposure=999)
+    assert reconcile_customer_receivables() == 1
+    assert _totals(customer) == expected
+    assert reconcile_customer_receivables() == 0
+
+    Customer.objects.filter(pk=customer.pk).update(portfolio_cheque_total=0)
+    call_command("reconcile_customer_receivables", customer=[customer.pk])
+    assert _totals(customer) == expected
+
+
+def test_exposure_filters_are_finance_only(users, make_customer, make_cheque):
+    risky = make_customer(owner=users["SALES"], risk_limit=Decimal("100.00"))
+    safe = make_customer(owner=users["SALES"], risk_limit=Decimal("1000.00"))
+    make_cheque(customer=risky, amount=Decimal("500.00"))
+    make_cheque(customer=safe, amount=Decimal("50.00"))
+
+    client = APIClient()
+    client.force_authenticate(user=users["FINANCE"])
+    resp = client.get("/api/customers/?over_risk_limit=1")
+    assert resp.status_code == 200
+    assert [row["id"] for row in resp.json()] == [risky.id]
+    assert resp.json()[0]["exposure"] == "500.00"
+
+    resp = client.get("/api/customers/?ordering=-exposure")
+    assert [row["id"] for row in resp.json()][:2] == [risky.id, safe.id]
+    assert client.get("/api/customers/?min_exposure=abc").status_code == 400
+
+    client.force_authenticate(user=users["SALES"])
+    resp = client.get("/api/customers/?over_risk_limit=1")
+    ids = [row["id"] for row in resp.json()]
+    assert safe.id in ids
+    assert "exposure" not in resp.json()[0]
@@ -0,0 +1,66 @@
+import pytest
+from rest_framework.test import APIClient
+
+from apps.core.models import User
+from apps.core.utils.text import normalize_search_text
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_normalize_search_text_folds_turkish_letters():
+    assert normalize_search_text("  ŞAHİN   Çelik Ltd. ") == "sahin celik ltd."
+    assert normalize_search_text("Işıl Öğüt") == "isil ogut"
+
+
+def test_search_matches_name_phone_tax_and_number(users, make_customer):
+    admin = users["ADMIN"]
+    sahin = make_customer(name="Şahin Mermer", phone="5321112233", tax_number="1234567890")
+    make_customer(name="Yılmaz İnşaat", phone="5449998877")
+    sahin.refresh_from_db()
+    assert sahin.name_normalized == "sahin mermer"
+
+    client = APIClient()
+    client.force_authenticate(user=admin)
+
+    def ids(query):
+        resp = client.get("/api/customers/", {"search": query})
+        assert resp.status_code == 200
+        return [row["id"] for row in resp.json()]
+
+    assert ids("sahin") == [sahin.id]
+    assert ids("ŞAH") == [sahin.id]
+    assert ids("532 111") == [sahin.id]
+    assert ids("123456") == [sahin.id]
+    assert sahin.id in ids(str(sahin.customer_number))
+    assert ids("zzz") == []
+
+
+def test_filters_pagination_and_lookup(users, make_customer):
+    sales = users["SALES"]
+    other = User.objects.create_user(username="sales_search", password="pass", role="SALES")
+    for i in range(5):
+        make_customer(name=f"Aktif {i}", status="ACTIVE", segment="VIP", owner=sales)
+    make_customer(name="Aktif Diğer", status="ACTIVE", owner=other)
+    make_customer(name="Pasif", status="PASSIVE", owner=sales)
+
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.get("/api/customers/", {"status": "ACTIVE", "owner": sales.id, "page": 1, "page_size": 2})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["count"] == 5
+    assert len(data["results"]) == 2
+    assert data["next"]
+
+    # No ?page= keeps the plain list response.
+    resp = client.get("/api/customers/", {"segment": "VIP"})
+    assert isinstance(resp.json(), list)
+    assert len(resp.json()) == 5
+
+    client.force_authenticate(user=sales)
+    resp = client.get("/api/customers/lookup/", {"q": "akt"})
+    assert resp.status_code == 200
+    rows = resp.json()
+    assert len(rows) == 5
+    assert set(rows[0]) == {"id", "customer_number", "name", "phone", "status_color"}
@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.production.management.commands.benchmark_nesting import load_jobs
+from apps.production.nesting import GUILLOTINE, MAXRECTS, plan_cuts
+from apps.production.services import sync_contract_items
+
+
+def _assert_valid_layout(plan, kerf=Decimal("0.4")):
+    for layout in plan["layouts"]:
+        rects = []
+        for p in layout["placements"]:
+            assert p["x"] >= 0 and p["y"] >= 0
+            assert p["x"] + p["width"] <= layout["width"]
+            assert p["y"] + p["length"] <= layout["length"]
+            rects.append((p["x"], p["y"], p["x"] + p["width"] + kerf, p["y"] + p["length"] + kerf))
+        for i, a in enumerate(rects):
+            for b in rects[i + 1 :]:
+                assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1], (a, b)
+
+
+@pytest.mark.parametrize("method", [MAXRECTS, GUILLOTINE])
+def test_benchmark_jobs_produce_valid_layouts(method):
+    for job in load_jobs():
+        expected = sum(row.get("quantity", 1) for row in job["pieces"])
+        plan = plan_cuts(job["pieces"], job["slabs"], time_limit=0, methods=(method,))
+
+        placed = sum(len(layout["placements"]) for layout in plan["layouts"])
+        assert placed == expected and plan["unplaced"] == [], job["name"]
+        assert len({layout["slab"] for layout in plan["layouts"]}) == plan["slab_count"]
+        assert 0 <= plan["waste_percent"] < 100
+        _assert_valid_layout(plan)
+
+
+def test_large_job_is_planned_within_time_limit():
+    job = next(job for job in load_jobs() if len(job["slabs"]) == 100)
+    started = time.monotonic()
+    plan = plan_cuts(job["pieces"], job["slabs"], time_limit=1.0)
+    assert time.monotonic() - started < 3
+    assert plan["unplaced"] == []
+    _assert_valid_layout(plan)
+    # Remnants are consumed first, full slabs only as needed.
+    assert plan["slab_count"] < 60
+
+
+def test_rotation_and_kerf_are_respected():
+    slabs = [{"key": "S", "width": 100, "length": 200}]
+    plan = plan_cuts([{"key": 1, "width": 200, "length": 100}], slabs, time_limit=0)
+    assert plan["layouts"][0]["placements"][0]["rotated"] is True
+
+    plan = plan_cuts([{"key": 1, "width": 200, "length": 100, "rotatable": False}], slabs, time_limit=0)
+    assert plan["slab_count"] == 0 and len(plan["unplaced"]) == 1
+
+    # Two 50 cm halves fit exactly only when there is no saw kerf.
+    halves = [{"key": 1, "width": 50, "length": 200, "quantity": 2}]
+    assert plan_cuts(halves, slabs, kerf_mm=0, time_limit=0)["waste_percent"] == Decimal("0.00")
+    assert len(plan_cuts(halves, slabs, kerf_mm=4, time_limit=0)["unplaced"]) == 1
+
+
+@pytest.mark.django_db
+def test_proposal_cutting_plan_uses_free_stock(
+    users, make_proposal, make_proposal_item, make_product, make_slab, make_contract
+):
+    product = make_product()
+    proposal = make_proposal(owner=users["SALES"])
+    item = make_proposal_item(
+        proposal=proposal, product=product, width=Decimal("60.00"), length=Decimal("90.00"), quantity=3
+    )
+    no_size = make_proposal_item(
+        proposal=proposal,
+        product=product,
+        width=Decimal("0"),
+        length=Decimal("0"),
+        total_measure=Decimal("2.50"),
+        total_unit="MTUL",
+    )
+    remnant = make_slab(product=product, width=Decimal("70.00"), length=Decimal("190.00"), status="PART_STOCK")
+    full = make_slab(product=product, width=Decimal("180.00"), length=Decimal("300.00"))
+    make_slab(
+        product=product,
+        width=Decimal("70.00"),
+        length=Decimal("100.00"),
+        soft_reserved_for=make_contract(),
+        soft_reserved_until=timezone.now() + timedelta(days=1),
+    )
+    make_slab(product=product, status="USED")
+
+    client = APIClient()
+    client.force_authenticate(user=users["SALES"])
+    resp = client.get(f"/api/proposals/{proposal.id}/cutting-plan/", {"time_limit": "0.2"})
+    assert resp.status_code == 200, resp.data
+
+    assert resp.data["skipped"] == [no_size.id]
+    (plan,) = resp.data["plans"]
+    assert plan["product"] == product.id
+    assert [layout["slab"] for layout in plan["layouts"]] == [remnant.id, full.id]
+    assert plan["layouts"][0]["barcode"] == remnant.barcode
+    assert {p["key"] for layout in plan["layouts"] for p in layout["placements"]} == {item.id}
+
+    resp = client.get(f"/api/proposals/{proposal.id}/cutting-plan/", {"time_limit": "60", "method": "x"})
+    assert resp.status_code == 400
+    assert {"time_limit", "method"} <= set(resp.data)
+
+
+@pytest.mark.django_db
+def test_contract_cutting_plan_may_use_its_own_soft_reserved_slabs(users, make_contract, make_product, make_slab):
+    product = make_product()
+    contract = make_contract(
+        owner=users["SALES"],
+        items_snapshot=[{"product_id": product.id, "width": "60", "length": "120", "quantity": 2}],
+    )
+    sync_contract_items(contract, created=True)
+    slab = make_slab(
+        product=product,
+        width=Decimal("130.00"),
+        length=Decimal("130.00"),
+        soft_reserved_for=contract,
+        soft_reserved_until=timezone.now() + timedelta(days=1),
+    )
+
+    client = APIClient()
+    client.force_authenticate(user=users["PRODUCTION"])
+    resp = client.get(f"/api/contracts/{contract.id}/cutting-plan/", {"time_limit": "0"})
+    assert resp.status_code == 200, resp.data
+    (plan,) = resp.data["plans"]
+    assert plan["slab_count"] == 1
+    assert plan["layouts"][0]["slab"] == slab.id
+    assert len(plan["layouts"][0]["placements"]) == 2
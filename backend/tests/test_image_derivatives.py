@@ -0,0 +1,92 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.core import jobs
+from apps.core.images import IMAGE_JOB, derivative_path
+from apps.core.models import Job
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _run_queued_jobs():
+    for job_id in jobs.claim_jobs("test", limit=50):
+        assert jobs.execute_job(job_id) == "DONE"
+
+
+def _upload_photo(size=(2400, 1600)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (120, 90, 60)).save(buffer, format="JPEG")
+    return default_storage.save("uploads/photo.jpg", ContentFile(buffer.getvalue()))
+
+
+def test_slab_photo_gets_thumbnail_in_background(users, make_slab):
+    slab = make_slab()
+    path = _upload_photo()
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+
+    resp = client.patch(f"/api/slabs/{slab.id}/", {"photo_path": path}, format="json")
+    assert resp.status_code == 200
+    # Until the worker runs, the original is served.
+    assert resp.data["thumbnail_url"] == resp.data["photo_url"]
+    assert Job.objects.filter(name=IMAGE_JOB, status="QUEUED").count() == 1
+
+    _run_queued_jobs()
+    thumb = derivative_path(path, "thumb")
+    with default_storage.open(thumb, "rb") as fh, Image.open(fh) as image:
+        assert max(image.size) == 320
+    with default_storage.open(derivative_path(path, "medium"), "rb") as fh, Image.open(fh) as image:
+        assert image.size == (1280, 853)
+
+    resp = client.get(f"/api/slabs/{slab.id}/")
+    assert resp.data["thumbnail_url"].endswith(default_storage.url(thumb))
+    assert resp.data["medium_url"].endswith(default_storage.url(derivative_path(path, "medium")))
+
+    # Saving unrelated fields does not queue anything new.
+    slab.refresh_from_db()
+    slab.warehouse_location = "B-3"
+    slab.save(update_fields=["warehouse_location"])
+    slab.save()
+    assert not Job.objects.filter(name=IMAGE_JOB, status="QUEUED").exists()
+
+    resp = client.patch(f"/api/slabs/{slab.id}/", {"photo_path": ""}, format="json")
+    assert resp.status_code == 200
+    assert resp.data["thumbnail_url"] is None
+    assert not default_storage.exists(path)
+    assert not default_storage.exists(thumb)
+
+
+def test_cheque_photos_and_backfill_command(users, make_cheque):
+    cheque = make_cheque()
+    front, back = _upload_photo(), _upload_photo((300, 200))
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+
+    resp = client.patch(
+        f"/api/cheques/{cheque.id}/", {"photo_front_path": front, "photo_back_path": back}, format="json"
+    )
+    assert resp.status_code == 200
+    assert Job.objects.filter(name=IMAGE_JOB).count() == 2
+    Job.objects.all().delete()
+
+    call_command("generate_image_derivatives", "--sync")
+    resp = client.get(f"/api/cheques/{cheque.id}/")
+    assert resp.data["photo_front_thumbnail_url"].endswith(default_storage.url(derivative_path(front, "thumb")))
+    # Small originals are not upscaled.
+    with default_storage.open(derivative_path(back, "medium"), "rb") as fh, Image.open(fh) as image:
+        assert image.size == (300, 200)
+
+    call_command("generate_image_derivatives")
+    assert not Job.objects.filter(name=IMAGE_JOB).exists()
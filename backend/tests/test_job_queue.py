@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core import jobs
+from apps.core.models import Job
+
+
+pytestmark = pytest.mark.django_db
+
+CALLS = []
+
+
+@jobs.register("tests.record")
+def _record(value=None):
+    CALLS.append(value)
+
+
+@jobs.register("tests.fail")
+def _fail():
+    raise RuntimeError("boom")
+
+
+@jobs.register("tests.reclaimed_while_running")
+def _reclaimed_while_running():
+    # What claim_jobs does when this run looks stale to another worker.
+    Job.objects.filter(name="tests.reclaimed_while_running").update(
+        locked_by="w2", locked_at=timezone.now(), attempts=F("attempts") + 1
+    )
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    CALLS.clear()
+
+
+def test_enqueue_rejects_unknown_jobs():
+    with pytest.raises(ValueError):
+        jobs.enqueue("tests.does_not_exist")
+
+
+def test_claim_orders_by_priority_and_skips_future_jobs():
+    low = jobs.enqueue("tests.record", {"value": "low"})
+    high = jobs.enqueue("tests.record", {"value": "high"}, priority=5)
+    later = jobs.enqueue("tests.record", {"value": "later"}, delay=timedelta(hours=1))
+
+    claimed = jobs.claim_jobs("w1", limit=10)
+    assert claimed == [high.id, low.id]
+    assert jobs.claim_jobs("w2", limit=10) == []
+
+    later.refresh_from_db()
+    assert later.status == "QUEUED"
+    assert Job.objects.get(id=high.id).locked_by == "w1"
+
+
+def test_failed_job_is_retried_with_backoff_then_marked_failed():
+    job = jobs.enqueue("tests.fail", max_attempts=2)
+
+    jobs.claim_jobs("w1")
+    assert jobs.execute_job(job.id) == "QUEUED"
+    job.refresh_from_db()
+    assert job.attempts == 1
+    assert job.run_at > timezone.now() + timedelta(seconds=20)
+    assert "boom" in job.last_error
+
+    jobs.claim_jobs("w1", now=job.run_at)
+    assert jobs.execute_job(job.id) == "FAILED"
+    job.refresh_from_db()
+    assert job.status == "FAILED"
+    assert job.finished_at is not None
+
+
+def test_stale_running_job_is_reclaimed():
+    job = jobs.enqueue("tests.record")
+    jobs.claim_jobs("dead-worker")
+    Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+
+    assert jobs.claim_jobs("w2") == [job.id]
+
+
+def test_reclaimed_job_outcome_is_not_overwritten_by_slow_worker():
+    job = jobs.enqueue("tests.reclaimed_while_running")
+    jobs.claim_jobs("slow-worker")
+
+    assert jobs.execute_job(job.id) is None
+    job.refresh_from_db()
+    assert job.status == "RUNNING"
+    assert job.locked_by == "w2"
+    assert job.finished_at is None
+
+
+def test_run_worker_once_inline():
+    jobs.enqueue("tests.record", {"value": 1})
+    jobs.enqueue("tests.record", {"value": 2})
+
+    call_command("run_worker", "--once", "--processes", "0")
+
+    assert sorted(CALLS) == [1, 2]
+    assert Job.objects.filter(status="DONE").count() == 2
+
+
+def test_maintenance_commands_are_registered():
+    names = jobs.registered_jobs()
+    assert "inventory.release_expired_reservations" in names
+    assert "finance.check_cheque_due" in names
+    assert "finance.dispatch_payment_reminders" in names
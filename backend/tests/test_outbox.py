@@ -0,0 +1,147 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.core import jobs, outbox
+from apps.core.models import Job, Notification, OutboxMessage, Task
+from apps.crm.models import OfferAuditLog
+
+
+pytestmark = pytest.mark.django_db
+
+DELIVERED = []
+
+
+@outbox.subscriber("tests.record")
+def _record(payloads):
+    DELIVERED.append([payload["value"] for payload in payloads])
+
+
+@outbox.subscriber("tests.flaky")
+def _flaky(payloads):
+    for payload in payloads:
+        if payload["value"] == "bad":
+            raise RuntimeError("boom")
+        Notification.objects.create(recipient_role="ADMIN", title="flaky", message=payload["value"])
+
+
+@pytest.fixture(autouse=True)
+def _reset_delivered():
+    DELIVERED.clear()
+
+
+def test_publish_relays_after_commit_and_only_once(settings, django_capture_on_commit_callbacks):
+    settings.OUTBOX_RELAY_ON_COMMIT = True
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        message = outbox.publish("tests.record", {"value": 1})
+    assert DELIVERED == []
+    assert len(callbacks) == 1
+
+    callbacks[0]()
+    message.refresh_from_db()
+    assert message.status == "DONE"
+    assert DELIVERED == [[1]]
+
+    assert outbox.relay_outbox() == {}
+    assert DELIVERED == [[1]]
+
+
+def test_publish_queues_one_relay_job_by_default(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        outbox.publish("tests.record", {"value": 1})
+        outbox.publish("tests.record", {"value": 2})
+    assert DELIVERED == []
+    assert Job.objects.filter(name="core.relay_outbox", status="QUEUED").count() == 1
+
+    for job_id in jobs.claim_jobs("test"):
+        assert jobs.execute_job(job_id) == "DONE"
+    assert DELIVERED == [[1, 2]]
+    assert not OutboxMessage.objects.filter(status="PENDING").exists()
+
+
+def test_relay_delivers_topics_in_batches(settings):
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    for value in range(5):
+        outbox.publish("tests.record", {"value": value})
+
+    counts = outbox.relay_outbox(batch_size=3)
+
+    assert counts == {"DONE": 5}
+    assert DELIVERED == [[0, 1, 2], [3, 4]]
+
+
+def test_failing_message_is_isolated_and_retried(settings):
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    good = outbox.publish("tests.flaky", {"value": "good"})
+    bad = outbox.publish("tests.flaky", {"value": "bad"})
+
+    assert outbox.relay_outbox() == {"DONE": 1, "PENDING": 1}
+    good.refresh_from_db()
+    bad.refresh_from_db()
+    assert good.status == "DONE"
+    assert bad.status == "PENDING"
+    assert bad.attempts == 1
+    assert "boom" in bad.last_error
+    assert bad.available_at > good.processed_at
+    assert list(Notification.objects.filter(title="flaky").values_list("message", flat=True)) == ["good"]
+
+    bad.attempts = outbox.MAX_ATTEMPTS - 1
+    bad.save(update_fields=["attempts"])
+    assert outbox.relay_outbox(now=bad.available_at) == {"FAILED": 1}
+
+
+def test_dedupe_key_drops_second_message(settings):
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    outbox.publish("tests.record", {"value": 1}, dedupe_key="k")
+    outbox.publish("tests.record", {"value": 2}, dedupe_key="k")
+
+    assert OutboxMessage.objects.filter(dedupe_key="k").count() == 1
+
+
+def test_pay_installment_notifies_through_outbox(
+    users, make_payment_plan, make_account, settings, django_capture_on_commit_callbacks
+):
+    settings.OUTBOX_RELAY_ON_COMMIT = True
+    plan = make_payment_plan()
+    plan.build_installments()
+    installment = plan.installments.first()
+    account = make_account()
+
+    client = APIClient()
+    client.force_authenticate(user=users["FINANCE"])
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = client.post(
+            f"/api/payment-plans/{plan.id}/pay-installment/",
+            {"installment_id": installment.id, "target_account_id": account.id},
+            format="json",
+        )
+    assert resp.status_code == 200
+    assert not Notification.objects.filter(title="Taksit tahsil edildi").exists()
+    assert OutboxMessage.objects.filter(topic="core.notification", status="PENDING").count() == 1
+
+    for callback in callbacks:
+        callback()
+    roles = set(Notification.objects.filter(title="Taksit tahsil edildi").values_list("recipient_role", flat=True))
+    assert roles == {"FINANCE", "ADMIN"}
+
+
+def test_finalize_bookkeeping_is_applied_by_relay(users, make_proposal, make_proposal_item, settings):
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales, total_amount=Decimal("100.00"))
+    make_proposal_item(proposal=proposal)
+
+    client = APIClient()
+    client.force_authenticate(user=sales)
+    resp = client.post(f"/api/proposals/{proposal.id}/finalize/", {}, format="json")
+    assert resp.status_code == 200
+    assert not OfferAuditLog.objects.filter(proposal=proposal).exists()
+    assert OutboxMessage.objects.filter(topic="crm.proposal_finalized", status="PENDING").count() == 1
+
+    assert outbox.relay_outbox() == {"DONE": 1}
+    assert OfferAuditLog.objects.filter(proposal=proposal).count() == 7
+    task = Task.objects.get(source_type="PROPOSAL", source_id=proposal.id)
+    assert task.assigned_to == sales
+    assert OfferAuditLog.objects.get(proposal=proposal, action="TASK").metadata == {"task_id": task.id}
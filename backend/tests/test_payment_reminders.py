@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core.models import Notification
+from apps.finance.models import PaymentReminder
+from apps.finance.services import dispatch_due_reminders, generate_payment_reminders
+
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, reminders):
+        self.sent.extend(reminders)
+
+
+def _plan_due_in(make_payment_plan, days, **kwargs):
+    plan = make_payment_plan(
+        total_amount=Decimal("300.00"),
+        first_due_date=timezone.localdate() + timedelta(days=days),
+        **kwargs,
+    )
+    plan.build_installments()
+    return plan
+
+
+def test_generate_reminders_is_idempotent(make_payment_plan):
+    _plan_due_in(make_payment_plan, 2)
+    _plan_due_in(make_payment_plan, 30)
+
+    created = generate_payment_reminders(days_ahead=7, lead_days=(3, 0))
+    assert created == 2
+    assert generate_payment_reminders(days_ahead=7, lead_days=(3, 0)) == 0
+    assert PaymentReminder.objects.count() == 2
+
+
+def test_dispatch_sends_due_reminders_in_bulk(make_payment_plan):
+    plan = _plan_due_in(make_payment_plan, 0)
+    installment = plan.installments.get()
+    now = timezone.now()
+    due = [
+        PaymentReminder.objects.create(installment=installment, run_at=now - timedelta(minutes=i), message=f"M{i}")
+        for i in range(1, 4)
+    ]
+    future = PaymentReminder.objects.create(installment=installment, run_at=now + timedelta(days=1))
+
+    channel = RecordingChannel()
+    sent, cancelled = dispatch_due_reminders(batch_size=2, channel=channel, now=now)
+    assert (sent, cancelled) == (2, 0)
+    sent, cancelled = dispatch_due_reminders(batch_size=2, channel=channel, now=now)
+    assert (sent, cancelled) == (1, 0)
+    assert dispatch_due_reminders(batch_size=2, channel=channel, now=now) == (0, 0)
+
+    assert {r.id for r in channel.sent} == {r.id for r in due}
+    assert PaymentReminder.objects.filter(status="SENT", sent_at__isnull=False).count() == 3
+    future.refresh_from_db()
+    assert future.status == "PENDING"
+
+
+def test_dispatch_cancels_reminders_for_settled_installments(make_payment_plan):
+    plan = _plan_due_in(make_payment_plan, 0)
+    installment = plan.installments.get()
+    reminder = PaymentReminder.objects.create(installment=installment, run_at=timezone.now() - timedelta(hours=1))
+    installment.status = "PAID"
+    installment.save(update_fields=["status"])
+
+    channel = RecordingChannel()
+    assert dispatch_due_reminders(channel=channel) == (0, 1)
+    reminder.refresh_from_db()
+    assert reminder.status == "CANCELLED"
+    assert channel.sent == []
+
+
+def test_dispatch_command_creates_notifications(make_payment_plan):
+    _plan_due_in(make_payment_plan, 0)
+
+    call_command("dispatch_payment_reminders", "--generate")
+
+    assert PaymentReminder.objects.filter(status="SENT").exists()
+    assert Notification.objects.filter(title="Taksit hatırlatması", recipient_role="FINANCE").exists()
@@ -0,0 +1,137 @@
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.core import jobs
+from apps.core.models import Job
+from apps.core.pdf import PdfRendererUnavailable, weasyprint_renderer
+
+
+pytestmark = pytest.mark.django_db
+
+RENDERED = []
+
+
+def fake_renderer(html, base_url=None):
+    RENDERED.append(html)
+    return b"%PDF-1.4 " + html.encode("utf-8")[:64]
+
+
+@pytest.fixture(autouse=True)
+def _pdf_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.PDF_RENDERER = fake_renderer
+    RENDERED.clear()
+
+
+def _run_queued_jobs():
+    for job_id in jobs.claim_jobs("test", limit=50):
+        assert jobs.execute_job(job_id) == "DONE"
+
+
+def test_proposal_pdf_is_rendered_in_background_and_cached(users, make_proposal, make_proposal_item):
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales)
+    item = make_proposal_item(proposal=proposal, description="Mutfak Tezgahı")
+    client = APIClient()
+    client.force_authenticate(user=sales)
+    url = f"/api/proposals/{proposal.id}/pdf/"
+
+    resp = client.get(url)
+    assert resp.status_code == 202
+    first_hash = resp.data["hash"]
+    client.get(url)
+    assert Job.objects.filter(name="crm.render_proposal_pdf", status="QUEUED").count() == 1
+    assert RENDERED == []
+
+    _run_queued_jobs()
+    assert len(RENDERED) == 1
+    assert "Mutfak Tezgahı" in RENDERED[0]
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.data["status"] == "ready"
+    assert resp.data["hash"] == first_hash
+    resp = client.get(url, {"download": "1"})
+    assert resp["Content-Type"] == "application/pdf"
+    assert b"".join(resp.streaming_content).startswith(b"%PDF")
+
+    item.description = "Banyo Tezgahı"
+    item.save()
+    resp = client.get(url)
+    assert resp.status_code == 202
+    assert resp.data["hash"] != first_hash
+
+    _run_queued_jobs()
+    assert len(RENDERED) == 2
+    _, files = default_storage.listdir(f"pdf/proposal/{proposal.id}")
+    assert files == [f"{resp.data['hash']}.pdf"]
+
+
+def test_render_contract_pdfs_command_skips_unchanged(make_contract, users):
+    in_period = [
+        make_contract(start_date=date(2026, 3, day), items_snapshot=[{"description": f"Kalem {day}"}])
+        for day in (1, 15)
+    ]
+    make_contract(start_date=date(2026, 4, 1))
+
+    call_command("render_contract_pdfs", "--from", "2026-03-01", "--to", "2026-03-31", "--processes", "0")
+    assert len(RENDERED) == 2
+    for contract in in_period:
+        _, files = default_storage.listdir(f"pdf/contract/{contract.id}")
+        assert len(files) == 1
+
+    call_command("render_contract_pdfs", "--from", "2026-03-01", "--to", "2026-03-31", "--processes", "0")
+    assert len(RENDERED) == 2
+
+    in_period[0].total_amount = Decimal("999.00")
+    in_period[0].save(update_fields=["total_amount"])
+    call_command("render_contract_pdfs", "--from", "2026-03-01", "--to", "2026-03-31", "--processes", "0")
+    assert len(RENDERED) == 3
+
+    client = APIClient()
+    client.force_authenticate(user=users["ADMIN"])
+    resp = client.get(f"/api/contracts/{in_period[1].id}/pdf/")
+    assert resp.status_code == 200
+    assert resp.data["status"] == "ready"
+
+
+def test_weasyprint_renderer_reports_missing_dependency(monkeypatch):
+    monkeypatch.setitem(sys.modules, "weasyprint", None)
+
+    with pytest.raises(PdfRendererUnavailable):
+        weasyprint_renderer("<p>x</p>")
+
+
+def test_contract_pdf_for_production_has_no_prices(users, make_contract):
+    contract = make_contract(
+        total_amount=Decimal("4321.00"),
+        items_snapshot=[{"description": "Tezgah", "unit_price": "987.65", "total_price": "1975.30", "quantity": 2}],
+    )
+    production, admin = APIClient(), APIClient()
+    production.force_authenticate(user=users["PRODUCTION"])
+    admin.force_authenticate(user=users["ADMIN"])
+    url = f"/api/contracts/{contract.id}/pdf/"
+
+    assert production.get(url).status_code == 202
+    assert admin.get(url).status_code == 202
+    _run_queued_jobs()
+    assert len(RENDERED) == 2
+    priced = next(html for html in RENDERED if "987.65" in html)
+    assert "4321.00" in priced
+    masked = next(html for html in RENDERED if html is not priced)
+    for amount in ("987.65", "1975.30", "4321.00", "Birim Fiyat", "Genel Toplam"):
+        assert amount not in masked
+    assert "Tezgah" in masked
+
+    resp = production.get(url, {"download": "1"})
+    assert resp.status_code == 200
+    body = b"".join(resp.streaming_content)
+    assert b"987.65" not in body
+    assert production.get(url).data["hash"] != admin.get(url).data["hash"]
+    assert default_storage.listdir(f"pdf/contract/{contract.id}")[1] != []
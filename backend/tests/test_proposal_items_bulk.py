@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.crm.models import ProposalItem
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _measured_item(product, quantity=1, **kwargs):
+    return {
+        "product": product.id,
+        "description": "Tezgah",
+        "total_measure": "2.50",
+        "total_unit": "MTUL",
+        "quantity": quantity,
+        "unit_price": "100.00",
+        **kwargs,
+    }
+
+
+def test_put_items_replaces_list_and_updates_total_once(
+    users, make_proposal, make_proposal_item, make_product, django_assert_max_num_queries
+):
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales)
+    kept = make_proposal_item(proposal=proposal, width=Decimal("100.00"), length=Decimal("100.00"))
+    dropped = make_proposal_item(proposal=proposal)
+    product = make_product()
+
+    entries = [{"id": kept.id, "quantity": 3}] + [_measured_item(product) for _ in range(40)]
+    with django_assert_max_num_queries(15):
+        resp = _client(sales).put(f"/api/proposals/{proposal.id}/items/", entries, format="json")
+    assert resp.status_code == 200, resp.data
+
+    assert not ProposalItem.objects.filter(id=dropped.id).exists()
+    kept.refresh_from_db()
+    assert kept.quantity == 3
+    # 1 m² x 3 x 100 + 10% fire
+    assert kept.total_price == Decimal("330.00")
+    assert ProposalItem.objects.filter(proposal=proposal).count() == 41
+    assert len(resp.data["items"]) == 41
+    proposal.refresh_from_db()
+    assert proposal.total_amount == Decimal("330.00") + 40 * Decimal("250.00")
+
+
+def test_put_items_upsert_keeps_unlisted_items(users, make_proposal, make_proposal_item, make_product):
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales)
+    existing = make_proposal_item(proposal=proposal, width=Decimal("100.00"), length=Decimal("100.00"))
+    product = make_product()
+
+    resp = _client(sales).put(
+        f"/api/proposals/{proposal.id}/items/?mode=upsert", {"items": [_measured_item(product)]}, format="json"
+    )
+    assert resp.status_code == 200
+
+    assert ProposalItem.objects.filter(proposal=proposal).count() == 2
+    assert ProposalItem.objects.filter(id=existing.id).exists()
+    proposal.refresh_from_db()
+    assert proposal.total_amount == Decimal("110.00") + Decimal("250.00")
+
+
+def test_put_items_rejects_invalid_entries_without_writing(users, make_proposal, make_proposal_item, make_product):
+    sales = users["SALES"]
+    proposal = make_proposal(owner=sales)
+    item = make_proposal_item(proposal=proposal)
+    foreign = make_proposal_item(proposal=make_proposal(owner=sales))
+    product = make_product()
+    client = _client(sales)
+
+    resp = client.put(
+        f"/api/proposals/{proposal.id}/items/",
+        [_measured_item(product), {"description": "fiyatsız"}],
+        format="json",
+    )
+    assert resp.status_code == 400
+    assert resp.data["items"][0] == {}
+    assert "unit_price" in resp.data["items"][1]
+
+    resp = client.put(f"/api/proposals/{proposal.id}/items/", [{"id": foreign.id, "quantity": 2}], format="json")
+    assert resp.status_code == 400
+    assert list(ProposalItem.objects.filter(proposal=proposal).values_list("id", flat=True)) == [item.id]
+    foreign.refresh_from_db()
+    assert foreign.quantity == 1
+
+
+def test_put_items_is_scoped_to_sales_owner(users, make_user, make_proposal, make_product):
+    proposal = make_proposal(owner=make_user("SALES"))
+
+    resp = _client(users["SALES"]).put(
+        f"/api/proposals/{proposal.id}/items/", [_measured_item(make_product())], format="json"
+    )
+    assert resp.status_code == 404
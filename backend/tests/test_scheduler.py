@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core import jobs
+from apps.core.models import ScheduledTaskRun
+from apps.core.scheduler import CronSchedule, PeriodicTask, run_due_tasks
+
+
+pytestmark = pytest.mark.django_db
+
+CALLS = []
+
+
+@jobs.register("tests.scheduled")
+def _scheduled(**kwargs):
+    CALLS.append(kwargs)
+
+
+@jobs.register("tests.scheduled_fail")
+def _scheduled_fail():
+    raise RuntimeError("scheduled boom")
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    CALLS.clear()
+
+
+def _aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+def test_cron_next_after():
+    daily = CronSchedule("0 8 * * *")
+    assert daily.next_after(_aware(2025, 1, 1, 7, 59)) == _aware(2025, 1, 1, 8, 0)
+    assert daily.next_after(_aware(2025, 1, 1, 8, 0)) == _aware(2025, 1, 2, 8, 0)
+
+    every_15 = CronSchedule("*/15 9-17 * * 1-5")
+    # 2025-01-04 is a Saturday -> next Monday 09:00
+    assert every_15.next_after(_aware(2025, 1, 3, 17, 50)) == _aware(2025, 1, 6, 9, 0)
+    assert every_15.next_after(_aware(2025, 1, 6, 9, 7)) == _aware(2025, 1, 6, 9, 15)
+
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+
+
+def test_interval_task_runs_once_per_interval():
+    task = PeriodicTask(name="t", job="tests.scheduled", interval=300, payload={"x": 1})
+    started_at = timezone.now()
+
+    runs = run_due_tasks([task], started_at=started_at)
+    assert len(runs) == 1
+    assert runs[0].status == "SUCCESS"
+    assert runs[0].duration_ms is not None
+    assert CALLS == [{"x": 1}]
+
+    assert run_due_tasks([task], started_at=started_at) == []
+    assert run_due_tasks([task], started_at=started_at, now=timezone.now() + timedelta(seconds=301))
+    assert len(CALLS) == 2
+
+
+def test_cron_task_waits_for_next_fire_time():
+    task = PeriodicTask(name="c", job="tests.scheduled", cron="0 8 * * *")
+    started_at = _aware(2025, 1, 1, 7, 0)
+
+    assert run_due_tasks([task], started_at=started_at, now=_aware(2025, 1, 1, 7, 30)) == []
+    assert len(run_due_tasks([task], started_at=started_at, now=_aware(2025, 1, 1, 8, 1))) == 1
+
+
+def test_failed_run_is_recorded():
+    task = PeriodicTask(name="f", job="tests.scheduled_fail", interval=60)
+    (run,) = run_due_tasks([task], started_at=timezone.now())
+    assert run.status == "FAILED"
+    assert "scheduled boom" in run.error
+
+
+def test_run_scheduler_once_runs_maintenance_commands(settings):
+    settings.PERIODIC_TASKS = [
+        {"name": "release_expired_reservations", "job": "inventory.release_expired_reservations", "interval": 300},
+    ]
+    call_command("run_scheduler", "--once")
+    run = ScheduledTaskRun.objects.get(name="release_expired_reservations")
+    assert run.status == "SUCCESS"
+    assert run.finished_at is not None
+
+
+def test_periodic_task_requires_one_schedule():
+    with pytest.raises(ValueError):
+        PeriodicTask(name="bad", job="tests.scheduled")
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _fit(user, **params):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.get("/api/slabs/fit/", params)
+
+
+def test_fit_returns_free_slabs_ranked_by_leftover(users, make_product, make_slab, make_contract):
+    product = make_product()
+    now = timezone.now()
+    large = make_slab(product=product, width=Decimal("200.00"), length=Decimal("300.00"))
+    rotated = make_slab(product=product, width=Decimal("250.00"), length=Decimal("70.00"), status="PART_STOCK")
+    make_slab(product=product, width=Decimal("50.00"), length=Decimal("300.00"))  # too narrow
+    make_slab(product=product, width=Decimal("200.00"), length=Decimal("300.00"), thickness=Decimal("3.00"))
+    make_slab(product=product, width=Decimal("200.00"), length=Decimal("300.00"), status="USED")
+    make_slab(product=make_product(), width=Decimal("200.00"), length=Decimal("300.00"))
+    contract = make_contract()
+    make_slab(
+        product=product,
+        soft_reserved_for=contract,
+        soft_reserved_until=now + timedelta(hours=1),
+    )
+    expired = make_slab(
+        product=product,
+        width=Decimal("100.00"),
+        length=Decimal("250.00"),
+        soft_reserved_for=contract,
+        soft_reserved_until=now - timedelta(hours=1),
+    )
+
+    params = {"product": product.id, "thickness": "2", "width": "60", "length": "240"}
+    resp = _fit(users["SALES"], **params)
+    assert resp.status_code == 200
+    assert [row["id"] for row in resp.data] == [rotated.id, expired.id, large.id]
+    assert resp.data[0]["leftover_m2"] == "0.3100"
+
+    resp = _fit(users["SALES"], rotate="0", **params)
+    assert [row["id"] for row in resp.data] == [expired.id, large.id]
+
+
+def test_fit_includes_slabs_soft_reserved_for_given_contract(users, make_product, make_slab, make_contract):
+    product = make_product()
+    contract = make_contract()
+    slab = make_slab(
+        product=product,
+        soft_reserved_for=contract,
+        soft_reserved_until=timezone.now() + timedelta(hours=1),
+    )
+    params = {"product": product.id, "thickness": "2", "width": "50", "length": "50"}
+
+    assert _fit(users["PRODUCTION"], **params).data == []
+    resp = _fit(users["PRODUCTION"], contract=contract.id, **params)
+    assert [row["id"] for row in resp.data] == [slab.id]
+
+
+def test_fit_validates_parameters(users, make_product):
+    resp = _fit(users["SALES"], product=make_product().id, width="abc")
+    assert resp.status_code == 400
+    assert {"thickness", "width", "length"} <= set(resp.data)
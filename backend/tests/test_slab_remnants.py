@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.inventory.models import Slab
+from apps.production.models import WorkOrder
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def test_consume_registers_measured_remnant_and_fit_search_finds_it(users, make_product, make_slab, make_contract):
+    product = make_product()
+    slab = make_slab(product=product, width=Decimal("180.00"), length=Decimal("300.00"), warehouse_location="A-1")
+    work_order = WorkOrder.objects.create(title="Kesim", description="", contract=make_contract())
+    client = _client(users["PRODUCTION"])
+
+    resp = client.post(
+        f"/api/slabs/{slab.id}/consume/",
+        {"work_order": work_order.id, "remnants": [{"width": "60", "length": "120"}, {"width": "10", "length": "300"}]},
+        format="json",
+    )
+    assert resp.status_code == 201, resp.data
+
+    slab.refresh_from_db()
+    assert (slab.status, slab.fire_disposition) == ("USED", "PART_STOCK")
+    work_order.refresh_from_db()
+    assert work_order.slab_id == slab.id
+    # The 10 cm strip is below the minimum remnant size and counts as waste.
+    (remnant,) = slab.remnants.all()
+    assert (remnant.status, remnant.width, remnant.length) == ("PART_STOCK", Decimal("60.00"), Decimal("120.00"))
+    assert (remnant.thickness, remnant.warehouse_location) == (slab.thickness, "A-1")
+    assert remnant.barcode == f"{slab.barcode}-P1"
+
+    resp = client.get(
+        "/api/slabs/fit/", {"product": product.id, "thickness": "2", "width": "50", "length": "100"}
+    )
+    assert [row["id"] for row in resp.data] == [remnant.id]
+    assert resp.data[0]["parent"] == slab.id
+
+    resp = client.post(f"/api/slabs/{slab.id}/consume/", {"remnants": []}, format="json")
+    assert resp.status_code == 400
+
+
+def test_consume_derives_offcut_from_cut_pieces(users, make_slab):
+    slab = make_slab(width=Decimal("100.00"), length=Decimal("300.00"))
+
+    resp = _client(users["PRODUCTION"]).post(
+        f"/api/slabs/{slab.id}/consume/", {"pieces": [{"width": "100", "length": "120"}]}, format="json"
+    )
+    assert resp.status_code == 201, resp.data
+    (remnant,) = resp.data["remnants"]
+    # 300 - 120 - 0.4 cm saw kerf
+    assert (Decimal(remnant["width"]), Decimal(remnant["length"])) == (Decimal("100.00"), Decimal("179.60"))
+
+    scrap = make_slab(width=Decimal("100.00"), length=Decimal("130.00"))
+    resp = _client(users["PRODUCTION"]).post(
+        f"/api/slabs/{scrap.id}/consume/", {"pieces": [{"width": "100", "length": "120"}]}, format="json"
+    )
+    assert resp.status_code == 200
+    scrap.refresh_from_db()
+    assert (scrap.status, scrap.fire_disposition) == ("USED", "SCRAP")
+    assert not scrap.remnants.exists()
+
+
+def test_consume_rejects_oversized_remnant(users, make_slab):
+    slab = make_slab(width=Decimal("100.00"), length=Decimal("200.00"))
+
+    resp = _client(users["PRODUCTION"]).post(
+        f"/api/slabs/{slab.id}/consume/", {"remnants": [{"width": "150", "length": "150"}]}, format="json"
+    )
+    assert resp.status_code == 400
+    slab.refresh_from_db()
+    assert slab.status == "AVAILABLE"
+    assert not Slab.objects.filter(parent=slab).exists()
+
+
+def test_remnant_stock_report_groups_by_product_and_area(users, make_product, make_slab):
+    granite, marble = make_product(name="Granit"), make_product(name="Mermer")
+    make_slab(product=granite, status="PART_STOCK", width=Decimal("40.00"), length=Decimal("100.00"))
+    make_slab(product=granite, status="PART_STOCK", width=Decimal("80.00"), length=Decimal("100.00"))
+    make_slab(product=granite, status="PART_STOCK", width=Decimal("100.00"), length=Decimal("200.00"))
+    make_slab(product=granite)
+    make_slab(product=marble, status="PART_STOCK")
+
+    resp = _client(users["SALES"]).get("/api/slabs/remnant-stock/")
+    assert resp.status_code == 200
+    rows = {row["product__name"]: row for row in resp.data}
+    assert rows["Granit"]["count"] == 3
+    assert Decimal(rows["Granit"]["area_m2"]).quantize(Decimal("0.01")) == Decimal("3.20")
+    assert (rows["Granit"]["small"], rows["Granit"]["medium"], rows["Granit"]["large"]) == (1, 1, 1)
+    assert rows["Mermer"]["count"] == 1
+
+    resp = _client(users["SALES"]).get("/api/slabs/remnant-stock/", {"product": marble.id})
+    assert [row["product__name"] for row in resp.data] == ["Mermer"]
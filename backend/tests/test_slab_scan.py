@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.inventory.models import Slab, StockSummary
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _scan(user, payload):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.post("/api/slabs/scan/", payload, format="json")
+
+
+def test_stock_count_of_800_slabs_is_one_request(users, make_product, django_assert_max_num_queries):
+    product = make_product()
+    Slab.objects.bulk_create(
+        Slab(
+            product=product,
+            barcode=f"PLK-{n:04d}",
+            width=Decimal("100.00"),
+            length=Decimal("200.00"),
+            thickness=Decimal("2.00"),
+            warehouse_location="A-1",
+        )
+        for n in range(800)
+    )
+    Slab.objects.filter(barcode="PLK-0001").update(warehouse_location="B-2")
+    Slab.objects.filter(barcode="PLK-0002").update(status="SOLD")
+    barcodes = [f"PLK-{n:04d}" for n in range(1, 799)] + ["YOK-1", "PLK-0001"]
+
+    with django_assert_max_num_queries(8):
+        resp = _scan(users["PRODUCTION"], {"operation": "count", "location": "A-1", "barcodes": barcodes})
+    assert resp.status_code == 200
+    assert resp.data["summary"] == {"misplaced": 1, "not_in_stock": 1, "ok": 796, "not_found": 1}
+    assert resp.data["missing"] == ["PLK-0000", "PLK-0799"]
+    results = {row["barcode"]: row for row in resp.data["results"]}
+    assert results["PLK-0001"]["location"] == "B-2"
+    assert len(resp.data["results"]) == 799
+
+
+def test_move_and_mark_used_apply_in_bulk(
+    users, make_product, make_slab, django_assert_max_num_queries, django_capture_on_commit_callbacks
+):
+    product = make_product()
+    with django_capture_on_commit_callbacks(execute=True):
+        slabs = [make_slab(product=product, warehouse_location="A-1") for _ in range(3)]
+        sold = make_slab(product=product, status="SOLD")
+    codes = [slab.barcode for slab in slabs]
+
+    resp = _scan(users["PRODUCTION"], {"operation": "move", "location": "C-9", "barcodes": codes + ["YOK"]})
+    assert resp.status_code == 200
+    assert [row["result"] for row in resp.data["results"]] == ["ok", "ok", "ok", "not_found"]
+    assert Slab.objects.filter(warehouse_location="C-9").count() == 3
+
+    with django_capture_on_commit_callbacks(execute=True), django_assert_max_num_queries(8):
+        resp = _scan(users["PRODUCTION"], {"operation": "use", "barcodes": codes[:2] + [sold.barcode]})
+    assert [row["result"] for row in resp.data["results"]] == ["ok", "ok", "rejected"]
+    assert resp.data["results"][0]["status"] == "USED"
+    assert Slab.objects.filter(status="USED").count() == 2
+    summary = {row.status: row.slab_count for row in StockSummary.objects.filter(product=product)}
+    assert summary == {"AVAILABLE": 1, "USED": 2, "SOLD": 1}
+
+    resp = _scan(users["PRODUCTION"], {"operation": "scrap", "barcodes": [codes[2]]})
+    slab = Slab.objects.get(barcode=codes[2])
+    assert (slab.status, slab.fire_disposition) == ("SCRAP", "SCRAP")
+
+
+def test_scan_validation_and_permissions(users):
+    assert _scan(users["PRODUCTION"], {"operation": "move", "barcodes": ["X"]}).status_code == 400
+    assert _scan(users["PRODUCTION"], {"operation": "melt", "barcodes": ["X"]}).status_code == 400
+    assert _scan(users["PRODUCTION"], {"operation": "count", "barcodes": []}).status_code == 400
+    assert _scan(users["SALES"], {"operation": "count", "barcodes": ["X"]}).status_code == 403
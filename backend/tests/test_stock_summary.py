@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.inventory.models import Slab, StockSummary
+from apps.inventory.services import rebuild_stock_summary
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _summary():
+    return {
+        (row.product_id, row.thickness, row.status): (row.slab_count, row.area_m2)
+        for row in StockSummary.objects.all()
+    }
+
+
+def test_slab_area_is_stored_and_rollup_follows_saves(make_product, make_slab, django_capture_on_commit_callbacks):
+    product = make_product()
+    two = Decimal("2.00")
+    # The rollup is recounted once the writing transaction commits.
+    with django_capture_on_commit_callbacks(execute=True):
+        slab = make_slab(product=product)
+        other = make_slab(product=product, width=Decimal("150.00"), length=Decimal("300.00"))
+    assert Slab.objects.filter(id=slab.id).values_list("area_m2", flat=True).get() == Decimal("2.0000")
+    assert _summary() == {(product.id, two, "AVAILABLE"): (2, Decimal("6.5000"))}
+
+    slab.status = "RESERVED"
+    with django_capture_on_commit_callbacks(execute=True):
+        slab.save(update_fields=["status"])
+    assert _summary() == {
+        (product.id, two, "AVAILABLE"): (1, Decimal("4.5000")),
+        (product.id, two, "RESERVED"): (1, Decimal("2.0000")),
+    }
+
+    slab.length = Decimal("100.00")
+    with django_capture_on_commit_callbacks(execute=True):
+        slab.save(update_fields=["length"])
+    assert Slab.objects.get(id=slab.id).area_m2 == Decimal("1.0000")
+    assert _summary()[(product.id, two, "RESERVED")] == (1, Decimal("1.0000"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        other.delete()
+        slab.delete()
+    assert _summary() == {}
+
+
+def test_rebuild_matches_incremental_rollup(make_product, make_slab, django_capture_on_commit_callbacks):
+    granite, marble = make_product(), make_product()
+    with django_capture_on_commit_callbacks(execute=True):
+        make_slab(product=granite)
+        make_slab(product=granite, thickness=Decimal("3.00"), status="PART_STOCK")
+        make_slab(product=marble, status="SOLD")
+    incremental = _summary()
+
+    StockSummary.objects.all().delete()
+    assert rebuild_stock_summary() == 3
+    assert _summary() == incremental
+
+    StockSummary.objects.update(slab_count=99)
+    call_command("rebuild_stock_summary")
+    assert _summary() == incremental
+
+
+def test_stock_summary_endpoint_filters(users, make_product, make_slab, django_capture_on_commit_callbacks):
+    product = make_product(name="Granit")
+    with django_capture_on_commit_callbacks(execute=True):
+        make_slab(product=product)
+        make_slab(product=product, status="PART_STOCK", width=Decimal("50.00"), length=Decimal("60.00"))
+        make_slab(product=make_product(), status="PART_STOCK")
+    client = APIClient()
+    client.force_authenticate(user=users["PRODUCTION"])
+
+    resp = client.get("/api/stock-summary/", {"product": product.id})
+    assert resp.status_code == 200
+    assert [(row["status"], row["slab_count"], row["area_m2"]) for row in resp.data] == [
+        ("AVAILABLE", 1, "2.0000"),
+        ("PART_STOCK", 1, "0.3000"),
+    ]
+    assert resp.data[0]["product_name"] == "Granit"
+
+    resp = client.get("/api/stock-summary/", {"status": "PART_STOCK"})
+    assert len(resp.data) == 2
+    assert client.get("/api/stock-summary/", {"thickness": "x"}).status_code == 400
+
+
+def test_recount_waits_for_commit(make_product, make_slab, django_capture_on_commit_callbacks):
+    product = make_product()
+    with django_capture_on_commit_callbacks() as callbacks:
+        make_slab(product=product)
+        # Nothing is counted inside the writing transaction.
+        assert _summary() == {}
+    for callback in callbacks:
+        callback()
+    assert _summary() == {(product.id, Decimal("2.00"), "AVAILABLE"): (1, Decimal("2.0000"))}
@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.crm.models import Customer
+from apps.finance.models import Cheque, Transaction
+
+
+pytestmark = pytest.mark.django_db
+
+
+def _selects_on(table, queries):
+    return [q["sql"] for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"]]
+
+
+def test_loaded_instance_reports_changes_without_select(make_cheque):
+    cheque = Cheque.objects.get(pk=make_cheque().pk)
+    assert not cheque.has_changed()
+
+    cheque.status = "COLLECTED"
+    assert cheque.has_changed("status") and not cheque.has_changed("amount")
+    assert cheque.previous("status") == "PORTFOLIO"
+
+    with CaptureQueriesContext(connection) as ctx:
+        cheque.save()
+    assert _selects_on("finance_cheque", ctx.captured_queries) == []
+    assert cheque.previous("status") == "COLLECTED"
+    assert not cheque.has_changed()
+
+
+def test_update_fields_only_moves_written_fields(make_cheque):
+    customer_id = make_cheque().received_from_customer_id
+    cheque = Cheque.objects.get(received_from_customer_id=customer_id)
+
+    cheque.status = "BANK"
+    cheque.amount = Decimal("80.00")
+    cheque.save(update_fields=["status"])
+
+    assert cheque.previous("status") == "BANK"
+    # amount was not written, so the DB still holds the loaded value
+    assert cheque.previous("amount") == Decimal("50.00")
+    assert cheque.has_changed("amount")
+    cheque.refresh_from_db(fields=["amount"])
+    assert not cheque.has_changed()
+
+
+def test_deferred_and_bulk_instances_fall_back_to_one_select(make_cheque, make_customer):
+    original = make_cheque()
+    deferred = Cheque.objects.only("id", "serial_number").get(pk=original.pk)
+
+    with CaptureQueriesContext(connection) as ctx:
+        deferred.status = "BOUNCED"
+        deferred.save(update_fields=["status"])
+    selects = _selects_on("finance_cheque", ctx.captured_queries)
+    tracked_loads = [sql for sql in selects if '"finance_cheque"."status"' in sql]
+    assert len(tracked_loads) == 1
+    customer = Customer.objects.get(pk=original.received_from_customer_id)
+    assert customer.portfolio_cheque_total == Decimal("0.00")
+
+    customer = make_customer()
+    created = Cheque.objects.bulk_create(
+        [
+            Cheque(serial_number=f"BULK-{n}", amount=Decimal("10.00"), due_date=original.due_date)
+            for n in range(2)
+        ]
+    )
+    loaded = list(Cheque.objects.filter(serial_number__startswith="BULK-").order_by("serial_number"))
+    for cheque in loaded:
+        cheque.received_from_customer = customer
+    Cheque.objects.bulk_update(loaded, ["received_from_customer"])
+    # bulk_update bypasses save(): the snapshot is stale until reset
+    assert loaded[0].previous("received_from_customer") is None
+    loaded[0].reset_tracking()
+    assert loaded[0].previous("received_from_customer") == customer.pk
+    assert created[1].previous("status") == "PORTFOLIO"
+
+
+def test_transaction_update_recalculates_old_and_new_account(make_transaction, make_account):
+    old_account, new_account = make_account(), make_account()
+    transaction = Transaction.objects.get(pk=make_transaction(account=old_account).pk)
+
+    transaction.target_account = new_account
+    with CaptureQueriesContext(connection) as ctx:
+        transaction.save()
+    # only the balance aggregates read the table; no pre-save lookup of the row
+    selects = _selects_on("finance_transaction", ctx.captured_queries)
+    assert selects and all("SUM(" in sql for sql in selects)
+
+    old_account.refresh_from_db()
+    new_account.refresh_from_db()
+    assert old_account.cached_balance == old_account.initial_balance
+    assert new_account.cached_balance == new_account.initial_balance + Decimal("100.00")
+
+
+def test_transaction_create_does_not_read_its_own_row(make_account):
+    account = make_account()
+    with CaptureQueriesContext(connection) as ctx:
+        Transaction.objects.create(
+            transaction_type="INCOME", amount=Decimal("100.00"), description="Test", target_account=account
+        )
+    selects = _selects_on("finance_transaction", ctx.captured_queries)
+    assert selects and all("SUM(" in sql for sql in selects)
+    account.refresh_from_db()
+    assert account.cached_balance == account.initial_balance + Decimal("100.00")